@@ -0,0 +1,122 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Threading.Tasks;
+
+namespace awcsc
+{
+    /// <summary>
+    /// 多数の構成(材料、寸法、衝突速度など)をまとめて計算するためのクラス。
+    /// 
+    /// 構成ごとにMaterial→Target/Penetrator→Calcを作ってcalcを呼ぶと、pythonから使う場合に
+    /// 1件あたり何十回も.NETとの境界をまたぐ。
+    /// <see cref="solve"/>は1行1構成の行列を1つの配列で受け取り、全行を.NET側で計算して1つの配列で返すので、
+    /// 境界をまたぐのは呼び出し1回で済む。
+    /// 各行の計算は<see cref="Calc.calc_final(in double)"/>で、行ごとに並列に行う。
+    /// </summary>
+    public static class Batch
+    {
+        /// <summary>
+        /// <see cref="solve"/>に渡す行列の列の並び。
+        /// 単位は<see cref="Material"/>のコンストラクタ、<see cref="Calc.GetParameter"/>と同じ(強度などは[GPa])。
+        /// "T.Ys"が0なら"T.Y0"と同じ(均質な標的)。"K1", "K2"はCalcForrLVでのみ使う。
+        /// "integrator"は<see cref="Integrator"/>の値(0: Explicit, 1: Implicit, 2: Auto)で、AW系のモデルでのみ使う
+        /// </summary>
+        public static readonly string[] Columns = new string[] {
+            "P.rho", "P.Y", "P.E", "P.K0", "P.k", "P.L", "P.D", "P.Crh",
+            "T.rho", "T.Y0", "T.E", "T.K0", "T.k", "T.Ys", "T.ts", "T.th",
+            "V0", "dt", "fit_param[0]", "fit_param[1]", "K1", "K2", "integrator" };
+
+        /// <summary>
+        /// 1行分のパラメータからCalcを作る
+        /// </summary>
+        /// <param name="model">モデルの名前</param>
+        /// <param name="p">パラメータの配列</param>
+        /// <param name="o">行の先頭の位置</param>
+        /// <returns>Calc</returns>
+        static Calc make(string model, double[] p, int o)
+        {
+            var P = new Penetrator(new Material(p[o], p[o + 1], p[o + 2], p[o + 3], p[o + 4]),
+                p[o + 5], p[o + 6], p[o + 7]);
+            double Ys = p[o + 13] == 0d ? p[o + 9] : p[o + 13];
+            var T = new Target(new Material(p[o + 8], p[o + 9], p[o + 10], p[o + 11], p[o + 12]),
+                Ys, p[o + 14], p[o + 15]);
+            double V0 = p[o + 16];
+            var fit_param = new double[] { p[o + 18], p[o + 19] };
+            var integrator = (Integrator)(int)p[o + 22];
+            switch (model)
+            {
+                case "CalcAW": return new CalcAW(P, T, V0, fit_param) { integrator = integrator };
+                case "CalcAWLV": return new CalcAWLV(P, T, V0, fit_param) { integrator = integrator };
+                case "CalcAWHVLV": return new CalcAWHVLV(P, T, V0, fit_param) { integrator = integrator };
+                case "CalcForrLV": return new CalcForrLV(P, T, V0, fit_param, p[o + 20], p[o + 21]);
+                case "CalcMBE": return new CalcMBE(P, T, V0, fit_param);
+                default: throw new ArgumentException($"unknown model {model}");
+            }
+        }
+
+        /// <summary>
+        /// 行列の各行の構成について、侵徹終了時の状態を計算する。
+        /// 
+        /// 計算に失敗した行は結果がすべてNaNになる(他の行の計算は続ける)。
+        /// </summary>
+        /// <param name="model">"CalcAW", "CalcAWLV", "CalcAWHVLV", "CalcForrLV", "CalcMBE"のいずれか</param>
+        /// <param name="param">n行<see cref="Columns"/>.Length列の行列を行ごとに並べた配列</param>
+        /// <param name="n">行数</param>
+        /// <param name="fields">返す値の名前(<see cref="Calc.Channels"/>)。nullならすべて</param>
+        /// <param name="max_parallel">同時に計算する行数の上限。0以下なら制限しない</param>
+        /// <returns>n行fields.Length列の行列を行ごとに並べた配列</returns>
+        public static double[] solve(string model, double[] param, int n, string[] fields = null, int max_parallel = 0)
+        {
+            int ncol = Columns.Length;
+            if (param.Length != n * ncol)
+            {
+                throw new ArgumentException($"param should have {n}x{ncol} elements");
+            }
+            if (fields == null)
+            {
+                fields = Calc.Channels;
+            }
+            var idx = new int[fields.Length];
+            for (int j = 0; j < fields.Length; j++)
+            {
+                idx[j] = Array.IndexOf(Calc.Channels, fields[j]);
+                if (idx[j] < 0)
+                {
+                    throw new ArgumentException($"unknown field {fields[j]}");
+                }
+            }
+            //モデル名はここで確かめておく
+            if (n > 0)
+            {
+                make(model, param, 0);
+            }
+
+            int m = idx.Length;
+            var result = new double[n * m];
+            var options = new ParallelOptions();
+            if (max_parallel > 0)
+            {
+                options.MaxDegreeOfParallelism = max_parallel;
+            }
+            Parallel.For(0, n, options, i =>
+            {
+                try
+                {
+                    var r = make(model, param, i * ncol).calc_final(param[i * ncol + 17]);
+                    for (int j = 0; j < m; j++)
+                    {
+                        result[i * m + j] = r[idx[j]];
+                    }
+                }
+                catch (Exception)
+                {
+                    for (int j = 0; j < m; j++)
+                    {
+                        result[i * m + j] = double.NaN;
+                    }
+                }
+            });
+            return result;
+        }
+    }
+}
@@ -86,6 +86,20 @@ namespace awcsc
         /// <seealso cref="Rc"/>
         public List<double> fit_param { get { return fit_param_; } }
 
+        /// <summary>
+        /// <see cref="calc_final(in double)"/>が返す配列の並び。<see cref="calc(in double, in double)"/>の辞書のkeyと同じ順。
+        /// <see cref="calc(in double, in double, in string[], StageLog)"/>で記録する値を選ぶときの名前でもある
+        /// </summary>
+        public static readonly string[] Channels = new string[] {
+            "t", "DoP", "v", "u", "L", "Le", "vdot", "Ldot", "s", "alpha",
+            "udot", "sdot", "vu_sdot", "alphadot", "Y", "Rt" };
+
+        /// <summary>
+        /// <see cref="Channels"/>のうち、積分の状態そのものの値。
+        /// 残りのY, Rtは記録したDoP, alphaから<see cref="derive"/>で後から求められる
+        /// </summary>
+        public static readonly string[] PrimaryChannels = Channels.Take(14).ToArray();
+
         /// <summary>
         /// 速度V0で衝突する侵徹挙動を計算を実行する関数。
         /// 各種モデルについて統一的にこの関数を用いて計算を行い、各パラメータが格納された辞書を返す。
@@ -101,6 +115,22 @@ namespace awcsc
         /// <returns>結果を格納した辞書。引数の詳細は<see cref="State"/>参照</returns>
         /// <seealso cref="State"/>
         public virtual Dictionary<string, List<double>> calc(in double dt0, in double dt_log0)
+        {
+            return calc(dt0, dt_log0, Channels);
+        }
+
+        /// <summary>
+        /// <see cref="calc(in double, in double)"/>と同じ計算を行い、fieldsで指定した値だけを記録する。
+        /// 指定しなかった値はListの確保も値の計算もしないので、必要な値が少ないほどメモリとpythonへの受け渡しが減る。
+        /// Y, Rtは指定したときだけ計算する。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <param name="dt_log0">計算結果取得ステップ[s]</param>
+        /// <param name="fields">記録する値の名前。使える名前は<see cref="Channels"/>。辞書はこの順に並ぶ</param>
+        /// <param name="stage_log">各段階が始まった時刻とDoPを記録する。nullなら記録しない</param>
+        /// <returns>fieldsの値だけを格納した辞書</returns>
+        /// <seealso cref="State"/>
+        public virtual Dictionary<string, List<double>> calc(in double dt0, in double dt_log0, in string[] fields, StageLog stage_log = null)
         {
             double time_log = 0d;
             int size = 500;
@@ -109,31 +139,27 @@ namespace awcsc
             double dt = dt0;
             double dt_log = dt_log0;
 
+            int[] idx = channel_index(fields);
+            var lists = new List<double>[idx.Length];
+            bool needY = false;
+            for (int k = 0; k < idx.Length; k++)
+            {
+                lists[k] = new List<double>() { Capacity = size };
+                result[Channels[idx[k]]] = lists[k];
+                needY = needY || idx[k] >= 14;
+            }
+
             State stold;
             var stnew = new State();
 
-            result["t"] = new List<double>() { Capacity = size };
-            result["DoP"] = new List<double>() { Capacity = size };
-            result["v"] = new List<double>() { Capacity = size };
-            result["u"] = new List<double>() { Capacity = size };
-            result["L"] = new List<double>() { Capacity = size };
-            result["Le"] = new List<double>() { Capacity = size };
-            result["vdot"] = new List<double>() { Capacity = size };
-            result["Ldot"] = new List<double>() { Capacity = size };
-            result["s"] = new List<double>() { Capacity = size };
-            result["alpha"] = new List<double>() { Capacity = size };
-
-            result["udot"] = new List<double>() { Capacity = size };
-            result["sdot"] = new List<double>() { Capacity = size };
-            result["vu_sdot"] = new List<double>() { Capacity = size };
-            result["alphadot"] = new List<double>() { Capacity = size };
-            result["Y"] = new List<double>() { Capacity = size };
-            result["Rt"] = new List<double>() { Capacity = size };
-
-            stold = init_State(dt);
+            Calc stage = first_stage();
+            double t0 = 0d, DoP0 = 0d;
+            start_log(stage_log, stage);
+            var watch = stop_?.start();
+            var rec_t = watch != null ? new List<double>() { Capacity = size } : null;
+            stold = stage.init_State(dt);
             stnew.Copy(stold);
 
-            int i = 0;
             while (endcond)
             {
                 while (endcond && (stnew.t < time_log))
@@ -141,35 +167,441 @@ namespace awcsc
 
                     Swap(ref stnew, ref stold);
                     
-                    stnew = cycle(dt, stold);
+                    stnew = stage.cycle(dt, stold);
                    
-                    endcond = cond_endcalc(stnew, stold); //将来の変数からtmaxをへらすようの変更のための前準備
+                    endcond = stage.cond_endcalc(stnew, stold); //将来の変数からtmaxをへらすようの変更のための前準備
+                    if (endcond && watch != null && watch.check(stage, stnew, t0, DoP0))
+                    {
+                        //止める条件を満たしたステップを侵徹終了時の状態として記録する
+                        endcond = false;
+                        Swap(ref stnew, ref stold);
+                    }
                 };
 
-                double Y = T_.calc_Y(stold.DoP) * 1e-9;
-                result["u"].Add(stold.u);
-                result["v"].Add(stold.v);
-                result["s"].Add(stold.s);
-                result["L"].Add(stold.L);
-                result["alpha"].Add(stold.alpha);
-                result["Le"].Add(stold.Le);
-                result["vdot"].Add(stold.vdot);
-                result["udot"].Add(stold.udot);
-                result["Ldot"].Add(stold.Ldot);
-                result["sdot"].Add(stold.sdot);
-                result["vu_sdot"].Add(stold.vu_sdot);
-                result["alphadot"].Add(stold.alphadot);
-                result["DoP"].Add(stold.DoP);
-                result["t"].Add(stold.t * 1e3);
-                result["Y"].Add(Y);
-                result["Rt"].Add(getRt(Y*1e9, stold) * 1e-9);
+                double Y = needY ? stage.T_.calc_Y(stold.DoP) * 1e-9 : 0d;
+                for (int k = 0; k < idx.Length; k++)
+                {
+                    lists[k].Add(stage.channel_value(idx[k], stold, Y) + stage_offset(idx[k], t0, DoP0));
+                }
+                rec_t?.Add(stold.t * 1e3 + t0);
 
                 time_log += dt_log;
                 //stnewだと1サイクル余分に進んでいるためstoldで
+
+                if (!endcond && (watch == null || watch.reason < 0))
+                {
+                    Calc next = next_stage(stage, stold);
+                    if (next != null)
+                    {
+                        //次の段階は自分の時刻0から記録し直す
+                        t0 += stold.t * 1e3;
+                        DoP0 += stold.DoP;
+                        stage = next;
+                        stage_log?.Add(stage, t0, DoP0);
+                        stold = stage.init_State(dt);
+                        stnew.Copy(stold);
+                        time_log = 0d;
+                        endcond = true;
+                    }
+                }
             };
+            finish_stop(watch, lists, idx, rec_t);
+            return result;
+        }
+
+        /// <summary>
+        /// policyで決めた条件を満たしたステップだけを記録しながら、速度V0で衝突する侵徹挙動を計算する。
+        /// 変化の大きい区間は細かく、準定常な区間は粗く記録できる。
+        /// 記録は<see cref="calc(in double, in double, in string[], StageLog)"/>と違い、条件を満たしたステップの状態そのもの。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <param name="policy">記録する条件</param>
+        /// <param name="fields">記録する値の名前。使える名前は<see cref="Channels"/></param>
+        /// <param name="stage_log">各段階が始まった時刻とDoPを記録する。nullなら記録しない</param>
+        /// <returns>fieldsの値だけを格納した辞書</returns>
+        /// <seealso cref="LogPolicy"/>
+        public virtual Dictionary<string, List<double>> calc(in double dt0, LogPolicy policy, in string[] fields, StageLog stage_log = null)
+        {
+            int size = 500;
+            var result = new Dictionary<string, List<double>>();
+            double dt = dt0;
+            double dt_log = policy.dt_log;
+            double dDoP = policy.dDoP;
+            int max_points = policy.max_points;
+            if (max_points != 0 && max_points < 3)
+            {
+                throw new ArgumentException("max_points should be 0 or >= 3");
+            }
+
+            int[] idx = channel_index(fields);
+            var lists = new List<double>[idx.Length];
+            bool needY = false;
+            for (int k = 0; k < idx.Length; k++)
+            {
+                lists[k] = new List<double>() { Capacity = size };
+                result[Channels[idx[k]]] = lists[k];
+                needY = needY || idx[k] >= 14;
+            }
+
+            var tol_idx = channel_index(policy.tolerance.Keys.ToArray());
+            var tol = new double[tol_idx.Length];
+            var tol_last = new double[tol_idx.Length];
+            bool needY_tol = false;
+            for (int j = 0; j < tol_idx.Length; j++)
+            {
+                tol[j] = policy.tolerance[Channels[tol_idx[j]]];
+                needY_tol = needY_tol || tol_idx[j] >= 14;
+            }
+
+            Calc stage = first_stage();
+            double t0 = 0d, DoP0 = 0d;
+            start_log(stage_log, stage);
+            var watch = stop_?.start();
+            var rec_t = watch != null ? new List<double>() { Capacity = size } : null;
+            double t_last = 0d, DoP_last = 0d;
+            int count = 0;
+            void record(State st)
+            {
+                double Y = (needY || needY_tol) ? stage.T_.calc_Y(st.DoP) * 1e-9 : 0d;
+                for (int k = 0; k < idx.Length; k++)
+                {
+                    lists[k].Add(stage.channel_value(idx[k], st, Y) + stage_offset(idx[k], t0, DoP0));
+                }
+                for (int j = 0; j < tol_idx.Length; j++)
+                {
+                    tol_last[j] = stage.channel_value(tol_idx[j], st, Y) + stage_offset(tol_idx[j], t0, DoP0);
+                }
+                rec_t?.Add(st.t * 1e3 + t0);
+                t_last = st.t;
+                DoP_last = st.DoP;
+                count++;
+                if (max_points > 0 && count >= max_points - 1)
+                {
+                    foreach (var l in lists)
+                    {
+                        thin(l);
+                    }
+                    if (rec_t != null)
+                    {
+                        thin(rec_t);
+                    }
+                    count = (count + 1) / 2 + ((count - 1) % 2);
+                    dt_log *= 2d;
+                    dDoP *= 2d;
+                    for (int j = 0; j < tol.Length; j++)
+                    {
+                        tol[j] *= 2d;
+                    }
+                }
+            }
+
+            State stold = stage.init_State(dt);
+            State stnew = new State();
+            stnew.Copy(stold);
+            record(stold);
+            bool logged = true;
+            bool endcond = true;
+            while (endcond)
+            {
+                Swap(ref stnew, ref stold);
+                stnew = stage.cycle(dt, stold);
+                endcond = stage.cond_endcalc(stnew, stold);
+                if (endcond && watch != null && watch.check(stage, stnew, t0, DoP0))
+                {
+                    //止める条件を満たしたステップを侵徹終了時の状態として記録する
+                    Swap(ref stnew, ref stold);
+                    logged = false;
+                    break;
+                }
+                if (!endcond)
+                {
+                    Calc next = next_stage(stage, stold);
+                    if (next == null)
+                    {
+                        break;
+                    }
+                    //段階の終わりと次の段階の始まりは必ず記録する
+                    if (!logged)
+                    {
+                        record(stold);
+                    }
+                    t0 += stold.t * 1e3;
+                    DoP0 += stold.DoP;
+                    stage = next;
+                    stage_log?.Add(stage, t0, DoP0);
+                    stold = stage.init_State(dt);
+                    stnew.Copy(stold);
+                    record(stold);
+                    logged = true;
+                    endcond = true;
+                    continue;
+                }
+
+                bool log = (dt_log > 0d && stnew.t - t_last >= dt_log)
+                    || (dDoP > 0d && stnew.DoP - DoP_last >= dDoP);
+                if (!log && tol_idx.Length > 0)
+                {
+                    double Y = needY_tol ? stage.T_.calc_Y(stnew.DoP) * 1e-9 : 0d;
+                    for (int j = 0; j < tol_idx.Length && !log; j++)
+                    {
+                        log = Math.Abs(stage.channel_value(tol_idx[j], stnew, Y) + stage_offset(tol_idx[j], t0, DoP0) - tol_last[j]) > tol[j];
+                    }
+                }
+                logged = log;
+                if (log)
+                {
+                    record(stnew);
+                }
+            }
+            //stnewは終了条件を満たしたステップなので、侵徹終了時の状態はstold
+            if (!logged)
+            {
+                record(stold);
+            }
+            finish_stop(watch, lists, idx, rec_t);
             return result;
         }
+
+        /// <summary>
+        /// stage_logを空にして最初の段階を記録する。このCalc自身の段階は、<see cref="derive"/>で呼んだCalcの式を使うようにnullで記録する
+        /// </summary>
+        /// <param name="stage_log">記録先。nullなら何もしない</param>
+        /// <param name="stage">最初の段階</param>
+        void start_log(StageLog stage_log, Calc stage)
+        {
+            if (stage_log == null)
+            {
+                return;
+            }
+            stage_log.Clear();
+            stage_log.Add(ReferenceEquals(stage, this) ? null : stage, 0d, 0d);
+        }
+
+        /// <summary>
+        /// 止める条件を調べ終え、<see cref="stopped_by"/>を設定する。
+        /// predicateで止めたときは、その行より後の記録を捨て、その行を最後の記録にする
+        /// </summary>
+        /// <param name="watch">条件を調べていたオブジェクト。条件がなければnull</param>
+        /// <param name="lists">記録</param>
+        /// <param name="idx">記録している値の<see cref="Channels"/>での位置</param>
+        /// <param name="rec_t">各記録の時刻[ms]</param>
+        void finish_stop(StopCondition.Watch watch, List<double>[] lists, int[] idx, List<double> rec_t)
+        {
+            if (watch == null)
+            {
+                return;
+            }
+            if (watch.reason < 0)
+            {
+                watch.flush();
+            }
+            stopped_by = watch.reason;
+            if (watch.row != null && rec_t != null)
+            {
+                int n = rec_t.Count;
+                while (n > 0 && rec_t[n - 1] >= watch.row[0])
+                {
+                    n--;
+                }
+                for (int k = 0; k < lists.Length; k++)
+                {
+                    lists[k].RemoveRange(n, lists[k].Count - n);
+                    lists[k].Add(watch.row[idx[k]]);
+                }
+            }
+        }
+
+        /// <summary>
+        /// 最初と最後を残して1つおきに間引く
+        /// </summary>
+        /// <param name="l">記録</param>
+        static void thin(List<double> l)
+        {
+            int m = l.Count;
+            if (m < 3)
+            {
+                return;
+            }
+            double last = l[m - 1];
+            int n = (m + 1) / 2;
+            for (int i = 1; i < n; i++)
+            {
+                l[i] = l[2 * i];
+            }
+            l.RemoveRange(n, m - n);
+            if ((m - 1) % 2 == 1)
+            {
+                l.Add(last);
+            }
+        }
+
+        /// <summary>
+        /// 計算を始める段階。普通はこのCalc自身。
+        /// 途中でモデルを切り替える<see cref="CalcAWHVLV"/>は最初の段階のCalcを返す。
+        /// </summary>
+        /// <returns>最初の段階のCalc</returns>
+        protected virtual Calc first_stage()
+        {
+            return this;
+        }
+
+        /// <summary>
+        /// 段階stageが終了条件を満たしたときに、続けて計算する次の段階のCalcを返す。
+        /// 次の段階は<see cref="init_State(in double)"/>から自分の時刻0、DoP=0で計算し、
+        /// 記録するときに前の段階までのt, DoPを足すので、1つの記録に続けて書き込まれる。
+        /// </summary>
+        /// <param name="stage">終了した段階のCalc</param>
+        /// <param name="st">stageの侵徹終了時の状態</param>
+        /// <returns>次の段階のCalc。なければnull</returns>
+        protected virtual Calc next_stage(Calc stage, in State st)
+        {
+            return null;
+        }
+
+        /// <summary>
+        /// 段階を切り替えたときに<see cref="Channels"/>のk番目の値に足す、前の段階までの値
+        /// </summary>
+        /// <param name="k">Channelsでの位置</param>
+        /// <param name="t0">前の段階までの時間[ms]</param>
+        /// <param name="DoP0">前の段階までのDoP[m]</param>
+        /// <returns>足す値</returns>
+        static double stage_offset(int k, double t0, double DoP0)
+        {
+            return k == 0 ? t0 : k == 1 ? DoP0 : 0d;
+        }
+
+        /// <summary>
+        /// <see cref="Channels"/>のk番目の値を、前の段階までのt, DoPを足して求める。<see cref="StopCondition"/>が使う
+        /// </summary>
+        /// <param name="k">Channelsでの位置</param>
+        /// <param name="st">この段階の状態</param>
+        /// <param name="t0">前の段階までの時間[ms]</param>
+        /// <param name="DoP0">前の段階までのDoP[m]</param>
+        /// <returns>値。単位は<see cref="channel_value"/>と同じ</returns>
+        internal double stage_value(int k, in State st, double t0, double DoP0)
+        {
+            double Y = k >= 14 ? T_.calc_Y(st.DoP) * 1e-9 : 0d;
+            return channel_value(k, st, Y) + stage_offset(k, t0, DoP0);
+        }
+
+        /// <summary>
+        /// <see cref="Channels"/>のすべての値を、前の段階までのt, DoPを足して求める。<see cref="StopCondition"/>が使う
+        /// </summary>
+        /// <param name="st">この段階の状態</param>
+        /// <param name="t0">前の段階までの時間[ms]</param>
+        /// <param name="DoP0">前の段階までのDoP[m]</param>
+        /// <returns>各値。並びは<see cref="Channels"/></returns>
+        internal double[] stage_values(in State st, double t0, double DoP0)
+        {
+            var ret = final_values(st);
+            ret[0] += t0;
+            ret[1] += DoP0;
+            return ret;
+        }
+
+        /// <summary>
+        /// 値の名前を<see cref="Channels"/>での位置に変換する。重複は除く
+        /// </summary>
+        /// <param name="fields">値の名前</param>
+        /// <returns>Channelsでの位置</returns>
+        protected static int[] channel_index(in string[] fields)
+        {
+            var idx = new List<int>();
+            foreach (var f in fields)
+            {
+                int i = Array.IndexOf(Channels, f);
+                if (i < 0)
+                {
+                    throw new ArgumentException($"unknown field {f}");
+                }
+                if (!idx.Contains(i))
+                {
+                    idx.Add(i);
+                }
+            }
+            return idx.ToArray();
+        }
+
+        /// <summary>
+        /// <see cref="Channels"/>のk番目の値をStateから取り出す
+        /// </summary>
+        /// <param name="k">Channelsでの位置</param>
+        /// <param name="st">State</param>
+        /// <param name="Y">深さst.DoPでの標的強度[GPa]。Y, Rt以外では使わない</param>
+        /// <returns>値。tは[ms]、Y,Rtは[GPa]</returns>
+        protected double channel_value(int k, in State st, double Y)
+        {
+            switch (k)
+            {
+                case 0: return st.t * 1e3;
+                case 1: return st.DoP;
+                case 2: return st.v;
+                case 3: return st.u;
+                case 4: return st.L;
+                case 5: return st.Le;
+                case 6: return st.vdot;
+                case 7: return st.Ldot;
+                case 8: return st.s;
+                case 9: return st.alpha;
+                case 10: return st.udot;
+                case 11: return st.sdot;
+                case 12: return st.vu_sdot;
+                case 13: return st.alphadot;
+                case 14: return Y;
+                default: return getRt(Y * 1e9, st) * 1e-9;
+            }
+        }
         
+        /// <summary>
+        /// 記録したDoP, alphaから、<see cref="PrimaryChannels"/>に含まれない値(Y, Rt)をまとめて求める。
+        /// 記録するときに<see cref="channel_value"/>で求める値と同じく、各点を記録した段階の式と、その段階の中でのDoPを使う。
+        /// 各点の段階は、計算中に記録したstage_logの段階の始まった時刻と各点の時刻tで決める。
+        /// 切り替わった時刻には前の段階の終わりと次の段階の始まりの2点が記録されているので、同じ時刻が続いたら2点目から次の段階とする
+        /// </summary>
+        /// <param name="field">値の名前。"Y"か"Rt"</param>
+        /// <param name="DoP">侵徹深さ[m]</param>
+        /// <param name="alpha">標的塑性領域[-]。Yでは使わないのでnullでよい</param>
+        /// <param name="t">時刻[ms]。記録した順に並べること。段階が1つならnullでよい</param>
+        /// <param name="stage_log">計算したときに各段階を記録したもの。nullなら最初の段階の式とDoPをそのまま使う</param>
+        /// <returns>各点の値[GPa]</returns>
+        public double[] derive(string field, double[] DoP, double[] alpha, double[] t = null, StageLog stage_log = null)
+        {
+            int k = Array.IndexOf(Channels, field);
+            if (k < PrimaryChannels.Length)
+            {
+                throw new ArgumentException($"{field} is not a derived field");
+            }
+            if (k > 14 && (alpha == null || alpha.Length != DoP.Length))
+            {
+                throw new ArgumentException("alpha should have the same length as DoP");
+            }
+            int n = stage_log == null ? 1 : stage_log.Count;
+            if (n > 1 && (t == null || t.Length != DoP.Length))
+            {
+                throw new ArgumentException("t should have the same length as DoP");
+            }
+
+            int j = 0;
+            Calc stage = n > 1 ? stage_log.stages[0] ?? this : first_stage();
+            double DoP0 = 0d;
+            var st = new State();
+            var ret = new double[DoP.Length];
+            for (int i = 0; i < ret.Length; i++)
+            {
+                while (j + 1 < n
+                    && (t[i] > stage_log.t0_[j + 1] || (t[i] == stage_log.t0_[j + 1] && i > 0 && t[i - 1] == stage_log.t0_[j + 1])))
+                {
+                    j++;
+                    stage = stage_log.stages[j] ?? this;
+                    DoP0 = stage_log.DoP0_[j];
+                }
+                st.DoP = DoP[i] - DoP0;
+                st.alpha = k > 14 ? alpha[i] : 0d;
+                ret[i] = stage.channel_value(k, st, stage.T_.calc_Y(st.DoP) * 1e-9);
+            }
+            return ret;
+        }
+
         /// <summary>
         /// 速度V0で衝突する侵徹挙動を計算を実行する関数。
         /// 各種モデルについて統一的にこの関数を用いて計算を行い、各パラメータが格納された辞書を返す。
@@ -188,7 +620,21 @@ namespace awcsc
         /// <seealso cref="calc(in double, in double)"/>
         public virtual Dictionary<string, double[]> calcPyInterop(in double dt0, in double dt_log0)
         {
-            Dictionary<string, List<double>> Listres = calc(dt0, dt_log0);
+            return calcPyInterop(dt0, dt_log0, Channels);
+        }
+
+        /// <summary>
+        /// <see cref="calc(in double, in double, in string[], StageLog)"/>の結果を生の配列で返す。
+        /// 指定しなかった値はpythonに渡さないので、受け渡しの量も減る。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <param name="dt_log0">計算結果取得ステップ[s]</param>
+        /// <param name="fields">記録する値の名前。使える名前は<see cref="Channels"/></param>
+        /// <param name="stage_log">各段階が始まった時刻とDoPを記録する。nullなら記録しない</param>
+        /// <returns>fieldsの値だけを格納した辞書</returns>
+        public virtual Dictionary<string, double[]> calcPyInterop(in double dt0, in double dt_log0, in string[] fields, StageLog stage_log = null)
+        {
+            Dictionary<string, List<double>> Listres = calc(dt0, dt_log0, fields, stage_log);
             Dictionary<string, double[]> result = new Dictionary<string, double[]>();
 
             foreach(var key in Listres.Keys)
@@ -198,6 +644,26 @@ namespace awcsc
             return result;
         }
 
+        /// <summary>
+        /// <see cref="calc(in double, LogPolicy, in string[], StageLog)"/>の結果を生の配列で返す。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <param name="policy">記録する条件</param>
+        /// <param name="fields">記録する値の名前。使える名前は<see cref="Channels"/></param>
+        /// <param name="stage_log">各段階が始まった時刻とDoPを記録する。nullなら記録しない</param>
+        /// <returns>fieldsの値だけを格納した辞書</returns>
+        public virtual Dictionary<string, double[]> calcPyInterop(in double dt0, LogPolicy policy, in string[] fields, StageLog stage_log = null)
+        {
+            Dictionary<string, List<double>> Listres = calc(dt0, policy, fields, stage_log);
+            Dictionary<string, double[]> result = new Dictionary<string, double[]>();
+
+            foreach (var key in Listres.Keys)
+            {
+                result[key] = Listres[key].ToArray();
+            }
+            return result;
+        }
+
         /// <summary>
         /// 衝突速度V0を変化させながら、衝突終了後の値を取得する関数。
         /// 各種モデルについて統一的にこの関数を用いて計算を行い、各パラメータが格納された辞書を返す。
@@ -218,6 +684,54 @@ namespace awcsc
             return calc_Vdependent(arr);
         }
 
+        /// <summary>
+        /// 衝突速度だけをV0に変えた複製を返す。
+        /// Penetrator、Target、fit_paramは元のCalcと共有する(計算中は読むだけなので問題ない)。
+        /// 
+        /// <see cref="calc(in double, in double)"/>はインスタンスを書き換えないので、
+        /// 1つのCalcを複数のスレッドから同時に使える。
+        /// 衝突速度を変えるときも元のCalcのV0を書き換えずにこの複製を使えば、スレッド間で共有したままにできる。
+        /// </summary>
+        /// <param name="V0">衝突速度[m/s]</param>
+        /// <returns>衝突速度だけが異なるCalc</returns>
+        public virtual Calc At(double V0)
+        {
+            var c = (Calc)MemberwiseClone();
+            c.V0 = V0;
+            return c;
+        }
+
+        /// <summary>
+        /// 計算を打ち切る条件
+        /// </summary>
+        StopCondition stop_ = null;
+
+        /// <summary>
+        /// stopの条件で侵徹終了前に計算を打ち切る複製を返す。
+        /// Penetrator、Target、fit_paramは<see cref="At(double)"/>と同じく元のCalcと共有する。
+        /// 
+        /// 複製の<see cref="calc(in double, in double, in string[], StageLog)"/>、<see cref="calc(in double, LogPolicy, in string[], StageLog)"/>、
+        /// <see cref="calc_final(in double)"/>、<see cref="calc_Vdependent(in List{double}, in List{double})"/>がこの条件で止まり、
+        /// どの条件で止まったかは<see cref="stopped_by"/>に残る。
+        /// <see cref="calc_sensitivity"/>は条件を使わない。
+        /// </summary>
+        /// <param name="stop">計算を打ち切る条件</param>
+        /// <returns>stopの条件で止まるCalc</returns>
+        public virtual Calc Until(StopCondition stop)
+        {
+            var c = (Calc)MemberwiseClone();
+            c.stop_ = stop == null ? null : new StopCondition(stop);
+            c.stopped_by = -1;
+            return c;
+        }
+
+        /// <summary>
+        /// 最後の計算を止めた条件の番号(<see cref="StopCondition.Names"/>の順)。
+        /// 侵徹終了まで計算した、または条件がないときは-1。
+        /// 1つの複製を複数のスレッドから同時に計算に使うと、どの計算の結果かは決まらない
+        /// </summary>
+        public int stopped_by { get; private set; } = -1;
+
         /// <summary>
         /// 衝突速度V0を変化させながら、衝突終了後の値を取得する関数。
         /// 各種モデルについて統一的にこの関数を用いて計算を行い、各パラメータが格納された辞書を返す。
@@ -226,13 +740,35 @@ namespace awcsc
         /// と書いていたけどよく考えると普通にSoAで返したほうが幸せかもしれない(検討
         /// 
         /// 結果を格納した辞書の中身は<see cref="State"/>参照。
-        /// また、この関数では衝突速度V0も格納した辞書が返される
+        /// また、この関数では衝突速度V0も格納した辞書が返される。
+        /// 各V0の計算は<see cref="At(double)"/>の複製で行うので、このCalcのV0は変わらず、複数のスレッドから同時に呼べる。
         /// </summary>
         /// <seealso cref="State"/>
         /// <param name="V0_list">V0のリスト[m/s]。10000 m/sくらいから結果が不安定になる(この辺は割と難しくて放置)。</param>
         /// <returns>結果を格納した辞書。引数の詳細は<see cref="State"/>参照。この関数ではV0のリストも格納されている</returns>
         public virtual Dictionary<string, List<double>> calc_Vdependent(in List<double> V0_list)
         {
+            var dt_list = new List<double>() { Capacity = V0_list.Count };
+            for (int i = 0; i < V0_list.Count; i++)
+            {
+                dt_list.Add(1e-7);
+            }
+            return calc_Vdependent(V0_list, dt_list);
+        }
+
+        /// <summary>
+        /// <see cref="calc_Vdependent(in List{double})"/>と同じだが、計算時間ステップを衝突速度ごとに指定する。
+        /// <see cref="Until(StopCondition)"/>の複製では、各衝突速度の<see cref="stopped_by"/>を"stop"に格納する。
+        /// </summary>
+        /// <param name="V0_list">V0のリスト[m/s]</param>
+        /// <param name="dt_list">V0_listの各衝突速度での計算時間ステップ[s]</param>
+        /// <returns>結果を格納した辞書。この関数ではV0のリストも格納されている</returns>
+        public virtual Dictionary<string, List<double>> calc_Vdependent(in List<double> V0_list, in List<double> dt_list)
+        {
+            if (dt_list.Count != V0_list.Count)
+            {
+                throw new ArgumentException("dt_list should have the same length as V0_list");
+            }
             var result = new Dictionary<string, List<double>>();
             int size = V0_list.Count;
 
@@ -254,22 +790,26 @@ namespace awcsc
             result["Y"] = new List<double>() { Capacity = size };
             result["Rt"] = new List<double>() { Capacity = size };
 
-            var keylist = result.Keys;
+            if (stop_ != null)
+            {
+                result["stop"] = new List<double>() { Capacity = size };
+            }
 
-            double V0_or = Double.Parse((this.V0).ToString());
-            int i = 0;
-            foreach (var V0 in V0_list)
+            for (int i = 0; i < V0_list.Count; i++)
             {
-                this.V0 = V0;
-                var r = calc(1e-7, 1);
-                foreach (var key in keylist)
+                var c = At(V0_list[i]);
+                var r = c.calc_final(dt_list[i]);
+                for (int k = 0; k < Channels.Length; k++)
+                {
+                    result[Channels[k]].Add(r[k]);
+                }
+                if (stop_ != null)
                 {
-                    result[key].Add(r[key][1]);
+                    result["stop"].Add(c.stopped_by);
                 }
 
             }
             result["V0"] = V0_list;
-            this.V0 = V0_or;
 
             return result;
         }
@@ -299,6 +839,322 @@ namespace awcsc
             }
             return result;
         }
+
+        /// <summary>
+        /// <see cref="calc_Vdependent(in List{double}, in List{double})"/>の結果を生の配列で返す。
+        /// </summary>
+        /// <param name="V0_list">V0のリスト[m/s]</param>
+        /// <param name="dt_list">V0_listの各衝突速度での計算時間ステップ[s]</param>
+        /// <returns>結果を格納した辞書。この関数ではV0のリストも格納されている</returns>
+        public virtual Dictionary<string, double[]> calc_VdependentPyInterop(in double[] V0_list, in double[] dt_list)
+        {
+            Dictionary<string, List<double>> Listres = calc_Vdependent(new List<double>(V0_list), new List<double>(dt_list));
+            Dictionary<string, double[]> result = new Dictionary<string, double[]>();
+
+            foreach (var key in Listres.Keys)
+            {
+                result[key] = Listres[key].ToArray();
+            }
+            return result;
+        }
+
+        /// <summary>
+        /// 記録を一切行わずに侵徹終了まで計算し、侵徹終了時の状態だけを返す。
+        /// 値は<see cref="calc(in double, in double)"/>の最後の記録と同じ(単位も同じで、tは[ms])。
+        /// <see cref="calc_Vdependent(in List{double})"/>はこれを使う。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <returns>侵徹終了時の状態。並びは<see cref="Channels"/></returns>
+        public virtual double[] calc_final(in double dt0)
+        {
+            double dt = dt0;
+            Calc stage = first_stage();
+            double t0 = 0d, DoP0 = 0d;
+            var watch = stop_?.start();
+            State stold = stage.init_State(dt);
+            State stnew = new State();
+            stnew.Copy(stold);
+            bool endcond = true;
+            while (endcond)
+            {
+                Swap(ref stnew, ref stold);
+                stnew = stage.cycle(dt, stold);
+                endcond = stage.cond_endcalc(stnew, stold);
+                if (endcond && watch != null && watch.check(stage, stnew, t0, DoP0))
+                {
+                    endcond = false;
+                    Swap(ref stnew, ref stold);
+                }
+                else if (!endcond)
+                {
+                    Calc next = next_stage(stage, stold);
+                    if (next != null)
+                    {
+                        t0 += stold.t * 1e3;
+                        DoP0 += stold.DoP;
+                        stage = next;
+                        stold = stage.init_State(dt);
+                        stnew.Copy(stold);
+                        endcond = true;
+                    }
+                }
+            }
+            if (watch != null)
+            {
+                finish_stop(watch, new List<double>[0], new int[0], null);
+                if (watch.row != null)
+                {
+                    return watch.row;
+                }
+            }
+            return stage.stage_values(stold, t0, DoP0);
+        }
+
+        /// <summary>
+        /// Stateを<see cref="Channels"/>の並びの配列にする
+        /// </summary>
+        /// <param name="st">State</param>
+        /// <returns>各値。tは[ms]、Y,Rtは[GPa]</returns>
+        protected double[] final_values(in State st)
+        {
+            double Y = T_.calc_Y(st.DoP) * 1e-9;
+            var ret = new double[Channels.Length];
+            for (int k = 0; k < ret.Length; k++)
+            {
+                ret[k] = channel_value(k, st, Y);
+            }
+            return ret;
+        }
+
+        /// <summary>
+        /// 名前で指定したパラメータを取得する。
+        /// 強度、弾性率はpenepyと同じくGPa単位で返すので、そのまま<see cref="SetParameter"/>に渡せる。
+        ///
+        /// 使える名前は"V0", "fit_param[i]",
+        /// "P.L", "P.D", "P.Crh", "P.rho", "P.Y", "P.E", "P.K0", "P.k",
+        /// "T.rho", "T.Y0", "T.Ys", "T.E", "T.K0", "T.k"。
+        /// <see cref="CalcForrLV"/>では"K1", "K2"も使える。
+        /// </summary>
+        /// <param name="name">パラメータ名</param>
+        /// <returns>パラメータの値</returns>
+        public virtual double GetParameter(string name)
+        {
+            switch (name)
+            {
+                case "V0": return V0;
+                case "P.L": return P_.L;
+                case "P.D": return P_.D;
+                case "P.Crh": return P_.Crh;
+                case "P.rho": return P_.rho;
+                case "P.Y": return P_.Y * 1e-9;
+                case "P.E": return P_.E * 1e-9;
+                case "P.K0": return P_.K0 * 1e-9;
+                case "P.k": return P_.k;
+                case "T.rho": return T_.rho;
+                case "T.Y0": return T_.Y0 * 1e-9;
+                case "T.Ys": return T_.Ys * 1e-9;
+                case "T.E": return T_.E * 1e-9;
+                case "T.K0": return T_.K0 * 1e-9;
+                case "T.k": return T_.k;
+            }
+            return fit_param_[fit_param_index(name)];
+        }
+
+        /// <summary>
+        /// 名前で指定したパラメータを設定する。単位、名前は<see cref="GetParameter"/>参照。
+        /// PenetratorやTargetは複製してから変更し、プロパティ経由で設定し直すのでRcなどの派生量も更新される。
+        /// </summary>
+        /// <param name="name">パラメータ名</param>
+        /// <param name="value">パラメータの値</param>
+        public virtual void SetParameter(string name, double value)
+        {
+            if (name == "V0")
+            {
+                V0 = value;
+            }
+            else if (name.StartsWith("P."))
+            {
+                var p = new Penetrator(P_);
+                switch (name)
+                {
+                    case "P.L": p.L = value; break;
+                    case "P.D": p.D = value; break;
+                    case "P.Crh": p.Crh = value; break;
+                    case "P.rho": p.rho = value; break;
+                    case "P.Y": p.Y = value; break;
+                    case "P.E": p.E = value; break;
+                    case "P.K0": p.K0 = value; break;
+                    case "P.k": p.k = value; break;
+                    default: throw new ArgumentException($"unknown parameter {name}");
+                }
+                P = p;
+            }
+            else if (name.StartsWith("T."))
+            {
+                var t = new Target(T_);
+                switch (name)
+                {
+                    case "T.rho": t.rho = value; break;
+                    case "T.Y0": t.Y0 = value; break;
+                    case "T.Ys": t.Ys = value; break;
+                    case "T.E": t.E = value; break;
+                    case "T.K0": t.K0 = value; break;
+                    case "T.k": t.k = value; break;
+                    default: throw new ArgumentException($"unknown parameter {name}");
+                }
+                T = t;
+            }
+            else
+            {
+                fit_param_[fit_param_index(name)] = value;
+                //Rcを再計算させる
+                V0 = V0_;
+            }
+        }
+
+        int fit_param_index(string name)
+        {
+            int i;
+            if (name.StartsWith("fit_param[") && name.EndsWith("]")
+                && int.TryParse(name.Substring(10, name.Length - 11), out i)
+                && i >= 0 && i < fit_param_.Count)
+            {
+                return i;
+            }
+            throw new ArgumentException($"unknown parameter {name}");
+        }
+
+        /// <summary>
+        /// PenetratorやTarget、fit_paramも含めて複製する。
+        /// 複製のパラメータを変えても元のCalcには影響しない。
+        /// </summary>
+        /// <returns>複製されたCalc</returns>
+        protected virtual Calc Clone()
+        {
+            var c = (Calc)MemberwiseClone();
+            c.P_ = new Penetrator(P_);
+            c.T_ = new Target(T_);
+            c.fit_param_ = new List<double>(fit_param_);
+            return c;
+        }
+
+        /// <summary>
+        /// 侵徹終了時のDoPと、そのパラメータに対する感度(偏微分)を中心差分で求める。
+        ///
+        /// 各パラメータについて±h(h = rel_eps*|p|)だけずらした2n個の複製を作り、
+        /// 元の状態と同じdtで1ステップずつ並走させる。
+        /// 接線形の微分(forward mode)ではなく有限差分なので、計算量はcalc_finalの(2n+1)倍かかる。
+        /// 終了判定は元の軌道のものを全員で共有するので、
+        /// 差分をとる軌道ごとに終了ステップがずれることによる階段状のノイズは入らない。
+        /// 終了条件が滑らかな量gの符号の変化(L&lt;0など、<see cref="end_event"/>参照)の場合は、
+        /// 終了時刻のずれによる寄与 -u (dg/dp) / (dg/dt) を加えている。
+        /// 途中で段階を切り替えるモデル(<see cref="next_stage"/>)では、複製も元の軌道と同じステップで
+        /// それぞれの状態から次の段階に移る。次の段階に移れない複製があるときはInvalidOperationExceptionを投げる。
+        /// </summary>
+        /// <param name="dt0">計算時間ステップ[s]</param>
+        /// <param name="names">感度を求めるパラメータ名。<see cref="GetParameter"/>参照</param>
+        /// <param name="rel_eps">パラメータをずらす相対幅</param>
+        /// <returns>[DoP, dDoP/dnames[0], dDoP/dnames[1], ...]。DoPは<see cref="calc_Vdependent(in List{double})"/>と同じ値</returns>
+        public virtual double[] calc_sensitivity(in double dt0, in string[] names, double rel_eps = 1e-5)
+        {
+            double dt = dt0;
+            int n = names.Length;
+            var clones = new Calc[2 * n];
+            var stage_p = new Calc[2 * n];
+            var st_p = new State[2 * n];
+            var DoP0_p = new double[2 * n];
+            var h = new double[n];
+            for (int j = 0; j < n; j++)
+            {
+                double p = GetParameter(names[j]);
+                h[j] = p != 0d ? rel_eps * Math.Abs(p) : rel_eps;
+                for (int k = 0; k < 2; k++)
+                {
+                    var c = Clone();
+                    c.SetParameter(names[j], k == 0 ? p + h[j] : p - h[j]);
+                    clones[2 * j + k] = c;
+                    stage_p[2 * j + k] = c.first_stage();
+                    st_p[2 * j + k] = stage_p[2 * j + k].init_State(dt);
+                }
+            }
+
+            Calc stage = first_stage();
+            double DoP0 = 0d;
+            State stold = stage.init_State(dt);
+            State stnew = new State();
+            stnew.Copy(stold);
+            bool endcond = true;
+            while (endcond)
+            {
+                Swap(ref stnew, ref stold);
+                stnew = stage.cycle(dt, stold);
+                endcond = stage.cond_endcalc(stnew, stold);
+                if (endcond)
+                {
+                    for (int k = 0; k < 2 * n; k++)
+                    {
+                        st_p[k] = stage_p[k].cycle(dt, st_p[k]);
+                    }
+                }
+                else
+                {
+                    Calc next = next_stage(stage, stold);
+                    if (next != null)
+                    {
+                        DoP0 += stold.DoP;
+                        stage = next;
+                        stold = stage.init_State(dt);
+                        stnew.Copy(stold);
+                        for (int k = 0; k < 2 * n; k++)
+                        {
+                            DoP0_p[k] += st_p[k].DoP;
+                            stage_p[k] = clones[k].next_stage(stage_p[k], st_p[k]);
+                            if (stage_p[k] == null)
+                            {
+                                throw new InvalidOperationException(
+                                    $"{names[k / 2]} {(k % 2 == 0 ? "+" : "-")} h did not reach the next stage together with the base trajectory");
+                            }
+                            st_p[k] = stage_p[k].init_State(dt);
+                        }
+                        endcond = true;
+                    }
+                }
+            }
+            //stnewは終了条件を満たしたステップなので、stoldと揃えるためst_pは1つ手前で止めている
+
+            var ret = new double[n + 1];
+            ret[0] = DoP0 + stold.DoP;
+            //最後のステップでのgの変化からdg/dtを求める
+            double gdot = (stage.end_event(stnew, stnew) - stage.end_event(stold, stnew)) / dt;
+            bool shifted = !double.IsNaN(gdot) && gdot != 0d;
+            for (int j = 0; j < n; j++)
+            {
+                State sp = st_p[2 * j], sm = st_p[2 * j + 1];
+                double inv = 0.5 / h[j];
+                double dDoP = (DoP0_p[2 * j] + sp.DoP - DoP0_p[2 * j + 1] - sm.DoP) * inv;
+                if (shifted)
+                {
+                    dDoP -= stold.u * (stage.end_event(sp, stnew) - stage.end_event(sm, stnew)) * inv / gdot;
+                }
+                ret[j + 1] = dDoP;
+            }
+            return ret;
+        }
+
+        /// <summary>
+        /// 侵徹を終了させた条件を、終了時に0を横切る滑らかな量gとして状態stで求める。
+        /// <see cref="calc_sensitivity"/>が終了時刻のずれを補正するのに使う。
+        /// 既定では侵徹体を消耗し尽くした(L&lt;0)ときにg=Lとする。
+        /// u=0で止まった場合のように、終了時刻がずれても侵徹深さがほとんど変わらない条件ではNaNを返す
+        /// </summary>
+        /// <param name="st">gを求める状態</param>
+        /// <param name="stend">終了条件を満たしたステップの状態。どの条件で終了したかの判定に使う</param>
+        /// <returns>g。補正の要らない条件で終了したときはNaN</returns>
+        protected virtual double end_event(in State st, in State stend)
+        {
+            return stend.L < 0 ? st.L : double.NaN;
+        }
+
         /// <summary>
         /// 標的強度項Rtは常に変化するので、それを取得して記録することを矯正するための関数。
         /// </summary>
@@ -27,7 +27,7 @@ namespace awcsc
     /// <c>var res = C.calc_Vdependent(V_list);</c>
     /// とすることで、速度が変化したときの侵徹終了時の各種値を返す。
     /// </summary>
-    public class CalcAW : Calc
+    public class CalcAW : CalcAWBase
     {
 
         //double V0_;
@@ -55,6 +55,12 @@ namespace awcsc
         /// </summary>
         public double Dc { get { return 2d * Rc_; } }
 
+        /// <summary>
+        /// <see cref="Integrator.Auto"/>で陰的な積分に切り替える硬さdt |J|の閾値。
+        /// 前のステップとの平均で進める陽的な積分は、dt |J|が1程度で振動し始める
+        /// </summary>
+        public const double stiff_limit = 0.5;
+
         /// <summary>
         /// Calcが計算に使用するPenetrator
         /// </summary>
@@ -208,6 +214,50 @@ namespace awcsc
             return ret;
         }
 
+        /// <summary>
+        /// 侵徹体先端の加速度のuによる偏微分。u以外の値は固定する。
+        /// alphaが1に、sが0に近づくと分母が小さくなり、大きな負の値になる
+        /// </summary>
+        /// <param name="st">State</param>
+        /// <returns>dudot/du[1/s]</returns>
+        double calc_dudot_du(in State st)
+        {
+            double num, denom;
+            num = P.rho * (st.v - st.u) + T.rho * st.u + T.rho * st.alphadot * 2.0 * Rc / ((st.alpha + 1.0) * (st.alpha + 1.0));
+            denom = (P.rho * st.s + T.rho * Rc * (st.alpha - 1.0) / (st.alpha + 1.0));
+            return -num / denom;
+        }
+
+        /// <summary>
+        /// 侵徹体後端の加速度のvによる偏微分。L-sが0に近づくと大きな負の値になる
+        /// </summary>
+        /// <param name="st">State</param>
+        /// <returns>dvdot/dv[1/s]</returns>
+        double calc_dvdot_dv(in State st)
+        {
+            return -P.Y / (P.rho * (st.L - st.s) * P.c);
+        }
+
+        /// <summary>
+        /// <see cref="integrator"/>に従って、このステップで速度を進める加速度を求める。
+        /// 陰的な積分では、速度による偏微分Jで線形化した陰的Euler法の f / (1 - dt J)を返す。
+        /// Jが正(不安定な方向)のときは0として扱う
+        /// </summary>
+        /// <param name="f">st0での加速度[m/s^2]</param>
+        /// <param name="f0">前のステップで使った加速度[m/s^2]</param>
+        /// <param name="J">fの速度による偏微分[1/s]</param>
+        /// <param name="dt">時間刻み[s]</param>
+        /// <returns>速度を進める加速度[m/s^2]</returns>
+        protected double advance_rate(in double f, in double f0, in double J, in double dt)
+        {
+            double Jn = Math.Min(J, 0d);
+            if (integrator == Integrator.Implicit || (integrator == Integrator.Auto && -dt * Jn > stiff_limit))
+            {
+                return f / (1d - dt * Jn);
+            }
+            return 0.5 * (f0 + f);
+        }
+
         /// <summary>
         /// 侵徹体後端の加速度を求める。
         /// </summary>
@@ -355,8 +405,16 @@ namespace awcsc
             sn = st0.s;
             alphan = st0.alpha;
 
-            _udot = 0.5 * (st0.udot + calc_udot(st0));
-            _vdot = 0.5 * (st0.vdot + calc_vdot(st0));
+            if (integrator == Integrator.Explicit)
+            {
+                _udot = 0.5 * (st0.udot + calc_udot(st0));
+                _vdot = 0.5 * (st0.vdot + calc_vdot(st0));
+            }
+            else
+            {
+                _udot = advance_rate(calc_udot(st0), st0.udot, calc_dudot_du(st0), dt);
+                _vdot = advance_rate(calc_vdot(st0), st0.vdot, calc_dvdot_dv(st0), dt);
+            }
             _Ldot = st0.u - st0.v;
 
             _alpha = calc_alpha(st0.u, st0);
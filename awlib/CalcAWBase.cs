@@ -0,0 +1,20 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Text;
+
+namespace awcsc
+{
+    /// <summary>
+    /// 先端速度u、後端速度vを時間積分するAW系のモデル
+    /// (<see cref="CalcAW"/>, <see cref="CalcAWLV"/>, <see cref="CalcAWHVLV"/>)に共通の部分
+    /// </summary>
+    public abstract class CalcAWBase : Calc
+    {
+        /// <summary>
+        /// u, vの時間積分の方法。<see cref="CalcAWHVLV"/>ではCalcAW、CalcAWLVの両方の段階で使う。
+        /// 既定は<see cref="Integrator.Auto"/>
+        /// </summary>
+        /// <seealso cref="Integrator"/>
+        public Integrator integrator { get; set; } = Integrator.Auto;
+    }
+}
@@ -1,5 +1,6 @@
 ﻿using System;
 using System.Collections.Generic;
+using System.Linq;
 using System.Text;
 using System.Windows;
 namespace awcsc
@@ -9,6 +10,8 @@ namespace awcsc
     /// 高速度と低速度AWモデルを扱うためのモデル
     /// 侵徹体強度が十分高い高速度侵徹では、侵徹終了後に、残存侵徹体長さが低速度侵徹を起こしうる。
     /// そこでCalcAW→CalcAWLVを続けて行うことで高速度侵徹終了後の侵徹を計算する。
+    /// 2つの段階は<see cref="Calc.first_stage"/>、<see cref="Calc.next_stage"/>で1つの積分ループの中で切り替え、
+    /// CalcAWの終了時の状態をそのままCalcAWLVの初期値にする。
     /// 基本的な使い方は<see cref="Material"/>により材料定数を設定し、
     /// <see cref="Target"/>,<see cref="Penetrator"/>で標的、侵徹体の特徴を決める。
     /// 最も簡単な例を以下に示す。
@@ -26,7 +29,7 @@ namespace awcsc
     /// <c>var res = C.calc_Vdependent(V_list);</c>
     /// とすることで、速度が変化したときの侵徹終了時の各種値を返す。
     /// </summary>
-    public class CalcAWHVLV : Calc
+    public class CalcAWHVLV : CalcAWBase
     {
         //double V0_;
         //private double Rc_;
@@ -51,6 +54,7 @@ namespace awcsc
         /// クレーター直径。2*Rc
         /// </summary>
         public double Dc { get { return 2d * Rc_; } }
+
         //Penetrator P_;
         //Target T_;
 
@@ -80,9 +84,6 @@ namespace awcsc
                 T_ = new Target(value);
             }
         }
-        CalcAW cAW;
-        CalcAWLV cAWLV;
-
 
         /// <summary>
         /// CalcAWを初期化。
@@ -108,117 +109,31 @@ namespace awcsc
 
 
         /// <summary>
-        /// 速度V0で衝突する侵徹挙動を計算を実行する関数。
-        /// ここでは一度CalcAWが終了するまで計算を行い、その後
-        /// CalcAWLVを再度投げている
-        /// 
-        /// 計算はdtごとに行い、時間がdt_log経過するごとにその時の計算結果を保存するという形式。
-        /// 結果を格納した辞書の中身は<see cref="State"/>参照
+        /// 最初の段階はこのCalcのPenetrator、Target、衝突速度によるCalcAW。
         /// </summary>
-        /// <param name="dt0">計算時間ステップ[s]</param>
-        /// <param name="dt_log0">計算結果取得ステップ[s]</param>
-        /// <returns>結果を格納した辞書。引数の詳細は<see cref="State"/>参照</returns>
-        /// <seealso cref="State"/>
-
-        public override Dictionary<string, List<double>> calc(in double dt0, in double dt_log0)
+        /// <returns>CalcAW</returns>
+        protected override Calc first_stage()
         {
-            Dictionary<string, List<double>> result;
-            Dictionary<string, List<double>> resultLV;
-            double dt = dt0;
-            double dt_log = dt_log0;
-            double[] fit_param0 = fit_param_.ToArray();
-            cAW = new CalcAW(P, T, V0, fit_param0);
-            result = cAW.calc(dt, dt_log);
-            Penetrator Pres = new Penetrator(P);
-
-            int size = result["L"].Count - 1;
-            Pres.L = result["L"][size];
-            double V00 = result["v"][size];
-            cAWLV = new CalcAWLV(Pres, T, V00, fit_param0);
-            resultLV = cAWLV.calc(dt, dt_log);
-            int sizeLV = resultLV["t"].Count - 1;
-            double tendHV = result["t"][size];
-            double dopHV = result["DoP"][size];
-            foreach (var key in result.Keys)
-            {
-                if (key == "t")
-                {
-                    var tl = resultLV["t"];
-                    for (int i = 0; i <= sizeLV; i++)
-                    {
-                        tl[i] += tendHV;
-                    }
-                }
-                else if (key == "DoP")
-                {
-                    var dopl = resultLV["DoP"];
-                    for (int i = 0; i <= sizeLV; i++)
-                    {
-                        dopl[i] += dopHV;
-                        
-                    }
-                }
-                result[key].AddRange(resultLV[key]);
-                //MessageBox.Show(result[key].Count.ToString());
-            }
-
-            return result;
+            return new CalcAW(P_, T_, V0, fit_param_.ToArray()) { integrator = integrator };
         }
 
         /// <summary>
-        /// 衝突速度V0を変化させながら、衝突終了後の値を取得する関数。
-        /// 各種モデルについて統一的にこの関数を用いて計算を行い、各パラメータが格納された辞書を返す。
-        /// SoAを返さないのはpythonとの相互作用を考慮。 
-        /// 
-        /// と書いていたけどよく考えると普通にSoAで返したほうが幸せかもしれない(検討
-        /// 
-        /// 結果を格納した辞書の中身は<see cref="State"/>参照。
-        /// また、この関数では衝突速度V0も格納した辞書が返される
+        /// CalcAWが終了したら、その状態から残った侵徹体長と速度でCalcAWLVに引き継ぐ。
+        /// CalcAWLVが終了したら終わり。
+        /// 記録は<see cref="Calc.calc(in double, in double, in string[], StageLog)"/>などの1つのループで続けて行う。
         /// </summary>
-        /// <seealso cref="State"/>
-        /// <param name="V0_list">V0のリスト[m/s]。10000 m/sくらいから結果が不安定になる(この辺は割と難しくて放置)。</param>
-        /// <returns>結果を格納した辞書。引数の詳細は<see cref="State"/>参照。この関数ではV0のリストも格納されている</returns>
-        public override Dictionary<string, List<double>> calc_Vdependent(in List<double> V0_list)
+        /// <param name="stage">終了した段階のCalc</param>
+        /// <param name="st">stageの侵徹終了時の状態</param>
+        /// <returns>CalcAWLVかnull</returns>
+        protected override Calc next_stage(Calc stage, in State st)
         {
-            var result = new Dictionary<string, List<double>>();
-            int size = V0_list.Count;
-
-            result["t"] = new List<double>() { Capacity = size };
-            result["DoP"] = new List<double>() { Capacity = size };
-            result["v"] = new List<double>() { Capacity = size };
-            result["u"] = new List<double>() { Capacity = size };
-            result["L"] = new List<double>() { Capacity = size };
-            result["Le"] = new List<double>() { Capacity = size };
-            result["vdot"] = new List<double>() { Capacity = size };
-            result["Ldot"] = new List<double>() { Capacity = size };
-            result["s"] = new List<double>() { Capacity = size };
-            result["alpha"] = new List<double>() { Capacity = size };
-
-            result["udot"] = new List<double>() { Capacity = size };
-            result["sdot"] = new List<double>() { Capacity = size };
-            result["vu_sdot"] = new List<double>() { Capacity = size };
-            result["alphadot"] = new List<double>() { Capacity = size };
-            result["Y"] = new List<double>() { Capacity = size };
-            result["Rt"] = new List<double>() { Capacity = size };
-
-            var keylist = result.Keys;
-
-            double V0_or = Double.Parse((this.V0).ToString());
-            int i = 0;
-            foreach (var V0 in V0_list)
+            if (stage is CalcAWLV)
             {
-                this.V0 = V0;
-                var r = calc(1e-7, 1);
-                foreach (var key in keylist)
-                {
-                    result[key].Add(r[key][3]);
-                }
-
+                return null;
             }
-            result["V0"] = V0_list;
-            this.V0 = V0_or;
-
-            return result;
+            Penetrator Pres = new Penetrator(P_);
+            Pres.L = st.L;
+            return new CalcAWLV(Pres, T_, st.v, fit_param_.ToArray()) { integrator = integrator };
         }
 
         double Crater_radius(in double v, in List<double> fit)
@@ -229,7 +144,7 @@ namespace awcsc
         }
 
         /// <summary>
-        ///計算モデルのt=0sにおける状態を取得するための関数だけど必要なし
+        ///計算モデルのt=0sにおける状態を取得するための関数だけど必要なし。各段階のものを使う
         /// </summary>
         /// <param name="dt">dt[s]。まあ気にしなくていいと思います</param>
         /// <returns>初期化されたStateを返します</returns>
@@ -101,6 +101,18 @@ namespace awcsc
             double ret = calc_udot(st);
             return ret;
         }
+        /// <summary>
+        /// 侵徹体の加速度のuによる偏微分。u以外の値は固定する
+        /// </summary>
+        /// <param name="st">State</param>
+        /// <returns>dudot/du[1/s]</returns>
+        double calc_dudot_du(in State st)
+        {
+            double num, denom;
+            num = T.rho * st.u + T.rho * st.alphadot * 2d * Rc / ((st.alpha + 1d) * (st.alpha + 1d));
+            denom = P.rho * P.L + T.rho * Rc * (st.alpha - 1d) / (st.alpha + 1d);
+            return -num / denom;
+        }
         //double func_p(double const u);
         //double func_pprime(double const u);
         //double calc_initu();
@@ -120,8 +132,18 @@ namespace awcsc
 
             alphan = st0.alpha;
 
-            _udot = 0.5 * (st0.udot + calc_udot(st0));
-            _vdot = 0.5 * (st0.vdot + calc_vdot(st0));
+            if (integrator == Integrator.Explicit)
+            {
+                _udot = 0.5 * (st0.udot + calc_udot(st0));
+                _vdot = 0.5 * (st0.vdot + calc_vdot(st0));
+            }
+            else
+            {
+                //剛体なのでvdotもudotと同じくuで決まる
+                double J = calc_dudot_du(st0);
+                _udot = advance_rate(calc_udot(st0), st0.udot, J, dt);
+                _vdot = advance_rate(calc_vdot(st0), st0.vdot, J, dt);
+            }
 
             _alpha = calc_alpha(st0.u, st0);
 
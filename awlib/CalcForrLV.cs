@@ -119,6 +119,36 @@ namespace awcsc
             K2 = k2;
         }
 
+        /// <summary>
+        /// 名前で指定したパラメータを取得する。<see cref="Calc.GetParameter"/>に加えて"K1", "K2"を使える。
+        /// </summary>
+        /// <param name="name">パラメータ名</param>
+        /// <returns>パラメータの値</returns>
+        public override double GetParameter(string name)
+        {
+            switch (name)
+            {
+                case "K1": return K1;
+                case "K2": return K2;
+            }
+            return base.GetParameter(name);
+        }
+
+        /// <summary>
+        /// 名前で指定したパラメータを設定する。<see cref="Calc.SetParameter"/>に加えて"K1", "K2"を使える。
+        /// </summary>
+        /// <param name="name">パラメータ名</param>
+        /// <param name="value">パラメータの値</param>
+        public override void SetParameter(string name, double value)
+        {
+            switch (name)
+            {
+                case "K1": K1 = value; break;
+                case "K2": K2 = value; break;
+                default: base.SetParameter(name, value); break;
+            }
+        }
+
         /// <summary>
         /// 侵徹体先端の加速度を求める。
         /// </summary>
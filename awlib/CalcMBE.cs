@@ -305,6 +305,21 @@ namespace awcsc
             bool ret = (st.u > 0.0) && (st.L > 0.0) && (st.v > st.u);
             return ret;
         }
+
+        /// <summary>
+        /// 後端速度が先端速度に追いついて(v&lt;=u)終了した場合はg=v-u、それ以外は<see cref="Calc.end_event"/>と同じ
+        /// </summary>
+        /// <param name="st">gを求める状態</param>
+        /// <param name="stend">終了条件を満たしたステップの状態</param>
+        /// <returns>g</returns>
+        protected override double end_event(in State st, in State stend)
+        {
+            if (stend.u > 0.0 && stend.L > 0.0 && stend.v <= stend.u)
+            {
+                return st.v - st.u;
+            }
+            return stend.L <= 0.0 ? st.L : double.NaN;
+        }
         /// <summary>
         /// 標的強度項Rtは常に変化するので、それを取得して記録することを矯正するための関数。
         /// </summary>
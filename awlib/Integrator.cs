@@ -0,0 +1,33 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Text;
+
+namespace awcsc
+{
+    /// <summary>
+    /// AW系のモデル(<see cref="CalcAW"/>, <see cref="CalcAWLV"/>, <see cref="CalcAWHVLV"/>)で、
+    /// 先端速度u、後端速度vを時間積分する方法。
+    ///
+    /// 侵徹終了間際にalphaが1に、侵徹体の残りL-sが0に近づくと、
+    /// udot, vdotの分母が小さくなってu, vについて硬い(stiff)方程式になり、
+    /// 陽的な積分では非常に小さいdtでないと振動したり発散したりする。
+    /// </summary>
+    public enum Integrator
+    {
+        /// <summary>
+        /// 従来の陽的な積分。前のステップの加速度との平均で進める
+        /// </summary>
+        Explicit,
+        /// <summary>
+        /// 線形化した陰的Euler法(Rosenbrock-Euler法)。
+        /// udotのuによる偏微分Jを使って、du = dt udot / (1 - dt J)で進める。
+        /// 硬い区間でも大きいdtで安定するが、硬くない区間では陽的な積分より精度が落ちる
+        /// </summary>
+        Implicit,
+        /// <summary>
+        /// ステップごとに硬さdt |J|を調べ、<see cref="CalcAW.stiff_limit"/>を超えたステップだけ<see cref="Implicit"/>で、
+        /// それ以外は<see cref="Explicit"/>で進める。硬くない区間の結果はExplicitと同じ
+        /// </summary>
+        Auto,
+    }
+}
@@ -0,0 +1,76 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Text;
+
+namespace awcsc
+{
+    /// <summary>
+    /// <see cref="Calc.calc(in double, LogPolicy, in string[], StageLog)"/>で結果を記録する条件。
+    /// 
+    /// 一定時間ごとの記録だと、準定常な区間は記録が多すぎ、衝突直後や侵徹終了間際の急な変化は記録が足りない。
+    /// そこで前回の記録からの変化量で記録するかどうかを決める。
+    /// 以下のいずれかを満たしたステップを記録する(0にした条件は使わない)。
+    /// <list type="bullet">
+    /// <item><description>前回の記録から<see cref="dt_log"/>以上時間が経った</description></item>
+    /// <item><description>前回の記録から<see cref="dDoP"/>以上侵徹した</description></item>
+    /// <item><description><see cref="SetTolerance"/>で指定した値のどれかが、前回の記録から許容値より大きく変化した</description></item>
+    /// </list>
+    /// 衝突時と侵徹終了時の状態は必ず記録する。
+    /// <see cref="max_points"/>を指定すると、記録数がそれに達するたびに1つおきに間引き、
+    /// 各条件の幅を2倍にして続ける。
+    /// </summary>
+    public class LogPolicy
+    {
+        /// <summary>
+        /// 記録する時間間隔[s]。0なら使わない
+        /// </summary>
+        public double dt_log { get; set; } = 0d;
+        /// <summary>
+        /// 記録するDoPの間隔[m]。0なら使わない
+        /// </summary>
+        public double dDoP { get; set; } = 0d;
+        /// <summary>
+        /// 記録する点の最大数(衝突時と侵徹終了時を含む)。0なら制限しない
+        /// </summary>
+        public int max_points { get; set; } = 0;
+
+        Dictionary<string, double> tolerance_ = new Dictionary<string, double>();
+        /// <summary>
+        /// 値の名前と、記録するまでに許す変化量。<see cref="SetTolerance"/>で設定する
+        /// </summary>
+        public Dictionary<string, double> tolerance { get { return tolerance_; } }
+
+        /// <summary>
+        /// 条件を何も指定しないLogPolicy。衝突時と侵徹終了時だけを記録する
+        /// </summary>
+        public LogPolicy()
+        {
+        }
+
+        /// <summary>
+        /// コピーコンストラクタ
+        /// </summary>
+        /// <param name="policy">複製元</param>
+        public LogPolicy(in LogPolicy policy)
+        {
+            dt_log = policy.dt_log;
+            dDoP = policy.dDoP;
+            max_points = policy.max_points;
+            tolerance_ = new Dictionary<string, double>(policy.tolerance_);
+        }
+
+        /// <summary>
+        /// 値fieldが前回の記録からtolより大きく変化したら記録するようにする
+        /// </summary>
+        /// <param name="field">値の名前。使える名前は<see cref="Calc.Channels"/></param>
+        /// <param name="tol">許容する変化量。単位は<see cref="Calc.calc(in double, in double)"/>の結果と同じ</param>
+        public void SetTolerance(string field, double tol)
+        {
+            if (Array.IndexOf(Calc.Channels, field) < 0)
+            {
+                throw new ArgumentException($"unknown field {field}");
+            }
+            tolerance_[field] = tol;
+        }
+    }
+}
@@ -130,6 +130,11 @@ namespace awcsc
     {
         private double Ys_, Y_, ts_, th_, tt_;
         private double Ginv_, c0inv_;
+        //set_profileで設定した強度分布。px_は深さ[m]、py_は強度[Pa]、pslope_は各区間の傾き[Pa/m]
+        private double[] px_, py_, pslope_;
+        //深さをpdx_ごとのセルに分けたときの、各セルの始点を含む区間の番号
+        private int[] pcell_;
+        private double pdxinv_;
         private double rho_, E_, G_, K0_, k_, c0_, c_;
 
         /// <summary>
@@ -278,6 +283,12 @@ namespace awcsc
             ts_ = Tar.ts;
             th_ = Tar.th;
             tt_ = th_ - ts_;
+            //set_profileは配列を作り直すので共有してよい
+            px_ = Tar.px_;
+            py_ = Tar.py_;
+            pslope_ = Tar.pslope_;
+            pcell_ = Tar.pcell_;
+            pdxinv_ = Tar.pdxinv_;
         }
         //Target set_Y(double const &YS);
 
@@ -425,6 +436,115 @@ namespace awcsc
             return this;
         }
 
+        /// <summary>
+        /// 深さごとの強度の表を設定する。設定するとYs, ts, thの代わりにこの表から強度を求める。
+        /// 表の点の間は線形補間し、範囲外は端の値になる。
+        /// 同じ深さを2回続けて与えると、そこで強度が不連続に変わる(積層板など)。
+        /// 
+        /// 深さを表の最小間隔ごとのセルに分け、各セルが始まる区間の番号を前もって求めておくので、
+        /// 強度の計算は表の大きさによらず一定の手間で済む。
+        /// </summary>
+        /// <param name="x">深さ[m]。単調増加であること</param>
+        /// <param name="Y">各深さでの強度[GPa]</param>
+        /// <returns>Target</returns>
+        public Target set_profile(double[] x, double[] Y)
+        {
+            int n = x.Length;
+            if (n == 0 || Y.Length != n)
+            {
+                throw new ArgumentException("x and Y should have the same non-zero length");
+            }
+            double hmin = double.PositiveInfinity;
+            for (int i = 1; i < n; i++)
+            {
+                double h = x[i] - x[i - 1];
+                if (h < 0)
+                {
+                    throw new ArgumentException("x should be non-decreasing");
+                }
+                if (h > 0 && h < hmin)
+                {
+                    hmin = h;
+                }
+            }
+            var px = (double[])x.Clone();
+            var py = new double[n];
+            var pslope = new double[n];
+            for (int i = 0; i < n; i++)
+            {
+                py[i] = Y[i] * 1e9;
+            }
+            for (int i = 0; i + 1 < n; i++)
+            {
+                double h = px[i + 1] - px[i];
+                pslope[i] = h > 0 ? (py[i + 1] - py[i]) / h : 0d;
+            }
+
+            int ncell = 1;
+            double width = px[n - 1] - px[0];
+            if (width > 0)
+            {
+                //セルが区間より細かければ、1つのセル内で進む区間は高々2つ(+長さ0の区間)
+                ncell = (int)Math.Min(Math.Ceiling(width / hmin), 1 << 20);
+            }
+            double dx = width > 0 ? width / ncell : 1d;
+            var pcell = new int[ncell + 1];
+            int j = 0;
+            for (int c = 0; c <= ncell; c++)
+            {
+                double xc = px[0] + c * dx;
+                while (j + 1 < n - 1 && px[j + 1] <= xc)
+                {
+                    j++;
+                }
+                pcell[c] = j;
+            }
+
+            px_ = px;
+            py_ = py;
+            pslope_ = pslope;
+            pcell_ = pcell;
+            pdxinv_ = 1d / dx;
+            return this;
+        }
+
+        /// <summary>
+        /// set_profileで設定した強度の表を消し、Ys, ts, thによる強度分布に戻す。
+        /// </summary>
+        /// <returns>Target</returns>
+        public Target clear_profile()
+        {
+            px_ = null;
+            py_ = null;
+            pslope_ = null;
+            pcell_ = null;
+            return this;
+        }
+
+        /// <summary>
+        /// set_profileで強度の表が設定されているか
+        /// </summary>
+        public bool has_profile { get { return px_ != null; } }
+
+        private double profile_Y(double x)
+        {
+            int last = px_.Length - 1;
+            if (x <= px_[0])
+            {
+                return py_[0];
+            }
+            if (x >= px_[last])
+            {
+                return py_[last];
+            }
+            int j = pcell_[(int)((x - px_[0]) * pdxinv_)];
+            while (px_[j + 1] <= x)
+            {
+                j++;
+            }
+            return py_[j] + pslope_[j] * (x - px_[j]);
+        }
+
         /// <summary>
         /// 深さxにおける標的の強度を計算するための関数[Pa]
         /// </summary>
@@ -432,6 +552,10 @@ namespace awcsc
         /// <returns>強度[Pa]</returns>
         public double calc_Y(double x)
         {
+            if (px_ != null)
+            {
+                return profile_Y(x);
+            }
             double ret = 0;
             if ((x >= th) || (Y_==Ys_)|| (ts ==0 && th ==0))
             {
@@ -0,0 +1,46 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Text;
+
+namespace awcsc
+{
+    /// <summary>
+    /// <see cref="Calc.calc(in double, in double, in string[], StageLog)"/>などで、各段階が始まった時刻とDoPを記録したもの。
+    /// 段階を切り替えないモデルでは、時刻0、DoP=0で始まる段階が1つだけ記録される。
+    /// <see cref="Calc.derive"/>に渡すと、記録しなかったY, Rtを各点を記録した段階の式とその段階の中でのDoPで求める。
+    /// </summary>
+    public class StageLog
+    {
+        //各段階のCalc。計算したCalc自身の段階はnull
+        internal readonly List<Calc> stages = new List<Calc>();
+        internal readonly List<double> t0_ = new List<double>();
+        internal readonly List<double> DoP0_ = new List<double>();
+
+        /// <summary>
+        /// 各段階が始まった時刻[ms]
+        /// </summary>
+        public double[] t0 { get { return t0_.ToArray(); } }
+        /// <summary>
+        /// 各段階が始まったときの、前の段階までのDoP[m]
+        /// </summary>
+        public double[] DoP0 { get { return DoP0_.ToArray(); } }
+        /// <summary>
+        /// 記録した段階の数
+        /// </summary>
+        public int Count { get { return stages.Count; } }
+
+        internal void Clear()
+        {
+            stages.Clear();
+            t0_.Clear();
+            DoP0_.Clear();
+        }
+
+        internal void Add(Calc stage, double t0, double DoP0)
+        {
+            stages.Add(stage);
+            t0_.Add(t0);
+            DoP0_.Add(DoP0);
+        }
+    }
+}
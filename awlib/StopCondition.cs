@@ -0,0 +1,213 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Globalization;
+using System.Linq;
+using System.Text;
+
+namespace awcsc
+{
+    /// <summary>
+    /// 侵徹終了(<see cref="Calc"/>の終了条件)より前に計算を打ち切る条件。
+    /// <see cref="Calc.Until(StopCondition)"/>で、この条件で止まるCalcの複製を作って使う。
+    ///
+    /// 以下のいずれかを満たしたら止める。
+    /// <list type="bullet">
+    /// <item><description><see cref="Above"/>、<see cref="Below"/>で指定した値が閾値に達した(毎ステップ.NET側で調べる)</description></item>
+    /// <item><description><see cref="predicate"/>が止める行を返した
+    /// (<see cref="dt_check"/>ごとの状態を<see cref="check_every"/>行ずつまとめて渡す)</description></item>
+    /// </list>
+    /// 閾値で止めたときは、閾値に達した最初のステップの状態が侵徹終了時の状態になる。
+    /// predicateで止めたときは、predicateが選んだ行の状態が侵徹終了時の状態になり、
+    /// それより後の記録は捨てる。
+    /// </summary>
+    public class StopCondition
+    {
+        readonly List<int> idx_ = new List<int>();
+        readonly List<double> value_ = new List<double>();
+        readonly List<bool> above_ = new List<bool>();
+
+        /// <summary>
+        /// 計算を止めるかどうかを判定する関数。
+        /// <see cref="Calc.Channels"/>の名前をkeyに、<see cref="dt_check"/>ごとの状態を並べた配列を受け取り、
+        /// 最初に止める行の番号を返す。止めないなら-1。値の単位は<see cref="Calc.calc(in double, in double)"/>の結果と同じ
+        /// </summary>
+        public Func<Dictionary<string, double[]>, int> predicate { get; set; } = null;
+        /// <summary>
+        /// <see cref="predicate"/>に渡す状態の時間間隔[s]
+        /// </summary>
+        public double dt_check { get; set; } = 1e-6;
+        /// <summary>
+        /// 何行ためてから<see cref="predicate"/>を呼ぶか。侵徹終了時には残りの行で必ず呼ぶ
+        /// </summary>
+        public int check_every { get; set; } = 64;
+
+        /// <summary>
+        /// 条件を何も指定しないStopCondition。侵徹終了まで計算する
+        /// </summary>
+        public StopCondition()
+        {
+        }
+
+        /// <summary>
+        /// コピーコンストラクタ
+        /// </summary>
+        /// <param name="stop">複製元</param>
+        public StopCondition(in StopCondition stop)
+        {
+            idx_.AddRange(stop.idx_);
+            value_.AddRange(stop.value_);
+            above_.AddRange(stop.above_);
+            predicate = stop.predicate;
+            dt_check = stop.dt_check;
+            check_every = stop.check_every;
+        }
+
+        /// <summary>
+        /// 値fieldがvalue以上になったら止めるようにする
+        /// </summary>
+        /// <param name="field">値の名前。使える名前は<see cref="Calc.Channels"/></param>
+        /// <param name="value">閾値。単位は<see cref="Calc.calc(in double, in double)"/>の結果と同じ(tは[ms])</param>
+        public void Above(string field, double value)
+        {
+            add(field, value, true);
+        }
+
+        /// <summary>
+        /// 値fieldがvalue以下になったら止めるようにする
+        /// </summary>
+        /// <param name="field">値の名前。使える名前は<see cref="Calc.Channels"/></param>
+        /// <param name="value">閾値。単位は<see cref="Calc.calc(in double, in double)"/>の結果と同じ(tは[ms])</param>
+        public void Below(string field, double value)
+        {
+            add(field, value, false);
+        }
+
+        void add(string field, double value, bool above)
+        {
+            int i = Array.IndexOf(Calc.Channels, field);
+            if (i < 0)
+            {
+                throw new ArgumentException($"unknown field {field}");
+            }
+            idx_.Add(i);
+            value_.Add(value);
+            above_.Add(above);
+        }
+
+        /// <summary>
+        /// 各条件の説明。<see cref="Calc.stopped_by"/>の番号の順で、閾値の条件("DoP >= 0.05"など)の後に"predicate"が続く
+        /// </summary>
+        public string[] Names
+        {
+            get
+            {
+                var names = new List<string>();
+                for (int j = 0; j < idx_.Count; j++)
+                {
+                    names.Add($"{Calc.Channels[idx_[j]]} {(above_[j] ? ">=" : "<=")} {value_[j].ToString("R", CultureInfo.InvariantCulture)}");
+                }
+                if (predicate != null)
+                {
+                    names.Add("predicate");
+                }
+                return names.ToArray();
+            }
+        }
+
+        /// <summary>
+        /// 1回の計算の間、条件を調べるためのオブジェクトを作る
+        /// </summary>
+        /// <returns>Watch</returns>
+        internal Watch start()
+        {
+            return new Watch(this);
+        }
+
+        /// <summary>
+        /// 1回の計算の間、条件を調べる。predicateに渡す状態をためておく
+        /// </summary>
+        internal sealed class Watch
+        {
+            readonly StopCondition c_;
+            readonly List<double[]> rows_ = new List<double[]>();
+            double t_next_ = 0d;
+
+            /// <summary>
+            /// 止めた条件の番号。止めていなければ-1
+            /// </summary>
+            public int reason = -1;
+            /// <summary>
+            /// predicateで止めたときの、その行の値(<see cref="Calc.Channels"/>の並び)。閾値で止めたときはnull
+            /// </summary>
+            public double[] row = null;
+
+            public Watch(StopCondition c)
+            {
+                c_ = c;
+            }
+
+            /// <summary>
+            /// 段階stageの状態stで止めるかどうかを調べる
+            /// </summary>
+            /// <param name="stage">計算中の段階のCalc</param>
+            /// <param name="st">調べる状態</param>
+            /// <param name="t0">前の段階までの時間[ms]</param>
+            /// <param name="DoP0">前の段階までのDoP[m]</param>
+            /// <returns>止めるならtrue</returns>
+            public bool check(Calc stage, in State st, double t0, double DoP0)
+            {
+                for (int j = 0; j < c_.idx_.Count; j++)
+                {
+                    double v = stage.stage_value(c_.idx_[j], st, t0, DoP0);
+                    if (c_.above_[j] ? v >= c_.value_[j] : v <= c_.value_[j])
+                    {
+                        reason = j;
+                        return true;
+                    }
+                }
+                if (c_.predicate != null)
+                {
+                    double t = t0 * 1e-3 + st.t;
+                    if (t >= t_next_)
+                    {
+                        rows_.Add(stage.stage_values(st, t0, DoP0));
+                        while (t_next_ <= t)
+                        {
+                            t_next_ += c_.dt_check;
+                        }
+                        if (rows_.Count >= c_.check_every)
+                        {
+                            return flush();
+                        }
+                    }
+                }
+                return false;
+            }
+
+            /// <summary>
+            /// ためた状態をpredicateに渡す。侵徹終了時にも呼ぶ
+            /// </summary>
+            /// <returns>止めるならtrue</returns>
+            public bool flush()
+            {
+                if (c_.predicate == null || rows_.Count == 0)
+                {
+                    return false;
+                }
+                var d = new Dictionary<string, double[]>();
+                for (int k = 0; k < Calc.Channels.Length; k++)
+                {
+                    d[Calc.Channels[k]] = rows_.Select(r => r[k]).ToArray();
+                }
+                int i = c_.predicate(d);
+                if (i >= 0 && i < rows_.Count)
+                {
+                    reason = c_.idx_.Count;
+                    row = rows_[i];
+                }
+                rows_.Clear();
+                return row != null;
+            }
+        }
+    }
+}
@@ -1,9 +1,21 @@
 import os
 import sys
 sys.path.append(os.path.dirname(__file__))
-from materialList import materialPropertyList
-from calc import Calc, CalcAW, CalcAWHVLV, CalcAWLV, CalcForrLV, CalcMBE
+from materialList import materialPropertyList, MaterialRecord
+from calc import Calc, CalcAW, CalcAWHVLV, CalcAWLV, CalcForrLV, CalcMBE, LogPolicy, StopCondition
 from animate import Animate
 from material import Material, Penetrator, Target
-from core import dicconverter, calc, calc_Vdependent, netArraytonpArray, get_constant
-from util import getMaterials, getTandP
\ No newline at end of file
+from core import dicconverter, calc, calc_Vdependent, calc_final, calc_sensitivity, netArraytonpArray, npArraytonetArray, get_constant
+from util import getMaterials, getTandP, makeCalc
+from sweep import SweepRunner, Vdependent_task
+from montecarlo import MonteCarlo, Normal, Uniform, LogNormal
+from calibrate import Calibration
+from surrogate import Surrogate
+from similarity import SimilarityCache, similarity_key, rescale
+from server import CalcServer, serve
+from trajectory import Trajectory
+from timestep import select_dt, DtTable, dt_table
+from batch import solve_batch, case_table
+from optimize import DesignSearch
+from plot import plot, lttb
+from parallel import SharedResult, map_shared
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""asyncioのイベントループを止めずに計算を行うためのモジュール。
+
+計算はスレッドプールで実行され、.NET側の計算中はGILが解放されるので他のリクエストの処理を妨げない。
+awcscのCalcは計算中にインスタンスを書き換えないので、同じCalcに対する計算も並列に実行される。
+同時に実行する計算の数は :any:`set_max_concurrency <penepy.aio.set_max_concurrency>` で制限できる。
+
+.. highlight:: python
+
+::
+
+    async def handler(V0):
+        C = penepy.CalcAW(P, T, V0)
+        res = await C.calc_async(1e-7, 1e-6)
+        res_V = await C.calc_Vdependent_async(np.linspace(500, 3000, 100))
+
+タスクをキャンセルすると、calc_Vdependent_asyncは実行中のチャンクが終わった時点で打ち切られる。
+calc_asyncは.NET側の計算を途中で止められないので、結果を捨てるだけになる。
+"""
+import asyncio
+import os
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+_max_concurrency = os.cpu_count() or 1
+_executor: ThreadPoolExecutor = None
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_guard = threading.Lock()
+
+
+def set_max_concurrency(n: int):
+    """同時に実行する計算の数の上限を設定する。
+
+    既に実行中の計算には影響しない。
+
+    Parameters
+    ----------
+    n : int
+        上限。既定値はCPUのコア数
+    """
+    global _max_concurrency, _executor
+    if n < 1:
+        raise ValueError("n should be >= 1")
+    with _guard:
+        _max_concurrency = int(n)
+        old, _executor = _executor, None
+        _semaphores.clear()
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _guard:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(_max_concurrency, thread_name_prefix="penepy")
+        return _executor
+
+
+def _get_semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    with _guard:
+        sem = _semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(_max_concurrency)
+            _semaphores[loop] = sem
+        return sem
+
+
+async def run_in_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """funcを計算用のスレッドプールで実行し、終わるまで待つ。
+
+    同時実行数の枠は、キャンセルされた場合もスレッドの処理が終わるまで解放しない。
+
+    Parameters
+    ----------
+    func : Callable[..., Any]
+        実行する関数
+    *args : Any
+        funcの引数
+
+    Returns
+    -------
+    Any
+        funcの戻り値
+    """
+    loop = asyncio.get_running_loop()
+    sem = _get_semaphore(loop)
+    await sem.acquire()
+
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(sem.release)
+        except RuntimeError:
+            # イベントループが既に閉じている
+            pass
+
+    try:
+        cf = _get_executor().submit(func, *args)
+    except BaseException:
+        sem.release()
+        raise
+    cf.add_done_callback(release)
+    return await asyncio.wrap_future(cf)
+
+
+async def calc_async(C: Any, dt: float, dt_log: float,
+                     fields: List[str] = None) -> pd.DataFrame:
+    """Calc.calcを非同期に実行する。
+
+    Parameters
+    ----------
+    C : Calc
+        penepy.Calcを継承したクラス
+    dt : float
+        計算時間ステップ[s]
+    dt_log : float
+        記録時間ステップ[s]
+    fields : List[str], optional
+        記録する値の名前。省略するとY, Rt以外のすべて, by default None
+
+    Returns
+    -------
+    pd.DataFrame
+        Calc.calcの結果
+    """
+    return await run_in_pool(C.calc, dt, dt_log, fields)
+
+
+async def calc_Vdependent_async(C: Any, V_list: np.ndarray,
+                                chunksize: int = 16) -> pd.DataFrame:
+    """Calc.calc_Vdependentを非同期に実行する。
+
+    V_listをchunksizeごとに分けて実行するので、キャンセルはチャンクの切れ目で効く。
+
+    Parameters
+    ----------
+    C : Calc
+        penepy.Calcを継承したクラス
+    V_list : np.ndarray
+        衝突速度のリスト[m/s]
+    chunksize : int, optional
+        一度に計算する衝突速度の数, by default 16
+
+    Returns
+    -------
+    pd.DataFrame
+        Calc.calc_Vdependentの結果
+    """
+    V_list = np.asarray(V_list, dtype=np.float64)
+
+    chunksize = max(int(chunksize), 1)
+    parts = []
+    for i in range(0, len(V_list), chunksize):
+        parts.append(
+            pd.DataFrame(await run_in_pool(C.calc_Vdependent, V_list[i:i + chunksize])))
+    return pd.concat(parts, ignore_index=True)
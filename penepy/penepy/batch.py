@@ -0,0 +1,171 @@
+"""多数の構成(材料、寸法、衝突速度など)の侵徹終了時の状態を、.NETとの境界を1回またぐだけでまとめて計算するためのモジュール。
+
+構成ごとにCalcを作ってcalc_finalを呼ぶと、Material、Target、Penetrator、Calcの構築と結果の変換で
+1件あたり何十回もpythonnetを経由する。
+:any:`solve_batch <penepy.batch.solve_batch>` は1行1構成の表を1つの配列にして渡し、
+.NET側(awcsc.Batch.solve)で全行を並列に計算して1つの配列で受け取る。
+
+.. highlight:: python
+
+::
+
+    P = [penepy.Penetrator(mP, L, 0.025) for L in np.linspace(0.1, 1, 1000)]
+    cases = penepy.case_table(P, T, 1500.)
+    res = penepy.solve_batch(penepy.CalcAW, cases)  # resの各行がcasesの各行に対応
+
+表の列は :any:`columns <penepy.batch.columns>` 。
+強度の表(:any:`Target.set_profile <penepy.material.Target.set_profile>`)を設定したTargetには使えない。
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Sequence, Union
+import core
+from timestep import DEFAULT_DT, dt_table
+
+#solve_batchに渡す表の列。強度などの単位は[GPa]
+columns: List[str] = list(core.aw.Batch.Columns)
+
+#表で省略できる列とその値。dtを省略するとdt_table、なければDEFAULT_DTを使う
+_defaults: Dict[str, float] = {
+    "P.Crh": 0.5,
+    "T.Ys": 0.,
+    "T.ts": 0.,
+    "T.th": 0.,
+    "fit_param[0]": 0.000287,
+    "fit_param[1]": 1.48e-07,
+    "K1": 0.6666666666666666,
+    "K2": 0.3963565945945571,
+    "integrator": 2.,
+}
+
+#solve_batchで計算できるモデル
+models: List[str] = ["CalcAW", "CalcAWLV", "CalcAWHVLV", "CalcForrLV", "CalcMBE"]
+
+#"integrator"の列に名前で与えたときの値(awcsc.Integrator)
+_integrators: Dict[str, float] = {"explicit": 0., "implicit": 1., "auto": 2.}
+
+
+def _name(model: Union[type, str]) -> str:
+    return model if isinstance(model, str) else model.__name__
+
+
+def case_table(P: Any, T: Any, V0: Union[float, Sequence[float]],
+               **kwargs: Any) -> pd.DataFrame:
+    """Penetrator、Target、衝突速度からsolve_batchに渡す表を作る。
+
+    P, T, V0, kwargsの値は、リストなら1要素が1行になり、1つだけならすべての行で同じになる。
+
+    Parameters
+    ----------
+    P : Union[Penetrator, Sequence[Penetrator]]
+        Penetrator
+    T : Union[Target, Sequence[Target]]
+        Target
+    V0 : Union[float, Sequence[float]]
+        衝突速度[m/s]
+    **kwargs : Any
+        "dt", "K1", "K2"や、fit_paramなど表の他の列の値。
+        "integrator"は"explicit", "implicit", "auto"の名前でも与えられる
+
+    Returns
+    -------
+    pd.DataFrame
+        1行1構成の表
+    """
+    Ps = [P] if not isinstance(P, (list, tuple)) else list(P)
+    Ts = [T] if not isinstance(T, (list, tuple)) else list(T)
+    if "fit_param" in kwargs:
+        fp = np.asarray(kwargs.pop("fit_param"), dtype=np.float64)
+        kwargs["fit_param[0]"] = fp[..., 0]
+        kwargs["fit_param[1]"] = fp[..., 1]
+    if "integrator" in kwargs:
+        kwargs["integrator"] = [_integrators[v] if isinstance(v, str) else v
+                                for v in np.atleast_1d(kwargs["integrator"])]
+    n = max(len(Ps), len(Ts), np.size(V0), *(np.size(v) for v in kwargs.values()))
+    if len(Ps) == 1:
+        Ps = Ps * n
+    if len(Ts) == 1:
+        Ts = Ts * n
+    if any(t.profile is not None for t in Ts):
+        raise ValueError("Target with profile cannot be used in case_table")
+    d = {
+        "P.rho": [p.rho for p in Ps],
+        "P.Y": [p.Y for p in Ps],
+        "P.E": [p.E for p in Ps],
+        "P.K0": [p.K0 for p in Ps],
+        "P.k": [p.k for p in Ps],
+        "P.L": [p.L for p in Ps],
+        "P.D": [p.D for p in Ps],
+        "P.Crh": [p.Crh for p in Ps],
+        "T.rho": [t.rho for t in Ts],
+        "T.Y0": [t.Y0 for t in Ts],
+        "T.E": [t.E for t in Ts],
+        "T.K0": [t.K0 for t in Ts],
+        "T.k": [t.k for t in Ts],
+        "T.Ys": [t.Ys for t in Ts],
+        "T.ts": [t.ts for t in Ts],
+        "T.th": [t.th for t in Ts],
+        "V0": np.broadcast_to(np.asarray(V0, dtype=np.float64), (n, )),
+    }
+    for k, v in kwargs.items():
+        if k not in columns:
+            raise KeyError(f"unknown column {k}")
+        d[k] = np.broadcast_to(np.asarray(v, dtype=np.float64), (n, ))
+    return pd.DataFrame(d)
+
+
+def solve_batch(model: Union[type, str],
+                cases: Union[pd.DataFrame, Dict[str, Any], np.ndarray],
+                fields: List[str] = None,
+                max_parallel: int = 0) -> pd.DataFrame:
+    """表の各行の構成について侵徹終了時の状態を計算する。
+
+    .NETとの受け渡しは表と結果のそれぞれ1回のメモリコピーだけで、計算は.NET側で行ごとに並列に行う。
+    計算に失敗した行は結果がNaNになる。
+
+    Parameters
+    ----------
+    model : Union[type, str]
+        CalcAWなど、Calcを継承したクラスかその名前
+    cases : Union[pd.DataFrame, Dict[str, Any], np.ndarray]
+        1行1構成の表。列はcolumnsで、"P.Crh", "T.Ys", "T.ts", "T.th", "dt", "fit_param[i]", "K1", "K2", "integrator"は省略できる。
+        np.ndarrayならcolumnsのすべての列をこの順に並べたもの
+    fields : List[str], optional
+        返す値の名前。省略するとcalc_finalと同じすべての値, by default None
+    max_parallel : int, optional
+        同時に計算する行数の上限。0なら制限しない, by default 0
+
+    Returns
+    -------
+    pd.DataFrame
+        各行の侵徹終了時の状態。casesがDataFrameならindexも同じ
+    """
+    model = _name(model)
+    index = None
+    if isinstance(cases, np.ndarray):
+        if cases.ndim != 2 or cases.shape[1] != len(columns):
+            raise ValueError(f"cases should be (n, {len(columns)}) array")
+        params = cases
+    else:
+        if isinstance(cases, pd.DataFrame):
+            index = cases.index
+        cases = pd.DataFrame(cases)
+        unknown = set(cases.columns) - set(columns)
+        if unknown:
+            raise KeyError(f"unknown columns {sorted(unknown)}")
+        n = len(cases)
+        params = np.empty((n, len(columns)))
+        for j, k in enumerate(columns):
+            if k in cases:
+                params[:, j] = cases[k].values
+            elif k == "dt":
+                dt = dt_table.get(model, cases["V0"].values)
+                params[:, j] = DEFAULT_DT if dt is None else dt
+            elif k in _defaults:
+                params[:, j] = _defaults[k]
+            else:
+                raise KeyError(f"column {k} is required")
+    if fields is None:
+        fields = list(core.aw.Calc.Channels)
+    r = core.solve_batch(model, params, fields, max_parallel)
+    return pd.DataFrame(r, columns=list(fields), index=index)
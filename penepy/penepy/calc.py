@@ -1,9 +1,168 @@
 import clr
 clr.AddReference("awlib")
 import awcsc as aw
+import re
 import numpy as np
-from typing import Dict, List
-from core import calc, calc_Vdependent
+import pandas as pd
+import System
+from System.Collections.Generic import Dictionary
+from typing import Any, Callable, Dict, List, Tuple, Union
+from core import calc, calc_Vdependent, calc_final, calc_sensitivity, derive, netArraytonpArray
+import aio
+from trajectory import Trajectory
+from timestep import DEFAULT_DT, dt_table
+
+
+def _integrator(name: str):
+    """"explicit", "implicit", "auto"をaw.Integratorに変換する"""
+    try:
+        return getattr(aw.Integrator, name.capitalize())
+    except AttributeError:
+        raise ValueError(f"unknown integrator {name}") from None
+
+
+class LogPolicy:
+    """Calc.calcで結果を記録する条件。dt_logの代わりにCalc.calcに渡す。
+
+    一定時間ごとの記録だと、準定常な区間は記録が多すぎ、衝突直後や侵徹終了間際の急な変化は記録が足りない。
+    LogPolicyでは前回の記録からの変化量で記録するかどうかを決める。
+    以下のいずれかを満たしたステップを記録する(0にした条件は使わない)。
+    衝突時と侵徹終了時の状態は必ず記録する。
+
+    * 前回の記録からdt_log以上時間が経った
+    * 前回の記録からdDoP以上侵徹した
+    * toleranceで指定した値のどれかが、前回の記録から許容値より大きく変化した
+
+    max_pointsを指定すると、記録数がそれに達するたびに1つおきに間引き、各条件の幅を2倍にして続ける。
+
+    ::
+
+        policy = penepy.LogPolicy(dDoP=1e-3, tolerance={"u": 10, "udot": 1e7}, max_points=500)
+        res = C.calc(1e-7, policy)
+
+    Parameters
+    ----------
+    dt_log : float, optional
+        記録する時間間隔[s], by default 0.
+    dDoP : float, optional
+        記録するDoPの間隔[m], by default 0.
+    tolerance : Dict[str, float], optional
+        値の名前と、記録するまでに許す変化量。単位はcalcの結果と同じ, by default None
+    max_points : int, optional
+        記録する点の最大数(衝突時と侵徹終了時を含む)。0なら制限しない, by default 0
+    """
+    def __init__(self,
+                 dt_log: float = 0.,
+                 dDoP: float = 0.,
+                 tolerance: Dict[str, float] = None,
+                 max_points: int = 0):
+        self._L = aw.LogPolicy()
+        self._L.dt_log = float(dt_log)
+        self._L.dDoP = float(dDoP)
+        self._L.max_points = int(max_points)
+        for k, v in ({} if tolerance is None else tolerance).items():
+            self._L.SetTolerance(k, float(v))
+
+    @property
+    def dt_log(self) -> float:
+        return self._L.dt_log
+
+    @property
+    def dDoP(self) -> float:
+        return self._L.dDoP
+
+    @property
+    def max_points(self) -> int:
+        return self._L.max_points
+
+    @property
+    def tolerance(self) -> Dict[str, float]:
+        return {k: self._L.tolerance[k] for k in self._L.tolerance.Keys}
+
+
+class StopCondition:
+    """侵徹終了より前に計算を打ち切る条件。Calc.calc, calc_final, calc_Vdependentのstopに渡す。
+
+    板厚Hの標的を貫通するか、DoPがある値を超えるかだけを知りたいときに、答えが出た時点で計算を止める。
+    条件は"DoP >= 0.05"のような値と閾値の比較か、pythonの関数で与え、いずれかを満たしたら止める。
+
+    * 比較は毎ステップ.NET側で調べ、満たした最初のステップの状態を侵徹終了時の状態にする。
+      値の単位はcalcの結果と同じ(tは[ms])
+    * 関数はcalcの結果の列名をkeyに、dt_checkごとの状態をnp.ndarrayで並べた辞書を受け取り、
+      行ごとに止めるかどうかを表すboolの配列(または1つのbool)を返す。
+      check_every行ずつまとめて呼び、最初にTrueになった行の状態を侵徹終了時の状態にする(それより後の記録は捨てる)
+
+    ::
+
+        stop = penepy.StopCondition("DoP >= 0.05", "t >= 0.2")
+        res = C.calc(1e-7, 1e-6, stop=stop)
+        res.attrs["stop"]   # "DoP >= 0.05"、侵徹終了まで計算したらNone
+        C.calc_Vdependent(V_list, stop="DoP >= 0.05")["stop"]
+        C.calc_final(stop=lambda r: r["u"] - r["v"] > -10.)
+
+    Parameters
+    ----------
+    *conditions : Union[str, Callable[[Dict[str, np.ndarray]], Any]]
+        "値 >= 閾値"、"値 <= 閾値"の文字列か、止めるかどうかを判定する関数
+    dt_check : float, optional
+        関数に渡す状態の時間間隔[s], by default 1e-6
+    check_every : int, optional
+        関数を呼ぶまでにためる行数, by default 64
+    """
+    def __init__(self,
+                 *conditions: Union[str, Callable[[Dict[str, np.ndarray]], Any]],
+                 dt_check: float = 1e-6,
+                 check_every: int = 64):
+        self._S = aw.StopCondition()
+        self._S.dt_check = float(dt_check)
+        self._S.check_every = int(check_every)
+        predicates = []
+        for c in conditions:
+            if callable(c):
+                predicates.append(c)
+                continue
+            m = re.fullmatch(r"\s*(\w+)\s*(>=|<=)\s*(\S+)\s*", c)
+            if m is None:
+                raise ValueError(f"condition should be 'name >= value' or 'name <= value': {c}")
+            name, op, value = m.groups()
+            if op == ">=":
+                self._S.Above(name, float(value))
+            else:
+                self._S.Below(name, float(value))
+        if predicates:
+            self._S.predicate = System.Func[Dictionary[System.String, System.Array[System.Double]],
+                                            System.Int32](_predicate(predicates))
+
+    @property
+    def names(self) -> List[str]:
+        """各条件の説明。比較の条件の後に、関数があれば"predicate"が続く"""
+        return list(self._S.Names)
+
+    def reason(self, i: int) -> Union[str, None]:
+        """Calc.stopped_byの番号を条件の説明にする。-1(侵徹終了まで計算した)ならNone"""
+        return self.names[i] if i >= 0 else None
+
+
+def _predicate(predicates: List[Callable[[Dict[str, np.ndarray]], Any]]) -> Callable:
+    """pythonの関数を、.NETから呼べる「最初に止める行の番号を返す関数」にする"""
+    def f(d):
+        rows = {k: netArraytonpArray(d[k]) for k in d.Keys}
+        n = len(rows["t"])
+        hit = np.zeros(n, dtype=bool)
+        for p in predicates:
+            hit |= np.broadcast_to(np.asarray(p(rows), dtype=bool), (n, ))
+        return int(np.argmax(hit)) if hit.any() else -1
+
+    return f
+
+
+def _stop(stop: Any) -> Union[StopCondition, None]:
+    """stopに渡された値をStopConditionにする"""
+    if stop is None or isinstance(stop, StopCondition):
+        return stop
+    if isinstance(stop, (list, tuple)):
+        return StopCondition(*stop)
+    return StopCondition(stop)
 
 
 class Calc:
@@ -29,49 +188,265 @@ class Calc:
 
     Methods
     -------
-    calc(dt, dt_log)
+    calc(dt, dt_log, fields=None, stop=None)
         衝突速度V0における侵徹過程の時間変化を計算する
-    calc_Vdependent(V_list)
+    calc_Vdependent(V_list, dt=None, stop=None)
         種々の衝突速度について、侵徹終了時点での状態を取得する
+    calc_final(dt=None, stop=None)
+        衝突速度V0について、侵徹終了時点での状態だけを計算する
+    calc_dense(dt=1e-7)
+        補間用に変化に応じて記録しながら侵徹過程を計算する
+    calc_sensitivity(params, dt=1e-7)
+        侵徹終了時のDoPと、パラメータに対するその偏微分を求める
+    calc_async(dt, dt_log), calc_Vdependent_async(V_list)
+        calc, calc_Vdependentをイベントループを止めずに実行する
     """
     def __init__(self):
         """コンストラクタ。実体はない
         """
         self._C: aw.Calc = None
 
-    def calc(self, dt: float, dt_log: float) -> Dict[str, np.ndarray]:
-        """衝突速度V0における侵徹過程の時間変化を計算する。
+    def calc(self, dt: float, dt_log: Union[float, LogPolicy],
+             fields: List[str] = None, stop: Any = None) -> Dict[str, np.ndarray]:
+        r"""衝突速度V0における侵徹過程の時間変化を計算する。
+
+        fieldsを指定すると、その値だけを.NET側で記録してpythonに渡す。
+        省略するとY, Rt以外の積分の状態(aw.Calc.PrimaryChannels)だけを記録し、
+        Y, Rtと次の値は最初に参照したときに記録した値からまとめて求める(:any:`Trajectory <penepy.trajectory.Trajectory>` 参照)。
+        Y, Rtは記録したときと同じく、その点を記録した段階の式と段階の中での深さで求める。
+        そのため計算中に各段階が始まった時刻[ms]とDoP[m]を記録し、res.attrs["stages"]に(t0, DoP0)のリストで残す。
+
+        * m : 残存侵徹体の質量[kg]。 :math:`(L-l+cv\times R)\times \rho_P \times \pi R^2`
+        * KE : 残存侵徹体の運動エネルギー :math:`m v^2/2` [J]
+        * DoP/L : 初期長さで割った侵徹深さ[-]
+        * Vc : クレーターの体積 :math:`\pi R_c^2 DoP` [ :math:`\mathrm{m^3}` ]
+
+        dt_logの代わりにLogPolicyを渡すと、変化の大きさに応じて記録する。
+        stopを指定すると、その条件を満たした時点で計算を止め、止めた条件をres.attrs["stop"]に残す。
+
+        ::
+
+            res = C.calc(1e-7, 1e-6, fields=["t", "DoP", "u"])
+            res = C.calc(1e-7, 1e-6)
+            res["Y"]   # ここで求める
+            res["KE"]
+            res = C.calc(1e-7, penepy.LogPolicy(dDoP=1e-3, max_points=500))
+            res = C.calc(1e-7, 1e-6, stop="DoP >= 0.05")
         
         Parameters
         ----------
         dt : float
             計算時間ステップ[s]
-        dt_log : float
-            記録時間ステップ[s]
+        dt_log : Union[float, LogPolicy]
+            記録時間ステップ[s]、または記録する条件
+        fields : List[str], optional
+            記録する値の名前。省略するとY, Rt以外のすべて, by default None
+        stop : Union[StopCondition, str, Callable, list], optional
+            計算を打ち切る条件。StopConditionか、それに渡す条件(のリスト), by default None
         
         Returns
         -------
-        Dict[str, np.ndarray]
-            侵徹過程の時間変化を記録した辞書
+        Trajectory
+            侵徹過程の時間変化を記録したpd.DataFrame。atで記録点の間を補間できる
         """
-        return calc(self._C, float(dt), (dt_log))
+        if isinstance(dt_log, LogPolicy):
+            dt_log = dt_log._L
+        if fields is None:
+            fields = list(aw.Calc.PrimaryChannels)
+        stop = _stop(stop)
+        log = aw.StageLog()
+        C = self._C if stop is None else self._C.Until(stop._S)
+        res = Trajectory(calc(C, float(dt), dt_log, fields, log)).derive(self._derived(log))
+        res.attrs["stages"] = list(zip(log.t0, log.DoP0))
+        if stop is not None:
+            res.attrs["stop"] = stop.reason(C.stopped_by)
+        return res
+
+    def _derived(self, log: aw.StageLog) -> Dict[str, Callable[[Trajectory], np.ndarray]]:
+        """calcの結果に登録する、記録した値から求める値。寸法、衝突速度などは呼んだ時点の値を、段階はlogを使う"""
+        C = self._C.At(self._C.V0)
+        P = C.P
+        A = np.pi * P.R * P.R
+        rho, l, cvR, L0, Rc = P.rho, P.l, P.cv * P.R, P.L, C.Rc
+        t = lambda r: r["t"].values if log.Count > 1 else None
+        return {
+            "Y": lambda r: derive(C, "Y", r["DoP"].values, t=t(r), stage_log=log),
+            "Rt": lambda r: derive(C, "Rt", r["DoP"].values, r["alpha"].values, t(r), log),
+            "m": lambda r: np.maximum(r["L"].values - l + cvR, 0.) * rho * A,
+            "KE": lambda r: 0.5 * r["m"].values * r["v"].values**2,
+            "DoP/L": lambda r: r["DoP"].values / L0,
+            "Vc": lambda r: np.pi * Rc * Rc * r["DoP"].values,
+        }
+
+    def calc_dense(self, dt: float = 1e-7, policy: LogPolicy = None) -> Trajectory:
+        """補間用に、変化の大きいところを細かく記録しながら侵徹過程を計算する。
+
+        記録点と微分からエルミート補間で任意の時刻、深さの状態を求められるので、
+        dt_logを細かくして計算し直す必要がない。
+
+        ::
+
+            res = C.calc_dense()
+            res.at(t=np.linspace(0, res["t"].max(), 1000))
+            res.at(DoP=[0.05, 0.1])
+
+        Parameters
+        ----------
+        dt : float, optional
+            計算時間ステップ[s], by default 1e-7
+        policy : LogPolicy, optional
+            記録する条件。省略するとu, vが10 m/s、alphaが0.05、L, DoPが初期長さの1/100変化するごとに記録する, by default None
 
-    def calc_Vdependent(self, V_list: np.ndarray) -> Dict[str, np.ndarray]:
+        Returns
+        -------
+        Trajectory
+            侵徹過程の時間変化。Y, Rtなどは参照したときに求める
+        """
+        if policy is None:
+            L0 = self._C.P.L
+            policy = LogPolicy(dDoP=L0 / 100.,
+                               tolerance={"u": 10., "v": 10., "alpha": 0.05, "L": L0 / 100.})
+        return self.calc(dt, policy)
+
+    def calc_Vdependent(self, V_list: np.ndarray,
+                        dt: Union[float, np.ndarray] = None,
+                        stop: Any = None) -> Dict[str, np.ndarray]:
         """種々の衝突速度について、侵徹終了時点での状態を取得する。
 
         np.ndarrayに格納されている値は、calcと異なりV_listに対応した値が記録されている。
+        V0は書き換えないので、同じCalcを複数のスレッドから同時に使ってよい。
+        stopを指定すると、各衝突速度でその条件を満たした時点の状態を返し、止めた条件を"stop"に格納する。
         
         Parameters
         ----------
         V_list : np.ndarray
             衝突速度のリスト。
+        dt : Union[float, np.ndarray], optional
+            計算時間ステップ[s]。衝突速度ごとに指定もできる。
+            省略するとpenepy.dt_tableに登録されたdt、登録がなければ1e-7, by default None
+        stop : Union[StopCondition, str, Callable, list], optional
+            計算を打ち切る条件。StopConditionか、それに渡す条件(のリスト), by default None
         
         Returns
         -------
         Dict[str, np.ndarray]
             侵徹終了時点での状態を記録した辞書
         """
-        return calc_Vdependent(self._C, V_list)
+        if dt is None:
+            dt = dt_table.get(type(self).__name__, V_list)
+        stop = _stop(stop)
+        if stop is None:
+            return calc_Vdependent(self._C, V_list, dt)
+        res = calc_Vdependent(self._C.Until(stop._S), V_list, dt)
+        # 止めなかった速度のNoneがNaNに変わらないようにobjectの列にする
+        res["stop"] = pd.Series([stop.reason(int(i)) for i in res["stop"]], index=res.index,
+                                dtype=object)
+        return res
+
+    def calc_final(self, dt: float = None, stop: Any = None) -> Dict[str, float]:
+        """衝突速度V0について、侵徹終了時点での状態だけを計算する。
+
+        途中経過を一切記録しないので、calcで最後の値だけを使うよりも速い。
+        値はcalcの最後の記録、calc_Vdependent([V0])と同じ。
+
+        Parameters
+        ----------
+        dt : float, optional
+            計算時間ステップ[s]。省略するとpenepy.dt_tableに登録されたdt、登録がなければ1e-7, by default None
+        stop : Union[StopCondition, str, Callable, list], optional
+            計算を打ち切る条件。指定すると止めた時点の状態を返し、止めた条件を"stop"に格納する, by default None
+
+        Returns
+        -------
+        Dict[str, float]
+            侵徹終了時点での状態。keyはcalcの結果と同じ
+        """
+        if dt is None:
+            d = dt_table.get(type(self).__name__, self.V0)
+            dt = DEFAULT_DT if d is None else d[0]
+        stop = _stop(stop)
+        if stop is None:
+            return calc_final(self._C, dt)
+        C = self._C.Until(stop._S)
+        r = calc_final(C, dt)
+        r["stop"] = stop.reason(C.stopped_by)
+        return r
+
+    def calc_sensitivity(self,
+                         params: List[str],
+                         dt: float = 1e-7,
+                         rel_eps: float = 1e-5) -> Tuple[float, Dict[str, float]]:
+        """侵徹終了時のDoPと、パラメータに対するその偏微分を中心差分で求める。
+
+        パラメータを±少しずらした複製を元の計算と1ステップずつ並走させ、終了判定を共有して差分をとる。
+        そのためパラメータごとにcalcをやり直す差分法と違い、終了ステップのずれによるノイズが出ない。
+        有限差分なので、計算量はパラメータn個に対してcalc_finalの(2n+1)倍かかる。
+        CalcAWHVLVでは、複製も元の計算と同じステップでCalcAWからCalcAWLVに切り替わる。
+
+        ::
+
+            DoP, grad = C.calc_sensitivity(["T.Y0", "P.L", "fit_param[0]"])
+            grad["T.Y0"] # dDoP/dY0 [m/GPa]
+
+        Parameters
+        ----------
+        params : List[str]
+            パラメータ名のリスト。"V0", "fit_param[i]", "P.L", "P.D", "P.Crh", "P.rho", "P.Y", "P.E", "P.K0", "P.k",
+            "T.rho", "T.Y0", "T.Ys", "T.E", "T.K0", "T.k"、CalcForrLVでは"K1", "K2"も使える。
+            強度、弾性率はGPa単位で扱う
+        dt : float, optional
+            計算時間ステップ[s], by default 1e-7
+        rel_eps : float, optional
+            パラメータをずらす相対幅, by default 1e-5
+
+        Returns
+        -------
+        Tuple[float, Dict[str, float]]
+            侵徹終了時のDoP[m]と、各パラメータに対するDoPの偏微分
+        """
+        return calc_sensitivity(self._C, params, dt, rel_eps)
+
+    async def calc_async(self, dt: float, dt_log: Union[float, LogPolicy],
+                         fields: List[str] = None) -> Dict[str, np.ndarray]:
+        """calcを計算用のスレッドプールで実行し、終わるまでawaitする。
+
+        同時に実行する計算の数はpenepy.aio.set_max_concurrencyで制限される。
+
+        Parameters
+        ----------
+        dt : float
+            計算時間ステップ[s]
+        dt_log : Union[float, LogPolicy]
+            記録時間ステップ[s]、または記録する条件
+        fields : List[str], optional
+            記録する値の名前。省略するとY, Rt以外のすべて, by default None
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            侵徹過程の時間変化を記録した辞書
+        """
+        return await aio.calc_async(self, dt, dt_log, fields)
+
+    async def calc_Vdependent_async(self, V_list: np.ndarray,
+                                    chunksize: int = 16) -> Dict[str, np.ndarray]:
+        """calc_Vdependentを計算用のスレッドプールで実行し、終わるまでawaitする。
+
+        V_listはchunksizeごとに分けて計算するので、キャンセルするとその切れ目で打ち切られる。
+
+        Parameters
+        ----------
+        V_list : np.ndarray
+            衝突速度のリスト
+        chunksize : int, optional
+            一度に計算する衝突速度の数, by default 16
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            侵徹終了時点での状態を記録した辞書
+        """
+        return await aio.calc_Vdependent_async(self, V_list, chunksize)
 
     @property
     def V0(self) -> float:
@@ -119,7 +494,33 @@ class Calc:
         return self._C.Dc
 
 
-class CalcAW(Calc):
+class _CalcAWBase(Calc):
+    """u, vを時間積分するAW系のモデル(CalcAW, CalcAWLV, CalcAWHVLV)に共通の部分
+
+    Attributes
+    ----------
+    integrator : str
+        u, vの時間積分の方法。"explicit"は従来の陽的な積分、"implicit"は線形化した陰的Euler法、
+        "auto"は侵徹終了間際などの硬いステップだけ陰的に積分し、硬くない区間の結果は"explicit"と同じになる。
+        高速度(10000 m/s程度以上)や大きいdtで"explicit"の結果が振動するのを防ぐ
+    """
+    @property
+    def integrator(self) -> str:
+        """u, vの時間積分の方法。"explicit", "implicit", "auto"のいずれか
+
+        Returns
+        -------
+        str
+            時間積分の方法
+        """
+        return str(self._C.integrator).lower()
+
+    @integrator.setter
+    def integrator(self, value: str):
+        self._C.integrator = _integrator(value)
+
+
+class CalcAW(_CalcAWBase):
     """高速度Anderson-Walkerモデル用のCalcクラス
 
     ::
@@ -138,6 +539,8 @@ class CalcAW(Calc):
         衝突速度
     fit_param : np.ndarray, optional
         衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+    integrator : str, optional
+        u, vの時間積分の方法, by default "auto"
 
     Attributes
     ----------
@@ -147,6 +550,8 @@ class CalcAW(Calc):
         クレーター半径[m]
     Dc : float
         クレーター直径[m]
+    integrator : str
+        u, vの時間積分の方法。 :any:`_CalcAWBase <penepy.calc._CalcAWBase>` 参照
 
     Methods
     -------
@@ -159,7 +564,8 @@ class CalcAW(Calc):
                  P,
                  T,
                  V0,
-                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07])):
+                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07]),
+                 integrator: str = "auto"):
         """CalcAWのコンストラクタ
         
         Parameters
@@ -172,11 +578,14 @@ class CalcAW(Calc):
             衝突速度
         fit_param : np.ndarray, optional
             衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+        integrator : str, optional
+            u, vの時間積分の方法。"explicit", "implicit", "auto"のいずれか, by default "auto"
         """
         self._C = aw.CalcAW(P._P, T._T, float(V0), fit_param)
+        self.integrator = integrator
 
 
-class CalcAWLV(Calc):
+class CalcAWLV(_CalcAWBase):
     """低速度Anderson-Walkerモデル用のCalcクラス
 
     ::
@@ -195,6 +604,8 @@ class CalcAWLV(Calc):
         衝突速度
     fit_param : np.ndarray, optional
         衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+    integrator : str, optional
+        u, vの時間積分の方法, by default "auto"
 
     Attributes
     ----------
@@ -204,6 +615,8 @@ class CalcAWLV(Calc):
         クレーター半径[m]
     Dc : float
         クレーター直径[m]
+    integrator : str
+        u, vの時間積分の方法。 :any:`_CalcAWBase <penepy.calc._CalcAWBase>` 参照
 
     Methods
     -------
@@ -216,7 +629,8 @@ class CalcAWLV(Calc):
                  P,
                  T,
                  V0,
-                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07])):
+                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07]),
+                 integrator: str = "auto"):
         """CalcAWLVのコンストラクタ
         
         Parameters
@@ -229,11 +643,14 @@ class CalcAWLV(Calc):
             衝突速度
         fit_param : np.ndarray, optional
             衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+        integrator : str, optional
+            u, vの時間積分の方法。"explicit", "implicit", "auto"のいずれか, by default "auto"
         """
         self._C = aw.CalcAWLV(P._P, T._T, float(V0), fit_param)
+        self.integrator = integrator
 
 
-class CalcAWHVLV(Calc):
+class CalcAWHVLV(_CalcAWBase):
     """高速度-低速度一貫Anderson-Walkerモデル用のCalcクラス
 
     ::
@@ -252,6 +669,8 @@ class CalcAWHVLV(Calc):
         衝突速度
     fit_param : np.ndarray, optional
         衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+    integrator : str, optional
+        u, vの時間積分の方法, by default "auto"
 
     Attributes
     ----------
@@ -261,6 +680,8 @@ class CalcAWHVLV(Calc):
         クレーター半径[m]
     Dc : float
         クレーター直径[m]
+    integrator : str
+        u, vの時間積分の方法。 :any:`_CalcAWBase <penepy.calc._CalcAWBase>` 参照
 
     Methods
     -------
@@ -273,7 +694,8 @@ class CalcAWHVLV(Calc):
                  P,
                  T,
                  V0,
-                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07])):
+                 fit_param: np.ndarray = np.array([0.000287, 1.48e-07]),
+                 integrator: str = "auto"):
         """CalcAWHVLVのコンストラクタ
         
         Parameters
@@ -286,8 +708,11 @@ class CalcAWHVLV(Calc):
             衝突速度
         fit_param : np.ndarray, optional
             衝突時に形成されるCrater径を求める際の速度依存性。わからなければ触れないこと, by default np.array([0.000287, 1.48e-07])
+        integrator : str, optional
+            u, vの時間積分の方法。"explicit", "implicit", "auto"のいずれか, by default "auto"
         """
         self._C = aw.CalcAWHVLV(P._P, T._T, float(V0), fit_param)
+        self.integrator = integrator
 
 
 class CalcForrLV(Calc):
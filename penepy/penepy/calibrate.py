@@ -0,0 +1,290 @@
+"""実験で得られたDoPにモデルのパラメータを合わせ込むためのモジュール。
+
+.. highlight:: python
+
+::
+
+    data = pd.read_csv("trials.csv") # V0, L, D, mT, mP, DoPの列を持つ
+    cal = penepy.Calibration(penepy.CalcAW, data, {"fit_param[0]": 0.000287, "T.Y0": 1.0})
+    cal.fit()
+    cal.summary()
+
+パラメータ名は :any:`makeCalc <penepy.util.makeCalc>` と同じ。
+ヤコビアンは :any:`calc_sensitivity <penepy.calc.Calc.calc_sensitivity>` で複製を並走させた中心差分で求め、
+対応していないパラメータ(P.LDなど)ではパラメータごとにcalc_finalをやり直す中心差分で求める。
+同じパラメータ値で同じ試験を評価した結果は記憶しておき、再計算しない。
+"""
+import clr
+import multiprocessing
+import numpy as np
+import pandas as pd
+import System
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+from material import Material
+from util import getMaterials, getTandP, makeCalc
+
+
+def _material(m: Any) -> Material:
+    if isinstance(m, Material):
+        return m
+    return getMaterials(m)[0]
+
+
+def _evaluate(args) -> List[Tuple[float, np.ndarray]]:
+    """試験ごとにDoPとパラメータに対する偏微分を求める。ProcessPoolExecutorから呼べるようにモジュールの関数にしている"""
+    model, cases, names, x, dt, rel_eps, kwargs = args
+    params = dict(zip(names, x))
+    ret = []
+    for P, T, V0 in cases:
+        C = makeCalc(model, P, T, V0, params, **kwargs)
+        try:
+            DoP, grad = C.calc_sensitivity(names, dt, rel_eps)
+            g = np.array([grad[k] for k in names])
+        except System.ArgumentException as e:
+            # calc_sensitivityに対応していないパラメータ名だけ中心差分で求め、それ以外の例外はそのまま投げる
+            if not str(e.Message).startswith("unknown parameter"):
+                raise
+            DoP = C.calc_final(dt)["DoP"]
+            g = np.empty(len(names))
+            for j, k in enumerate(names):
+                h = rel_eps * abs(x[j]) if x[j] != 0 else rel_eps
+                pp, pm = dict(params), dict(params)
+                pp[k] = x[j] + h
+                pm[k] = x[j] - h
+                Cp = makeCalc(model, P, T, V0, pp, **kwargs)
+                Cm = makeCalc(model, P, T, V0, pm, **kwargs)
+                Dp = Cp.calc_final(dt)["DoP"]
+                Dm = Cm.calc_final(dt)["DoP"]
+                g[j] = (Dp - Dm) / (2. * h)
+        ret.append((float(DoP), g))
+    return ret
+
+
+class Calibration:
+    r"""Levenberg-Marquardt法による最小二乗でモデルのパラメータを実験値に合わせ込むクラス。
+
+    .. math::
+
+        \min_p \sum_i w_i (\mathrm{DoP}_\mathrm{model}(p)_i - \mathrm{DoP}_i)^2, \quad w_i = 1/\sigma_i^2
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    data : pd.DataFrame
+        試験結果。V0[m/s], L[m], D[m], mT, mP, DoP[m]の列が必要。
+        mT, mPはmaterialPropertyListの材料名かMaterial。
+        Crh, Ys[GPa], ts[m], th[m]の列があれば標的、侵徹体に反映する。
+        sigma[m]の列があれば重み1/sigma^2をつける
+    params : Dict[str, float]
+        合わせ込むパラメータ名と初期値。名前は :any:`makeCalc <penepy.util.makeCalc>` 参照
+    bounds : Dict[str, Tuple[float, float]], optional
+        パラメータの(下限, 上限), by default None
+    n_jobs : int, optional
+        並列に評価するプロセス数, by default 1
+    dt : float, optional
+        計算時間ステップ[s], by default 1e-7
+    rel_eps : float, optional
+        偏微分を求める際にパラメータをずらす相対幅, by default 1e-5
+    **kwargs : Any
+        modelにそのまま渡すキーワード引数
+
+    Attributes
+    ----------
+    params : Dict[str, float]
+        現在の(fit後は合わせ込んだ)パラメータ
+    stderr : Dict[str, float]
+        パラメータの標準誤差
+    cov : np.ndarray
+        パラメータの共分散行列 :math:`s^2 (J^T W J)^{-1}`
+    residuals : np.ndarray
+        DoPの残差(モデル-実験)[m]
+    nfev : int
+        実際に計算した試験の数(記憶していた結果を使ったものは数えない)
+
+    Methods
+    -------
+    fit(max_iter=50)
+        パラメータを合わせ込む
+    predict(params=None)
+        各試験のDoPをモデルで計算する
+    summary()
+        パラメータと標準誤差の表
+    """
+    def __init__(self,
+                 model: type,
+                 data: pd.DataFrame,
+                 params: Dict[str, float],
+                 bounds: Dict[str, Tuple[float, float]] = None,
+                 n_jobs: int = 1,
+                 dt: float = 1e-7,
+                 rel_eps: float = 1e-5,
+                 **kwargs: Any):
+        self.model = model
+        self.data = pd.DataFrame(data).reset_index(drop=True)
+        self.names = list(params.keys())
+        self.x = np.array([params[k] for k in self.names], dtype=np.float64)
+        bounds = {} if bounds is None else bounds
+        self.lower = np.array(
+            [bounds.get(k, (None, None))[0] for k in self.names], dtype=np.float64)
+        self.upper = np.array(
+            [bounds.get(k, (None, None))[1] for k in self.names], dtype=np.float64)
+        self.lower[np.isnan(self.lower)] = -np.inf
+        self.upper[np.isnan(self.upper)] = np.inf
+        self.n_jobs = int(n_jobs)
+        self.dt = dt
+        self.rel_eps = rel_eps
+        self.kwargs = kwargs
+
+        self.cases = []
+        for _, r in self.data.iterrows():
+            T, P = getTandP(_material(r["mT"]), _material(r["mP"]), r["L"], r["D"],
+                            r.get("Crh", 0.5), r.get("Ys", 0.), r.get("ts", 0.),
+                            r.get("th", 0.))
+            self.cases.append((P, T, float(r["V0"])))
+        self.DoP = self.data["DoP"].values.astype(np.float64)
+        if "sigma" in self.data:
+            self.w = 1. / self.data["sigma"].values.astype(np.float64)**2
+        else:
+            self.w = np.ones(len(self.cases))
+
+        self._memo: Dict[Tuple[float, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        self.nfev = 0
+        self.cov = None
+        self.residuals = None
+
+    @property
+    def params(self) -> Dict[str, float]:
+        return dict(zip(self.names, self.x.tolist()))
+
+    @property
+    def stderr(self) -> Dict[str, float]:
+        if self.cov is None:
+            return {k: np.nan for k in self.names}
+        return dict(zip(self.names, np.sqrt(np.diag(self.cov)).tolist()))
+
+    def _evaluate(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """パラメータxでの各試験のDoPとヤコビアンを返す。結果はxごとに記憶する"""
+        key = tuple(x.tolist())
+        if key in self._memo:
+            return self._memo[key]
+        k = max(min(self.n_jobs, len(self.cases)), 1)
+        args = [(self.model, self.cases[i::k], self.names, x, self.dt,
+                 self.rel_eps, self.kwargs) for i in range(k)]
+        if k == 1:
+            res = [_evaluate(args[0])]
+        else:
+            # .NETのランタイムを読み込んだプロセスはforkできないので、spawnで作る
+            with ProcessPoolExecutor(len(args),
+                                     mp_context=multiprocessing.get_context("spawn")) as ex:
+                res = list(ex.map(_evaluate, args))
+        out = [None] * len(self.cases)
+        for i, r in enumerate(res):
+            out[i::k] = r
+        DoP = np.array([o[0] for o in out])
+        J = np.array([o[1] for o in out]).reshape(len(out), len(self.names))
+        self.nfev += len(out)
+        self._memo[key] = (DoP, J)
+        return DoP, J
+
+    def predict(self, params: Dict[str, float] = None) -> np.ndarray:
+        """各試験のDoPをモデルで計算する
+
+        Parameters
+        ----------
+        params : Dict[str, float], optional
+            パラメータ。省略すると現在のparams, by default None
+
+        Returns
+        -------
+        np.ndarray
+            DoP[m]
+        """
+        x = self.x if params is None else np.array(
+            [params[k] for k in self.names], dtype=np.float64)
+        return self._evaluate(x)[0]
+
+    def fit(self,
+            max_iter: int = 50,
+            xtol: float = 1e-6,
+            ftol: float = 1e-10,
+            verbose: bool = False) -> "Calibration":
+        """Levenberg-Marquardt法でパラメータを合わせ込む。
+
+        Parameters
+        ----------
+        max_iter : int, optional
+            最大反復回数, by default 50
+        xtol : float, optional
+            パラメータの相対変化がこれを下回ったら終了, by default 1e-6
+        ftol : float, optional
+            残差二乗和の相対変化がこれを下回ったら終了, by default 1e-10
+        verbose : bool, optional
+            反復ごとに残差二乗和を表示する, by default False
+
+        Returns
+        -------
+        Calibration
+            self
+        """
+        x = np.clip(self.x, self.lower, self.upper)
+        DoP, J = self._evaluate(x)
+        r = DoP - self.DoP
+        cost = np.sum(self.w * r * r)
+        lam = 1e-3
+        for it in range(max_iter):
+            A = J.T @ (self.w[:, None] * J)
+            g = J.T @ (self.w * r)
+            d = np.diag(A).copy()
+            d[d == 0] = 1.
+            while True:
+                try:
+                    dx = -np.linalg.solve(A + lam * np.diag(d), g)
+                except np.linalg.LinAlgError:
+                    dx = -np.linalg.lstsq(A + lam * np.diag(d), g, rcond=None)[0]
+                xn = np.clip(x + dx, self.lower, self.upper)
+                DoPn, Jn = self._evaluate(xn)
+                rn = DoPn - self.DoP
+                costn = np.sum(self.w * rn * rn)
+                if np.isfinite(costn) and costn <= cost:
+                    break
+                lam *= 10.
+                if lam > 1e10:
+                    break
+            if not (np.isfinite(costn) and costn <= cost):
+                break
+            step = np.abs(xn - x)
+            dcost = cost - costn
+            x, DoP, J, r, cost = xn, DoPn, Jn, rn, costn
+            lam = max(lam * 0.1, 1e-12)
+            if verbose:
+                print(f"{it}: cost={cost:.6e}, lambda={lam:.1e}")
+            if (np.all(step <= xtol * (np.abs(x) + xtol))
+                    or dcost <= ftol * max(cost, 1e-300)):
+                break
+
+        self.x = x
+        self.residuals = r
+        n, p = len(r), len(x)
+        A = J.T @ (self.w[:, None] * J)
+        s2 = cost / (n - p) if n > p else np.nan
+        try:
+            self.cov = s2 * np.linalg.inv(A)
+        except np.linalg.LinAlgError:
+            self.cov = s2 * np.linalg.pinv(A)
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """合わせ込んだパラメータと標準誤差の表
+
+        Returns
+        -------
+        pd.DataFrame
+            value, stderrの列を持ち、パラメータ名をindexとする
+        """
+        se = self.stderr
+        return pd.DataFrame({
+            "value": self.x,
+            "stderr": [se[k] for k in self.names]
+        }, index=self.names)
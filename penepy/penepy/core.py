@@ -26,6 +26,22 @@ def netArraytonpArray(a):
     return npArray
 
 
+def npArraytonetArray(a: np.ndarray):
+    """numpyの配列をSystem.Array[Double]に1回のメモリコピーで変換する
+
+    Array[Double](a)だと要素ごとに.NETとの変換が起こるので、大きな配列はこちらを使う
+    """
+    a = np.ascontiguousarray(a, dtype=np.float64).ravel()
+    netArray = System.Array.CreateInstance(Double, a.size)
+    try:
+        destHandle = GCHandle.Alloc(netArray, GCHandleType.Pinned)
+        destPtr = destHandle.AddrOfPinnedObject().ToInt64()
+        ctypes.memmove(destPtr, a.__array_interface__['data'][0], a.nbytes)
+    finally:
+        if destHandle.IsAllocated: destHandle.Free()
+    return netArray
+
+
 def get_constant(C1: float, C2: float) -> Tuple[float, float]:
     """Cavity expansion analysisの一般形
     P/Y = C1 Y(1+log(C2 E/Y))から
@@ -70,7 +86,8 @@ def dicconverter(d):
     return dret
 
 
-def calc(C: aw.Calc, dt: float, dt_log: float) -> Dict[str, np.ndarray]:
+def calc(C: aw.Calc, dt: float, dt_log,
+         fields: List[str] = None, stage_log: aw.StageLog = None) -> Dict[str, np.ndarray]:
     r"""awcscのCalc.calcで計算されたDictionary[String, List<double>]をpythonの辞書に変換して返すためのラッパー
 
     python側で使う分にはpenepy.Calcクラスのcalcを使えば問題ない(penepy.Calc.calcがこの関数を使う)
@@ -81,18 +98,62 @@ def calc(C: aw.Calc, dt: float, dt_log: float) -> Dict[str, np.ndarray]:
         awcscで定義されるCalcを継承したクラス
     dt : float
         計算時間ステップ[s]
-    dt_log : float
-        記録時間ステップ
+    dt_log : float or aw.LogPolicy
+        記録時間ステップ、または記録する条件
+    fields : List[str], optional
+        記録する値の名前。指定した値だけを.NET側で記録して変換する。省略するとすべて, by default None
+    stage_log : aw.StageLog, optional
+        各段階が始まった時刻とDoPを記録する。 :any:`derive <penepy.core.derive>` に渡す, by default None
     
     Returns
     -------
     Dict[str,np.ndarray]
         Calc.calcで得られた計算結果
     """
-    return dicconverter(C.calcPyInterop(float(dt), float(dt_log)))
+    if isinstance(dt_log, aw.LogPolicy):
+        names = aw.Calc.Channels if fields is None else System.Array[String](list(fields))
+        return dicconverter(C.calcPyInterop(float(dt), dt_log, names, stage_log))
+    if fields is None and stage_log is None:
+        return dicconverter(C.calcPyInterop(float(dt), float(dt_log)))
+    names = aw.Calc.Channels if fields is None else System.Array[String](list(fields))
+    return dicconverter(C.calcPyInterop(float(dt), float(dt_log), names, stage_log))
+
 
+def derive(C: aw.Calc, field: str, DoP: np.ndarray, alpha: np.ndarray = None,
+           t: np.ndarray = None, stage_log: aw.StageLog = None) -> np.ndarray:
+    r"""awcscのCalc.deriveのラッパー。記録したDoP, alphaからY, Rtを1回の呼び出しでまとめて求める
+
+    段階を切り替えるモデル(CalcAWHVLV)では、計算したときのstage_logと記録した時刻tを渡すと、
+    各点を記録した段階の式とその段階の中での深さで求める
+
+    python側で使う分にはcalcの結果のres["Y"]などを参照すればよい(penepy.Calc.calcがこの関数を登録する)
+
+    Parameters
+    ----------
+    C : aw.Calc
+        awcscで定義されるCalcを継承したクラス
+    field : str
+        "Y"か"Rt"
+    DoP : np.ndarray
+        侵徹深さ[m]
+    alpha : np.ndarray, optional
+        標的塑性領域[-]。Rtで使う, by default None
+    t : np.ndarray, optional
+        時刻[ms]。記録した順に並べること。stage_logの段階が1つなら使わない, by default None
+    stage_log : aw.StageLog, optional
+        :any:`calc <penepy.core.calc>` で各段階を記録したもの。省略すると最初の段階の式を使う, by default None
 
-def calc_Vdependent(C: aw.Calc, V_list: np.ndarray) -> Dict[str, np.ndarray]:
+    Returns
+    -------
+    np.ndarray
+        各点の値[GPa]
+    """
+    a = None if alpha is None else npArraytonetArray(alpha)
+    tt = None if t is None else npArraytonetArray(t)
+    return netArraytonpArray(C.derive(field, npArraytonetArray(DoP), a, tt, stage_log))
+
+
+def calc_Vdependent(C: aw.Calc, V_list: np.ndarray, dt=None) -> Dict[str, np.ndarray]:
     r"""awcscのCalc.calc_Vdependentで計算されたDictionary[String, List<double>]をpythonの辞書に変換して返すためのラッパー
 
     python側で使う分にはpenepy.Calcクラスのcalcを使えば問題ない(penepy.Calc.calc_Vdependentがこの関数を使う)
@@ -103,6 +164,8 @@ def calc_Vdependent(C: aw.Calc, V_list: np.ndarray) -> Dict[str, np.ndarray]:
         awcscで定義されるCalcを継承したクラス
     V_list : np.ndarray
         衝突速度のリスト
+    dt : float or np.ndarray, optional
+        計算時間ステップ[s]。衝突速度ごとに指定もできる。省略すると1e-7, by default None
     
     Returns
     -------
@@ -111,4 +174,100 @@ def calc_Vdependent(C: aw.Calc, V_list: np.ndarray) -> Dict[str, np.ndarray]:
     """
     if type(V_list) == type([]):
         V_list = np.array(V_list)
-    return dicconverter(C.calc_VdependentPyInterop(V_list))
+    if dt is None:
+        return dicconverter(C.calc_VdependentPyInterop(V_list))
+    V_list = np.ascontiguousarray(V_list, dtype=np.float64)
+    dt = np.ascontiguousarray(np.broadcast_to(np.asarray(dt, dtype=np.float64), V_list.shape))
+    return dicconverter(C.calc_VdependentPyInterop(V_list, dt))
+
+
+def calc_final(C: aw.Calc, dt: float = 1e-7) -> Dict[str, float]:
+    r"""awcscのCalc.calc_finalのラッパー。記録を行わずに侵徹終了時の状態だけを求める
+
+    python側で使う分にはpenepy.Calcクラスのcalc_finalを使えば問題ない
+
+    Parameters
+    ----------
+    C : aw.Calc
+        awcscで定義されるCalcを継承したクラス
+    dt : float, optional
+        計算時間ステップ[s], by default 1e-7
+
+    Returns
+    -------
+    Dict[str, float]
+        侵徹終了時の状態。keyはcalcの結果と同じ
+    """
+    r = C.calc_final(float(dt))
+    if type(r) == type(()):
+        # inの引数があるとpythonnetは(戻り値, 引数)のtupleを返す
+        r = r[0]
+    r = netArraytonpArray(r)
+    return dict(zip(aw.Calc.Channels, r.tolist()))
+
+
+def calc_sensitivity(C: aw.Calc,
+                     params: List[str],
+                     dt: float = 1e-7,
+                     rel_eps: float = 1e-5) -> Tuple[float, Dict[str, float]]:
+    r"""awcscのCalc.calc_sensitivityのラッパー
+
+    python側で使う分にはpenepy.Calcクラスのcalc_sensitivityを使えば問題ない
+
+    Parameters
+    ----------
+    C : aw.Calc
+        awcscで定義されるCalcを継承したクラス
+    params : List[str]
+        感度を求めるパラメータ名のリスト
+    dt : float, optional
+        計算時間ステップ[s], by default 1e-7
+    rel_eps : float, optional
+        パラメータをずらす相対幅, by default 1e-5
+
+    Returns
+    -------
+    Tuple[float, Dict[str, float]]
+        侵徹終了時のDoP[m]と、各パラメータに対するDoPの偏微分
+    """
+    params = list(params)
+    names = System.Array[String](params)
+    r = C.calc_sensitivity(float(dt), names, float(rel_eps))
+    if type(r) == type(()):
+        # inの引数があるとpythonnetは(戻り値, 引数...)のtupleを返す
+        r = r[0]
+    r = netArraytonpArray(r)
+    return float(r[0]), dict(zip(params, r[1:].tolist()))
+
+
+
+def solve_batch(model: str,
+                params: np.ndarray,
+                fields: List[str] = None,
+                max_parallel: int = 0) -> np.ndarray:
+    r"""awcscのBatch.solveのラッパー。1行1構成の行列の各行について侵徹終了時の状態を計算する
+
+    行列の受け渡しはそれぞれ1回のメモリコピーで行う。
+    python側で使う分にはpenepy.solve_batchを使えば問題ない
+
+    Parameters
+    ----------
+    model : str
+        "CalcAW"などのモデルの名前
+    params : np.ndarray
+        n行len(aw.Batch.Columns)列の行列
+    fields : List[str], optional
+        返す値の名前。省略するとaw.Calc.Channelsのすべて, by default None
+    max_parallel : int, optional
+        同時に計算する行数の上限。0なら制限しない, by default 0
+
+    Returns
+    -------
+    np.ndarray
+        n行len(fields)列の行列
+    """
+    params = np.asarray(params, dtype=np.float64)
+    n = params.shape[0]
+    names = aw.Calc.Channels if fields is None else System.Array[String](list(fields))
+    r = aw.Batch.solve(model, npArraytonetArray(params), n, names, int(max_parallel))
+    return netArraytonpArray(r).reshape(n, len(names))
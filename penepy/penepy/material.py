@@ -1,14 +1,24 @@
 import clr
 clr.AddReference("awlib")
 import awcsc as aw
+import math
 import numpy as np
-from typing import Union
+import System
+from typing import Sequence, Tuple, Union
+
+
+def _fromNetMaterial(M: aw.Material):
+    """awcsc.Materialからrho, Y, E, K0, kを取り出す。Y, E, K0は[GPa]"""
+    return (M.rho, M.Y * 1e-9, M.E * 1e-9, M.K0 * 1e-9, M.k)
 
 
 class Material:
     r"""侵徹及び標的の材料の特性を設定するクラス。
 
     awcsc.Materialのラッパー
+
+    パラメータはpython側に保持しており、プロパティの参照でpythonnetを経由することはない。
+    .NET側のawcsc.Materialは、パラメータを変更した後に :any:`Target <penepy.material.Target>` などの構築で必要になった時点で作り直される。
     
     Attributes
     ----------
@@ -29,6 +39,8 @@ class Material:
     c0 : float
         静的な体積弾性波の速度[m/s]
     """
+    __slots__ = ("_rho", "_Y", "_E", "_K0", "_k", "_G", "_c", "_c0", "_net")
+
     def __init__(self, rho: float, Y: float, E: float, K0: float, k: float):
         r"""Materialのコンストラクタ。
         
@@ -45,8 +57,34 @@ class Material:
         k : float
             衝撃波速度の粒子速度依存性[-]
         """
-        self._M = aw.Material(float(rho), float(Y), float(E), float(K0),
-                              float(k))
+        self._rho = float(rho)
+        self._Y = float(Y)
+        self._E = float(E)
+        self._K0 = float(K0)
+        self._k = float(k)
+        self._invalidate()
+
+    def _invalidate(self):
+        """パラメータが変更されたので派生量と.NET側のオブジェクトを破棄する"""
+        self._G = None
+        self._c = None
+        self._c0 = None
+        self._net = None
+
+    def __getstate__(self):
+        return (self._rho, self._Y, self._E, self._K0, self._k)
+
+    def __setstate__(self, state):
+        self._rho, self._Y, self._E, self._K0, self._k = state
+        self._invalidate()
+
+    @property
+    def _M(self) -> aw.Material:
+        """.NET側のawcsc.Material。パラメータ変更後、最初に参照されたときに作り直す"""
+        if self._net is None:
+            self._net = aw.Material(self._rho, self._Y, self._E, self._K0,
+                                    self._k)
+        return self._net
 
     @property
     def rho(self) -> float:
@@ -57,11 +95,12 @@ class Material:
         float
             密度[ :math:`\mathrm{kg/m^3}` ]
         """
-        return self._M.rho
+        return self._rho
 
     @rho.setter
     def rho(self, v: float):
-        self._M.rho = float(v)
+        self._rho = float(v)
+        self._invalidate()
 
     @property
     def Y(self) -> float:
@@ -72,11 +111,12 @@ class Material:
         float
             降伏強度[GPa]
         """
-        return self._M.Y * 1e-9
+        return self._Y
 
     @Y.setter
     def Y(self, v: float):
-        self._M.Y = float(v)
+        self._Y = float(v)
+        self._invalidate()
 
     @property
     def E(self) -> float:
@@ -87,11 +127,12 @@ class Material:
         float
             ヤング率[GPa]
         """
-        return self._M.E * 1e-9
+        return self._E
 
     @E.setter
     def E(self, v: float):
-        self._M.E = float(v)
+        self._E = float(v)
+        self._invalidate()
 
     @property
     def K0(self) -> float:
@@ -102,11 +143,12 @@ class Material:
         float
             静的な体積弾性率[GPa]
         """
-        return self._M.K0 * 1e-9
+        return self._K0
 
     @K0.setter
     def K0(self, v: float):
-        self._M.K0 = float(v)
+        self._K0 = float(v)
+        self._invalidate()
 
     @property
     def k(self) -> float:
@@ -117,11 +159,12 @@ class Material:
         float
             衝撃波速度の粒子速度依存性[-]
         """
-        return self._M.k
+        return self._k
 
     @k.setter
     def k(self, v: float):
-        self._M.k = float(v)
+        self._k = float(v)
+        self._invalidate()
 
     @property
     def G(self) -> float:
@@ -132,7 +175,9 @@ class Material:
         float
             剛性率[GPa]
         """
-        return self._M.G * 1e-9
+        if self._G is None:
+            self._G = 3e0 * self._K0 * self._E / (9e0 * self._K0 - self._E)
+        return self._G
 
     @property
     def c(self) -> float:
@@ -143,7 +188,9 @@ class Material:
         float
             縦波のの音速[m/s]
         """
-        return self._M.c
+        if self._c is None:
+            self._c = math.sqrt(self._E * 1e9 / self._rho)
+        return self._c
 
     @property
     def c0(self) -> float:
@@ -154,13 +201,17 @@ class Material:
         float
             静的な体積弾性波の音速[m/s]
         """
-        return self._M.c0
+        if self._c0 is None:
+            self._c0 = math.sqrt(self._K0 * 1e9 / self._rho)
+        return self._c0
 
 
 class Target:
     r"""標的の材料特性を定めるクラス。
 
     awcsc.Targetのpython側のラッパー
+
+    パラメータはpython側に保持しており、.NET側のawcsc.TargetはCalcの構築時に必要になった時点で作られる。
     
     Attributes
     ----------
@@ -190,7 +241,12 @@ class Target:
         1/c0[s/m]
     Ginv : float
         1/G[1/Pa]
+    profile : Tuple[np.ndarray, np.ndarray]
+        :any:`set_profile <penepy.material.Target.set_profile>` で設定した深さ[m]と強度[GPa]の表。未設定ならNone
     """
+    __slots__ = ("_rho", "_Y0", "_E", "_K0", "_k", "_Ys", "_ts", "_th", "_G",
+                 "_c", "_c0", "_net", "_profile", "_table")
+
     def __init__(self,
                  M: Material,
                  Ys: float = 0.,
@@ -212,13 +268,55 @@ class Target:
         th : float, optional
             硬化層全体の厚み[m], by default 0.
         """
+        if isinstance(M, Material):
+            p = M.__getstate__()
+        else:
+            p = _fromNetMaterial(M)
+        self._rho, self._Y0, self._E, self._K0, self._k = p
+
         if Ys == 0.:
-            Ys = M._M.Y
+            Ys = self._Y0
+        self._Ys = float(Ys)
+        self._ts = float(ts)
+        self._th = float(th)
+        self._profile = None
+        self._table = None
+        self._invalidate()
             
-        if type(M) == Material:
-            self._T = aw.Target(M._M, float(Ys), float(ts), float(th))
-        else:
-            self._T = aw.Target(M, float(Ys), float(ts), float(th))
+    def _invalidate(self):
+        """パラメータが変更されたので派生量と.NET側のオブジェクトを破棄する"""
+        self._G = None
+        self._c = None
+        self._c0 = None
+        self._net = None
+
+    def __getstate__(self):
+        profile = None
+        if self._profile is not None:
+            profile = tuple(tuple(a.tolist()) for a in self._profile)
+        return (self._rho, self._Y0, self._E, self._K0, self._k, self._Ys,
+                self._ts, self._th, profile)
+
+    def __setstate__(self, state):
+        (self._rho, self._Y0, self._E, self._K0, self._k, self._Ys, self._ts,
+         self._th) = state[:8]
+        self._profile = None
+        self._table = None
+        if len(state) > 8 and state[8] is not None:
+            self.set_profile(*state[8])
+        self._invalidate()
+
+    @property
+    def _T(self) -> aw.Target:
+        """.NET側のawcsc.Target。パラメータ変更後、最初に参照されたときに作り直す"""
+        if self._net is None:
+            M = aw.Material(self._rho, self._Y0, self._E, self._K0, self._k)
+            self._net = aw.Target(M, self._Ys, self._ts, self._th)
+            if self._profile is not None:
+                x, Y = self._profile
+                self._net.set_profile(System.Array[System.Double](x.tolist()),
+                                      System.Array[System.Double](Y.tolist()))
+        return self._net
 
     @property
     def c(self) -> float:
@@ -229,7 +327,9 @@ class Target:
         float
             縦波のの音速[m/s]
         """
-        return self._T.c
+        if self._c is None:
+            self._c = math.sqrt(self._E * 1e9 / self._rho)
+        return self._c
 
     @property
     def c0(self) -> float:
@@ -240,7 +340,9 @@ class Target:
         float
             静的な体積弾性波の音速[m/s]
         """
-        return self._T.c0
+        if self._c0 is None:
+            self._c0 = math.sqrt(self._K0 * 1e9 / self._rho)
+        return self._c0
 
     @property
     def rho(self) -> float:
@@ -251,11 +353,12 @@ class Target:
         float
             密度[ :math:`\mathrm{kg/m^3}` ]
         """
-        return self._T.rho
+        return self._rho
 
     @rho.setter
     def rho(self, v: float):
-        self._T.rho = float(v)
+        self._rho = float(v)
+        self._invalidate()
 
     @property
     def E(self) -> float:
@@ -266,11 +369,12 @@ class Target:
         float
             ヤング率[GPa]
         """
-        return self._T.E * 1e-9
+        return self._E
 
     @E.setter
     def E(self, v: float):
-        self._T.E = float(v)
+        self._E = float(v)
+        self._invalidate()
 
     @property
     def K0(self) -> float:
@@ -281,11 +385,12 @@ class Target:
         float
             静的な体積弾性率[GPa]
         """
-        return self._T.K0 * 1e-9
+        return self._K0
 
     @K0.setter
     def K0(self, v: float):
-        self._T.K0 = float(v)
+        self._K0 = float(v)
+        self._invalidate()
 
     @property
     def k(self) -> float:
@@ -296,11 +401,12 @@ class Target:
         float
             衝撃波速度の粒子速度依存性[-]
         """
-        return self._T.k
+        return self._k
 
     @k.setter
     def k(self, v: float):
-        self._T.k = float(v)
+        self._k = float(v)
+        self._invalidate()
 
     @property
     def G(self) -> float:
@@ -311,7 +417,9 @@ class Target:
         float
             剛性率[GPa]
         """
-        return self._T.G * 1e-9
+        if self._G is None:
+            self._G = 3e0 * self._K0 * self._E / (9e0 * self._K0 - self._E)
+        return self._G
 
     @property
     def Y0(self) -> float:
@@ -322,7 +430,7 @@ class Target:
         float
             降伏強度[GPa]
         """
-        return self._T.Y0 * 1e-9
+        return self._Y0
 
     @Y0.setter
     def Y0(self, v: float):
@@ -333,7 +441,8 @@ class Target:
         v : float
             降伏強度[GPa]
         """
-        self._T.Y0 = float(v)
+        self._Y0 = float(v)
+        self._invalidate()
 
     @property
     def Ys(self) -> float:
@@ -344,7 +453,7 @@ class Target:
         float
             降伏強度[GPa]
         """
-        return self._T.Ys * 1e-9
+        return self._Ys
 
     @Ys.setter
     def Ys(self, v: float):
@@ -355,7 +464,8 @@ class Target:
         v : float
             完全に焼きが入った表面硬化部の降伏強度[GPa]
         """
-        self._T.Ys = float(v)
+        self._Ys = float(v)
+        self._invalidate()
 
     @property
     def ts(self) -> float:
@@ -366,18 +476,26 @@ class Target:
         float
             完全に焼きが入った厚み[m]
         """
-        return self._T.ts
+        return self._ts
 
     @ts.setter
     def ts(self, v: float):
         r"""完全に焼きが入った厚みのセッター
+
+        0 <= ts <= thを満たさない値は設定せずにValueErrorを投げる。
+        tsとthを両方大きくするときはthから設定すること。
         
         Parameters
         ----------
         v : float
             完全に焼きが入った厚み[m]
         """
-        self._T.ts = float(v)
+        if v > self._th:
+            raise ValueError(f"ts should be <= th ({self._th}), got {v}")
+        if v < 0:
+            raise ValueError(f"ts should be >= 0, got {v}")
+        self._ts = float(v)
+        self._invalidate()
 
     @property
     def th(self) -> float:
@@ -388,32 +506,153 @@ class Target:
         float
             硬化層全体の厚み[m]
         """
-        return self._T.th
+        return self._th
 
     @th.setter
     def th(self, v: float):
         r"""硬化層全体の厚み[m]のセッター
+
+        th < tsとなる値は設定せずにValueErrorを投げる。
         
         Parameters
         ----------
         v : float
             硬化層全体の厚み[m]
         """
-        self._T.th = float(v)
+        if v < self._ts:
+            raise ValueError(f"th should be >= ts ({self._ts}), got {v}")
+        self._th = float(v)
+        self._invalidate()
 
     @property
     def c0inv(self) -> float:
-        return self._T.c0inv
+        return 1. / self.c0
 
     @property
     def Ginv(self) -> float:
-        return self._T.Ginv
+        return 1. / (self.G * 1e9)
+
+    @property
+    def profile(self) -> Tuple[np.ndarray, np.ndarray]:
+        r"""set_profileで設定した深さ[m]と強度[GPa]の表
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            深さ[m]と強度[GPa]。未設定ならNone
+        """
+        return self._profile
+
+    def set_profile(self, x: Sequence[float], Y: Sequence[float]) -> "Target":
+        r"""深さごとの強度の表を設定する。
+
+        設定するとYs, ts, thの代わりにこの表から強度を求める(awcsc.Target.set_profile)。
+        表の点の間は線形補間し、範囲外は端の値になる。
+        同じ深さを2回続けて与えると、そこで強度が不連続に変わる。
+        硬さ分布の測定値や積層板に使える。
+
+        .. highlight:: python
+
+        ::
+
+            T.set_profile([0, 0.01, 0.01, 0.03], [1.5, 1.5, 0.8, 0.8])  # 10mmの硬い板の下に20mmの軟らかい板
+
+        表を表の最小間隔ごとのセルに分けて引くので、1回の強度の計算の手間は表の大きさによらない。
+
+        Parameters
+        ----------
+        x : Sequence[float]
+            深さ[m]。単調増加であること
+        Y : Sequence[float]
+            各深さでの強度[GPa]
+
+        Returns
+        -------
+        Target
+            自分自身
+        """
+        x = np.array(x, dtype=np.float64).ravel()
+        Y = np.array(Y, dtype=np.float64).ravel()
+        if len(x) == 0 or len(x) != len(Y):
+            raise ValueError("x and Y should have the same non-zero length")
+        h = np.diff(x)
+        if np.any(h < 0):
+            raise ValueError("x should be non-decreasing")
+        n = len(x)
+        slope = np.zeros(n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope[:-1] = np.where(h > 0, np.diff(Y) / np.where(h > 0, h, 1.), 0.)
+        width = x[-1] - x[0]
+        ncell = 1
+        if width > 0:
+            ncell = int(min(math.ceil(width / h[h > 0].min()), 1 << 20))
+        dx = width / ncell if width > 0 else 1.
+        # awcsc.Target.set_profileと同じく、各セルの始点を含む区間の番号
+        xc = x[0] + np.arange(ncell + 1) * dx
+        cell = np.clip(np.searchsorted(x, xc, side="right") - 1, 0, max(n - 2, 0))
+        self._profile = (x, Y)
+        self._table = (slope, cell, 1. / dx)
+        self._invalidate()
+        return self
+
+    def clear_profile(self) -> "Target":
+        """set_profileで設定した表を消し、Ys, ts, thによる強度分布に戻す
+
+        Returns
+        -------
+        Target
+            自分自身
+        """
+        self._profile = None
+        self._table = None
+        self._invalidate()
+        return self
+
+    def _profile_Y(self, xa: np.ndarray) -> np.ndarray:
+        x, Y = self._profile
+        slope, cell, dxinv = self._table
+        last = len(x) - 1
+        inside = (xa > x[0]) & (xa < x[last])
+        q = np.where(inside, xa, x[0])
+        j = cell[np.minimum(((q - x[0]) * dxinv).astype(np.int64), len(cell) - 1)]
+        while True:
+            step = inside & (x[np.minimum(j + 1, last)] <= q)
+            if not step.any():
+                break
+            j = j + step
+        ret = Y[j] + slope[j] * (q - x[j])
+        return np.where(xa <= x[0], Y[0], np.where(xa >= x[last], Y[last], ret))
 
     def Y(self, x: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
-        if type(x) == float or type(x)==int:
-            return self._T.Y(float(x)) * 1e-9
-        elif type(x) == np.ndarray:
-            return np.array([self._T.Y(float(_)) * 1e-9 for _ in x])
+        r"""深さxにおける標的の強度[GPa]
+
+        awcsc.Target.calc_Yと同じ式をpython側で評価する。
+
+        Parameters
+        ----------
+        x : Union[float, np.ndarray]
+            深さ[m]
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            標的強度[GPa]
+        """
+        Y0, Ys, ts, th = self._Y0, self._Ys, self._ts, self._th
+        xa = np.asarray(x, dtype=np.float64)
+        if self._profile is not None:
+            ret = self._profile_Y(xa)
+        elif (Y0 == Ys) or (ts == 0 and th == 0):
+            ret = np.full(xa.shape, Y0)
+        else:
+            tt = th - ts
+            ret = np.where(
+                xa >= th, Y0,
+                np.where(xa >= ts, -(Ys - Y0) / tt * xa + (Ys * th - Y0 * ts) / tt,
+                         Ys))
+        if np.ndim(x) == 0:
+            return float(ret)
+        return ret
 
 
 class Penetrator:
@@ -421,6 +660,8 @@ class Penetrator:
 
     awcsc.Penetratorのpython側のラッパー
 
+    パラメータはpython側に保持しており、.NET側のawcsc.PenetratorはCalcの構築時に必要になった時点で作られる。
+
     Attributes
     ----------
     rho : float
@@ -468,6 +709,9 @@ class Penetrator:
     cinv : float
         1/c[s/m]
     """
+    __slots__ = ("_rho", "_Y", "_E", "_K0", "_k", "_L", "_D", "_Crh", "_G",
+                 "_c", "_c0", "_l", "_cv", "_theta0", "_m", "_net")
+
     def __init__(self, M: Material, L: float, D: float, Crh: float = 0.5):
         r"""Penetratorのコンストラクタ。
         
@@ -482,10 +726,43 @@ class Penetrator:
         Crh : float, optional
             CRH, by default 0.5
         """
-        if type(M) == Material:
-            self._P = aw.Penetrator(M._M, float(L), float(D), float(Crh))
+        if isinstance(M, Material):
+            p = M.__getstate__()
         else:
-            self._P = aw.Penetrator(M, float(L), float(D), float(Crh))
+            p = _fromNetMaterial(M)
+        self._rho, self._Y, self._E, self._K0, self._k = p
+        self._L = float(L)
+        self._D = float(D)
+        self._Crh = float(Crh)
+        self._invalidate()
+
+    def _invalidate(self):
+        """パラメータが変更されたので派生量と.NET側のオブジェクトを破棄する"""
+        self._G = None
+        self._c = None
+        self._c0 = None
+        self._l = None
+        self._cv = None
+        self._theta0 = None
+        self._m = None
+        self._net = None
+
+    def __getstate__(self):
+        return (self._rho, self._Y, self._E, self._K0, self._k, self._L,
+                self._D, self._Crh)
+
+    def __setstate__(self, state):
+        (self._rho, self._Y, self._E, self._K0, self._k, self._L, self._D,
+         self._Crh) = state
+        self._invalidate()
+
+    @property
+    def _P(self) -> aw.Penetrator:
+        """.NET側のawcsc.Penetrator。パラメータ変更後、最初に参照されたときに作り直す"""
+        if self._net is None:
+            M = aw.Material(self._rho, self._Y, self._E, self._K0, self._k)
+            self._net = aw.Penetrator(M, self._L, self._D, self._Crh)
+        return self._net
 
     @property
     def Crh(self) -> float:
@@ -496,7 +773,7 @@ class Penetrator:
         float
             CRH[-]
         """
-        return self._P.Crh
+        return self._Crh
 
     @Crh.setter
     def Crh(self, v: float):
@@ -507,7 +784,8 @@ class Penetrator:
         v : float
             CRH[-]
         """
-        self._P.Crh = float(v)
+        self._Crh = float(v)
+        self._invalidate()
 
     @property
     def cv(self) -> float:
@@ -521,7 +799,13 @@ class Penetrator:
         float
             cv[-]
         """
-        return self._P.cv
+        if self._cv is None:
+            Crh = self._Crh
+            self._cv = ((4. * Crh * Crh - 4. * Crh / 3. + 1. / 3.) *
+                        math.sqrt(4. * Crh - 1) - 4. * Crh * Crh *
+                        (2. * Crh - 1.) *
+                        math.asin(math.sqrt(4. * Crh - 1.) / Crh * 0.5))
+        return self._cv
 
     @property
     def theta0(self) -> float:
@@ -532,7 +816,9 @@ class Penetrator:
         float
             侵徹体の先端部を半球状に近似したときの侵徹先端部の開き角[rad]
         """
-        return self._P.theta0
+        if self._theta0 is None:
+            self._theta0 = math.asin((2. * self._Crh - 1.) / self._Crh * 0.5)
+        return self._theta0
 
     @property
     def c(self) -> float:
@@ -543,7 +829,9 @@ class Penetrator:
         float
             縦波のの音速[m/s]
         """
-        return self._P.c
+        if self._c is None:
+            self._c = math.sqrt(self._E * 1e9 / self._rho)
+        return self._c
 
     @property
     def c0(self) -> float:
@@ -554,7 +842,9 @@ class Penetrator:
         float
             静的な体積弾性波の音速[m/s]
         """
-        return self._P.c0
+        if self._c0 is None:
+            self._c0 = math.sqrt(self._K0 * 1e9 / self._rho)
+        return self._c0
 
     @property
     def rho(self) -> float:
@@ -565,11 +855,12 @@ class Penetrator:
         float
             密度[ :math:`\mathrm{kg/m^3}` ]
         """
-        return self._P.rho
+        return self._rho
 
     @rho.setter
     def rho(self, v: float):
-        self._P.rho = float(v)
+        self._rho = float(v)
+        self._invalidate()
 
     @property
     def E(self) -> float:
@@ -580,11 +871,12 @@ class Penetrator:
         float
             ヤング率[GPa]
         """
-        return self._P.E * 1e-9
+        return self._E
 
     @E.setter
     def E(self, v: float):
-        self._P.E = float(v)
+        self._E = float(v)
+        self._invalidate()
 
     @property
     def K0(self) -> float:
@@ -595,11 +887,12 @@ class Penetrator:
         float
             静的な体積弾性率[GPa]
         """
-        return self._P.K0 * 1e-9
+        return self._K0
 
     @K0.setter
     def K0(self, v: float):
-        self._P.K0 = float(v)
+        self._K0 = float(v)
+        self._invalidate()
 
     @property
     def k(self) -> float:
@@ -610,11 +903,12 @@ class Penetrator:
         float
             衝撃波速度の粒子速度依存性[-]
         """
-        return self._P.k
+        return self._k
 
     @k.setter
     def k(self, v: float):
-        self._P.k = float(v)
+        self._k = float(v)
+        self._invalidate()
 
     @property
     def G(self) -> float:
@@ -625,7 +919,9 @@ class Penetrator:
         float
             剛性率[GPa]
         """
-        return self._P.G * 1e-9
+        if self._G is None:
+            self._G = 3e0 * self._K0 * self._E / (9e0 * self._K0 - self._E)
+        return self._G
 
     @property
     def Y(self) -> float:
@@ -636,7 +932,7 @@ class Penetrator:
         float
             降伏強度[GPa]
         """
-        return self._P.Y * 1e-9
+        return self._Y
 
     @Y.setter
     def Y(self, v: float):
@@ -647,7 +943,8 @@ class Penetrator:
         v : float
             降伏強度[GPa]
         """
-        self._P.Y = float(v)
+        self._Y = float(v)
+        self._invalidate()
 
     @property
     def L(self) -> float:
@@ -658,7 +955,7 @@ class Penetrator:
         float
             侵徹体長さ[m]
         """
-        return self._P.L
+        return self._L
 
     @L.setter
     def L(self, v: float):
@@ -669,7 +966,8 @@ class Penetrator:
         v : float
             侵徹体長さ[m]
         """
-        self._P.L = float(v)
+        self._L = float(v)
+        self._invalidate()
 
     @property
     def D(self) -> float:
@@ -680,7 +978,7 @@ class Penetrator:
         float
             侵徹体直径[m]
         """
-        return self._P.D
+        return self._D
 
     @D.setter
     def D(self, v: float):
@@ -691,7 +989,8 @@ class Penetrator:
         v : float
             侵徹体直径[m]
         """
-        self._P.D = float(v)
+        self._D = float(v)
+        self._invalidate()
 
     @property
     def LD(self) -> float:
@@ -702,7 +1001,7 @@ class Penetrator:
         float
             L/D比
         """
-        return self._P.LD
+        return self._L / self._D
 
     @property
     def R(self) -> float:
@@ -713,7 +1012,7 @@ class Penetrator:
         float
             侵徹体半径
         """
-        return self._P.R
+        return 0.5 * self._D
 
     @property
     def l(self) -> float:
@@ -724,7 +1023,9 @@ class Penetrator:
         float
             侵徹体先端部の半球状領域の長さ[m]
         """
-        return self._P.l
+        if self._l is None:
+            self._l = self.R * math.sqrt(self._Crh * 4. - 1.)
+        return self._l
 
     @property
     def m(self) -> float:
@@ -737,12 +1038,15 @@ class Penetrator:
         float
             侵徹体の質量[kg]
         """
-        return self._P.m
+        if self._m is None:
+            R = self.R
+            self._m = (self._L - self.l + self.cv * R) * self._rho * R * R * math.pi
+        return self._m
 
     @property
     def c0inv(self) -> float:
-        return self._P.c0inv
+        return 1. / self.c0
 
     @property
     def cinv(self) -> float:
-        return self._P.cinv
\ No newline at end of file
+        return 1. / self.c
@@ -1,81 +1,292 @@
 """"頻繁に使うpenepy.MaterialについてはmaterialPropertyListを準備した。
 
 現在、Al、鉄、WHA、タングステン、劣化ウランについて用意している。
-具体的なパラメーターとして
+具体的なパラメーターはpenepy/materials.csvに記載しており、
 
 .. highlight:: python
 
 ::
 
     Al = Material(2700, 0.443, 72, 78,1.27)
-    iron = Material(7900, 1, 299, 172, 1)
-    WHA = Material(17600, 1, 200, 172, 1.23)
+    iron = Material(7900, 1, 200, 172, 1)
+    WHA = Material(17600, 1, 411, 311, 1.23)
     Tungsten = Material(19.2e3, 1, 411, 311, 1.23)
     W = Material(19.2e3, 1, 411, 311, 1.23) #Tungstenの短縮形
     DU = Material(18.6e3, 1, 193, 104, 1.51)
 
 を用意している。使用する際には
-:: 
+::
 
     iron = penepy.materialPropertyList["iron"]
 
 などとして使うと便利。
+
+手元の材料データはCSV/JSON/TOMLのファイルから一度に読み込める。
+::
+
+    penepy.materialPropertyList.load("armour.csv")
+    recs = penepy.materialPropertyList.query(kind="target", Y=(1, 2))
+    T = recs[0].target()
+
+ファイルの各行(各要素)はname, rho, Y, E, K0, kを持つ必要があり、
+標的として使うものはkind, Ys, ts, thも持てる(単位はMaterial, Targetと同じ)。
 """
 
+import os
+import json
+import numpy as np
+import pandas as pd
+from material import Material, Penetrator, Target
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Union
+
+
+class MaterialRecord(NamedTuple):
+    r"""materialPropertyListに登録された材料のレコード。
+
+    不変なので何度参照してもコピーやCLRオブジェクトの生成は起きない。
+    計算に使うときは :any:`material <penepy.materialList.MaterialRecord.material>` などで変換する。
+
+    Attributes
+    ----------
+    name : str
+        材料名
+    rho : float
+        密度[ :math:`\mathrm{kg/m^3}` ]
+    Y : float
+        降伏強度[GPa]
+    E : float
+        ヤング率[GPa]
+    K0 : float
+        静的な体積弾性率[GPa]
+    k : float
+        衝撃波速度の粒子速度依存性[-]
+    kind : str
+        "target", "penetrator"などの分類。空文字列なら指定なし
+    Ys : float
+        表面硬化領域の降伏強度[GPa]。0ならYと同じ
+    ts : float
+        完全に焼きが入った層の厚み[m]
+    th : float
+        硬化層全体の厚み[m]
+    """
+    name: str
+    rho: float
+    Y: float
+    E: float
+    K0: float
+    k: float
+    kind: str = ""
+    Ys: float = 0.
+    ts: float = 0.
+    th: float = 0.
+
+    def material(self) -> Material:
+        """penepy.Materialに変換する
+
+        Returns
+        -------
+        Material
+            penepy.Material
+        """
+        return Material(self.rho, self.Y, self.E, self.K0, self.k)
+
+    def target(self) -> Target:
+        """表面硬化層の設定も含めてpenepy.Targetに変換する
+
+        Returns
+        -------
+        Target
+            penepy.Target
+        """
+        return Target(self.material(), self.Ys, self.ts, self.th)
+
+    def penetrator(self, L: float, D: float, Crh: float = 0.5) -> Penetrator:
+        """penepy.Penetratorに変換する
+
+        Parameters
+        ----------
+        L : float
+            侵徹体長さ[m]
+        D : float
+            侵徹体直径[m]
+        Crh : float, optional
+            CRH, by default 0.5
+
+        Returns
+        -------
+        Penetrator
+            penepy.Penetrator
+        """
+        return Penetrator(self.material(), L, D, Crh)
+
+
+_numeric = ("rho", "Y", "E", "K0", "k", "Ys", "ts", "th")
+
+
+def _record(name: str, d: Dict[str, Any]) -> MaterialRecord:
+    # CSVの空欄(NaN)は省略されたものとして既定値を使う
+    kw = {
+        k: d[k]
+        for k in MaterialRecord._fields
+        if k in d and k != "name" and not pd.isna(d[k])
+    }
+    for k in _numeric:
+        if k in kw:
+            kw[k] = float(kw[k])
+    if "kind" in kw:
+        kw["kind"] = str(kw["kind"])
+    return MaterialRecord(name=str(name), **kw)
+
+
+def _records(obj: Any) -> List[MaterialRecord]:
+    """JSON/TOMLを読んだ結果をMaterialRecordのリストにする。
 
-from material import Material
-from typing import Dict, List
+    [{"name":..., ...}, ...]のリストか{name: {...}, ...}の辞書、
+    もしくはそれらを"material"のキーに持つ辞書を受け付ける。
+    """
+    if isinstance(obj, dict) and "material" in obj:
+        obj = obj["material"]
+    if isinstance(obj, dict):
+        return [_record(k, v) for k, v in obj.items()]
+    return [_record(d["name"], d) for d in obj]
 
 
 class materialdic(dict):
+    """材料名からMaterialRecordを引く辞書。
+
+    ``materialPropertyList[name]`` は従来通り変更しても元の値に影響しないpenepy.Materialを返す。
+    Materialはpython側にパラメータを保持するだけなので、.NETのオブジェクトは生成されない。
+    レコードそのものは :any:`record <penepy.materialList.materialdic.record>` で取得できる。
+
+    数値の列ごとにソート済みのインデックスを持っており、
+    :any:`query <penepy.materialList.materialdic.query>` による範囲検索は二分探索で行う。
+    インデックスは登録内容が変わった後、最初の検索時に作り直される。
+    """
     def __init__(self):
         dict.__init__(self)
+        self._index = None
+
+    def __getitem__(self, key: str) -> Material:
+        return self.record(key).material()
+
+    def __setitem__(self, key: str, value: Union[Material, MaterialRecord]):
+        if isinstance(value, Material):
+            value = MaterialRecord(key, value.rho, value.Y, value.E,
+                                   value.K0, value.k)
+        elif value.name != key:
+            value = value._replace(name=key)
+        dict.__setitem__(self, key, value)
+        self._index = None
+
+    def __delitem__(self, key: str):
+        dict.__delitem__(self, key)
+        self._index = None
+
+    def record(self, key: str) -> MaterialRecord:
+        """材料名からレコードを取得する
+
+        Parameters
+        ----------
+        key : str
+            材料名
+
+        Returns
+        -------
+        MaterialRecord
+            材料のレコード
+        """
+        return dict.__getitem__(self, key)
+
+    def add(self, records: Iterable[MaterialRecord]):
+        """レコードをまとめて登録する。同名のものは上書きされる
+
+        Parameters
+        ----------
+        records : Iterable[MaterialRecord]
+            登録するレコード
+        """
+        for r in records:
+            dict.__setitem__(self, r.name, r)
+        self._index = None
+
+    def load(self, path: str) -> List[str]:
+        """CSV/JSON/TOMLファイルから材料をまとめて読み込む。
+
+        形式は拡張子(.csv, .json, .toml)で判断する。
+
+        Parameters
+        ----------
+        path : str
+            ファイルのパス
+
+        Returns
+        -------
+        List[str]
+            読み込んだ材料名のリスト
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".csv":
+            df = pd.read_csv(path, skipinitialspace=True)
+            recs = [_record(d["name"], d) for d in df.to_dict("records")]
+        elif ext == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                recs = _records(json.load(f))
+        elif ext == ".toml":
+            try:
+                import tomllib
+            except ImportError:
+                import tomli as tomllib
+            with open(path, "rb") as f:
+                recs = _records(tomllib.load(f))
+        else:
+            raise ValueError(f"{ext} is not supported. use .csv, .json or .toml")
+        self.add(recs)
+        return [r.name for r in recs]
+
+    def _build_index(self):
+        recs = list(dict.values(self))
+        cols = {k: np.array([getattr(r, k) for r in recs]) for k in _numeric}
+        order = {k: np.argsort(v, kind="stable") for k, v in cols.items()}
+        self._index = (recs, {k: (cols[k][order[k]], order[k]) for k in cols})
+
+    def query(self, kind: str = None,
+              **ranges: Tuple[float, float]) -> List[MaterialRecord]:
+        """属性の範囲から材料を検索する。
+
+        ::
+
+            materialPropertyList.query(kind="target", Y=(1, 2), rho=(7000, 8000))
+
+        Parameters
+        ----------
+        kind : str, optional
+            指定するとkindが一致するものだけを返す, by default None
+        **ranges : Tuple[float, float]
+            属性名と(下限, 上限)。両端を含む。片側だけならNoneを入れる
+
+        Returns
+        -------
+        List[MaterialRecord]
+            条件を満たすレコードのリスト
+        """
+        if self._index is None:
+            self._build_index()
+        recs, index = self._index
+        hit = np.ones(len(recs), dtype=bool)
+        for k, (lo, hi) in ranges.items():
+            if k not in index:
+                raise KeyError(f"{k} is not a numeric attribute")
+            v, order = index[k]
+            i0 = 0 if lo is None else np.searchsorted(v, lo, side="left")
+            i1 = len(v) if hi is None else np.searchsorted(v, hi, side="right")
+            m = np.zeros(len(recs), dtype=bool)
+            m[order[i0:i1]] = True
+            hit &= m
+        return [
+            r for r, h in zip(recs, hit) if h and (kind is None or r.kind == kind)
+        ]
+
 
-    def __getitem__(self, key):
-        a = self.get(key)
-        return Material(a.rho, a.Y, a.E, a.K0, a.k)
-
-
-materialPropertyList: Dict[str, Material] = materialdic()
-materialPropertyList["Al"] = Material(**{
-    "rho": float(2700),
-    "E": float(72),
-    "K0": float(78),
-    "k": float(1.27),
-    "Y": float(0.443)
-})
-materialPropertyList["iron"] = Material(**{
-    "rho": float(7900),
-    "E": float(200),
-    "K0": float(172),
-    "k": float(1.),
-    "Y": float(1)
-})
-materialPropertyList["WHA"] = Material(**{
-    "rho": float(17600),
-    "E": float(411),
-    "K0": float(311),
-    "k": float(1.23),
-    "Y": float(1)
-})
-materialPropertyList["Tungsten"] = Material(**{
-    "rho": float(19.2e3),
-    "E": float(411),
-    "K0": float(311),
-    "k": float(1.23),
-    "Y": float(1)
-})
-materialPropertyList["W"] = Material(**{
-    "rho": float(19.2e3),
-    "E": float(411),
-    "K0": float(311),
-    "k": float(1.23),
-    "Y": float(1)
-})
-materialPropertyList["DU"] = Material(**{
-    "rho": float(18.6e3),
-    "E": float(193),
-    "K0": float(104),
-    "k": float(1.51),
-    "Y": float(1)
-})
\ No newline at end of file
+materialPropertyList: materialdic = materialdic()
+materialPropertyList.load(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "materials.csv"))
@@ -0,0 +1,400 @@
+"""材料強度などのばらつきを考慮したDoPの分布をモンテカルロ法で求めるためのモジュール。
+
+.. highlight:: python
+
+::
+
+    MC = penepy.MonteCarlo(penepy.CalcAW, P, T, 2000, {
+        "T.Y0": penepy.Normal(1., 0.05),
+        "P.k": penepy.Uniform(1.2, 1.3),
+        "fit_param[0]": penepy.Normal(0.000287, 2e-5)
+    }, n_jobs=4)
+    MC.run(10000, rtol=1e-3)
+    MC.quantile(0.95), MC.stderr
+    counts, edges = MC.histogram()
+
+サンプルはbatchsizeごとにまとめて評価し、統計量は逐次更新するのでサンプル数によらずメモリ使用量は一定。
+強度の表を設定していないTargetでは、各バッチを :any:`solve_batch <penepy.batch.solve_batch>` で.NET側でまとめて計算する。
+"""
+import numpy as np
+import pandas as pd
+from functools import partial
+from typing import Any, Dict, List, Sequence, Tuple
+from util import makeCalc
+from parallel import SharedResult
+from batch import case_table, columns, models, solve_batch
+
+
+class Normal:
+    """正規分布
+
+    Parameters
+    ----------
+    mean : float
+        平均
+    sd : float
+        標準偏差
+    """
+    def __init__(self, mean: float, sd: float):
+        self.mean = mean
+        self.sd = sd
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.normal(self.mean, self.sd, n)
+
+
+class Uniform:
+    """一様分布
+
+    Parameters
+    ----------
+    low : float
+        下限
+    high : float
+        上限
+    """
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, n)
+
+
+class LogNormal:
+    """対数正規分布。中央値medianと対数の標準偏差sigmaで指定する
+
+    Parameters
+    ----------
+    median : float
+        中央値
+    sigma : float
+        log(x)の標準偏差
+    """
+    def __init__(self, median: float, sigma: float):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.lognormal(np.log(self.median), self.sigma, n)
+
+
+def _draw(dist: Any, rng: np.random.Generator, n: int) -> np.ndarray:
+    """分布からn個のサンプルを得る。
+
+    sample(rng, n)を持つもの、scipy.statsの分布のようにrvs(size, random_state)を持つもの、
+    f(rng, n)の形の関数を受け付ける。
+    """
+    if hasattr(dist, "sample"):
+        return np.asarray(dist.sample(rng, n), dtype=np.float64)
+    if hasattr(dist, "rvs"):
+        return np.asarray(dist.rvs(size=n, random_state=rng), dtype=np.float64)
+    return np.asarray(dist(rng, n), dtype=np.float64)
+
+
+def _evaluate(model, P, T, V0, kwargs, names, row) -> Dict[str, float]:
+    """1つのサンプルについて侵徹終了時の状態を求める。子プロセスから呼べるようにモジュールの関数にしている"""
+    return makeCalc(model, P, T, V0, dict(zip(names, row)), **kwargs).calc_final()
+
+
+class P2Quantile:
+    """P^2アルゴリズム(R. Jain, I. Chlamtac, Commun. ACM 28(1985), pp. 1076-1085)によるquantileの逐次推定。
+
+    サンプルを保持せずに5個のマーカーだけでquantileを推定する。
+
+    Parameters
+    ----------
+    p : float
+        求めるquantile(0 < p < 1)
+    """
+    def __init__(self, p: float):
+        self.p = p
+        self.q: List[float] = []
+        self.n = [0, 1, 2, 3, 4]
+        self.pos = [0., 2. * p, 4. * p, 2. + 2. * p, 4.]
+        self.dn = [0., p / 2., p, (1. + p) / 2., 1.]
+
+    def add(self, x: float):
+        q, n = self.q, self.n
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.pos[i] += self.dn[i]
+        for i in range(1, 4):
+            d = self.pos[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1
+                                                    and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) /
+                    (n[i + 1] - n[i]) + (n[i + 1] - n[i] - d) *
+                    (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    @property
+    def value(self) -> float:
+        """現在のquantileの推定値"""
+        if len(self.q) == 0:
+            return np.nan
+        # 5個まではサンプルがすべて残っているのでそのまま求める
+        if len(self.q) < 5 or self.n[4] <= 4:
+            return float(np.quantile(self.q, self.p))
+        return self.q[2]
+
+
+class MonteCarlo:
+    r"""パラメータのばらつきを考慮した侵徹終了時のDoPの分布を求めるクラス。
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    P : Penetrator
+        基準となるPenetrator
+    T : Target
+        基準となるTarget
+    V0 : float
+        衝突速度[m/s]
+    dists : Dict[str, Any]
+        ばらつかせるパラメータと分布。キーは :any:`makeCalc <penepy.util.makeCalc>` と同じ。
+        分布は :any:`Normal <penepy.montecarlo.Normal>` などの他、scipy.statsの分布やf(rng, n)の関数も使える
+    batchsize : int, optional
+        一度にまとめて評価するサンプル数, by default 256
+    n_jobs : int, optional
+        並列に評価するプロセス数。1ならこのプロセス内で評価する。
+        solve_batchで計算するときは.NET側で同時に計算するサンプル数, by default 1
+    seed : int, optional
+        乱数のシード, by default None
+    quantiles : Sequence[float], optional
+        逐次推定するquantile, by default (0.05, 0.25, 0.5, 0.75, 0.95)
+    bins : int, optional
+        ヒストグラムのビンの数, by default 50
+    hist_range : Tuple[float, float], optional
+        ヒストグラムの範囲[m]。省略すると最初のバッチから決める, by default None
+    **kwargs : Any
+        modelにそのまま渡すキーワード引数(fit_paramなど)
+
+    Attributes
+    ----------
+    n : int
+        評価が成功したサンプル数
+    nfail : int
+        計算に失敗した(DoPがNaNになった)サンプル数
+    mean : float
+        DoPの平均[m]
+    std : float
+        DoPの標準偏差[m]
+    stderr : float
+        平均の標準誤差[m]
+    history : pd.DataFrame
+        バッチごとのn, mean, stderr, quantileの推移。収束の確認用
+
+    Methods
+    -------
+    run(n, rtol=None)
+        サンプルを追加で評価する
+    quantile(p)
+        quantileの推定値
+    histogram()
+        ヒストグラム
+    """
+    def __init__(self,
+                 model: type,
+                 P,
+                 T,
+                 V0: float,
+                 dists: Dict[str, Any],
+                 batchsize: int = 256,
+                 n_jobs: int = 1,
+                 seed: int = None,
+                 quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+                 bins: int = 50,
+                 hist_range: Tuple[float, float] = None,
+                 **kwargs: Any):
+        self.model = model
+        self.P = P
+        self.T = T
+        self.V0 = V0
+        self.dists = dists
+        self.kwargs = kwargs
+        self.batchsize = int(batchsize)
+        self.n_jobs = int(n_jobs)
+        self.rng = np.random.default_rng(seed)
+
+        self.n = 0
+        self.nfail = 0
+        self._mean = 0.
+        self._M2 = 0.
+        self._p2 = {p: P2Quantile(p) for p in quantiles}
+        self.bins = bins
+        self.hist_range = hist_range
+        self._counts = None
+        self._edges = None
+        self._outside = [0, 0]
+        self._history: List[Dict[str, float]] = []
+        self._cases = False
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.n > 0 else np.nan
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self._M2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    @property
+    def stderr(self) -> float:
+        return self.std / np.sqrt(self.n) if self.n > 1 else np.nan
+
+    @property
+    def history(self) -> pd.DataFrame:
+        return pd.DataFrame(self._history)
+
+    def quantile(self, p: float) -> float:
+        """quantileの推定値を返す
+
+        Parameters
+        ----------
+        p : float
+            コンストラクタのquantilesで指定したもの
+
+        Returns
+        -------
+        float
+            DoPのquantile[m]
+        """
+        return self._p2[p].value
+
+    def histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """DoPのヒストグラムを返す。範囲外のサンプル数はoutsideで取得できる
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            度数とビンの境界[m]
+        """
+        return self._counts, self._edges
+
+    @property
+    def outside(self) -> Tuple[int, int]:
+        """ヒストグラムの範囲より小さい、大きいサンプルの数"""
+        return tuple(self._outside)
+
+    def _accumulate(self, x: np.ndarray):
+        ok = np.isfinite(x)
+        self.nfail += int((~ok).sum())
+        x = x[ok]
+        if len(x) == 0:
+            return
+        # バッチの平均、分散をまとめて足し込む(Chanらの方法)
+        nb = len(x)
+        mb = x.mean()
+        M2b = ((x - mb)**2).sum()
+        n = self.n + nb
+        delta = mb - self._mean
+        self._mean += delta * nb / n
+        self._M2 += M2b + delta * delta * self.n * nb / n
+        self.n = n
+
+        for e in self._p2.values():
+            for v in x:
+                e.add(v)
+
+        if self._edges is None:
+            if self.hist_range is None:
+                lo, hi = x.min(), x.max()
+                w = max(hi - lo, 1e-3 * max(abs(hi), 1e-12))
+                self.hist_range = (lo - 0.5 * w, hi + 0.5 * w)
+            self._edges = np.linspace(*self.hist_range, self.bins + 1)
+            self._counts = np.zeros(self.bins, dtype=np.int64)
+        self._counts += np.histogram(x, self._edges)[0]
+        self._outside[0] += int((x < self._edges[0]).sum())
+        self._outside[1] += int((x > self._edges[-1]).sum())
+
+    def _table(self, names: List[str], values: np.ndarray) -> pd.DataFrame:
+        """サンプルをsolve_batchに渡す表にする。表にできない(強度の表があるTarget、表にないパラメータなど)場合はNone"""
+        if self.T.profile is not None or getattr(self.model, "__name__", None) not in models:
+            return None
+        try:
+            base = case_table(self.P, self.T, self.V0, **self.kwargs)
+        except KeyError:
+            return None
+        cases = base.iloc[np.zeros(len(values), dtype=np.int64)].reset_index(drop=True)
+        # makeCalcと同じく、名前の順に上書きする
+        for j, k in enumerate(names):
+            if k == "P.LD":
+                cases["P.L"] = values[:, j] * cases["P.D"].values
+            elif k in columns:
+                cases[k] = values[:, j]
+            else:
+                return None
+        return cases
+
+    def _batch(self, n: int) -> np.ndarray:
+        names = list(self.dists.keys())
+        values = np.column_stack([_draw(self.dists[k], self.rng, n)
+                                  for k in names]) if names else np.empty((n, 0))
+        if self._cases:
+            # 計算に失敗したサンプルはNaNになる
+            return solve_batch(self.model, self._table(names, values), ["DoP"],
+                               self.n_jobs)["DoP"].values
+        # 子プロセスはDoPを共有メモリに直接書き込む。計算に失敗したサンプルはNaNになる
+        self._shared.fill(partial(_evaluate, self.model, self.P, self.T, self.V0, self.kwargs, names),
+                          values, self._executor)
+        return self._shared.values[:n, 0, 0].copy()
+
+    def run(self, n: int, rtol: float = None) -> "MonteCarlo":
+        """サンプルをn個まで追加で評価する。
+
+        Parameters
+        ----------
+        n : int
+            追加で評価するサンプル数の上限
+        rtol : float, optional
+            平均の相対標準誤差stderr/meanがこれを下回ったら打ち切る, by default None
+
+        Returns
+        -------
+        MonteCarlo
+            self
+        """
+        # solve_batchで計算できるかは名前だけで決まるので、空の表で調べる
+        self._cases = self._table(list(self.dists.keys()), np.empty((0, len(self.dists)))) is not None
+        self._shared = SharedResult(self.batchsize, ["DoP"])
+        self._executor = self._shared.executor(
+            self.n_jobs) if self.n_jobs > 1 and not self._cases else None
+        try:
+            done = 0
+            while done < n:
+                nb = min(self.batchsize, n - done)
+                self._accumulate(self._batch(nb))
+                done += nb
+                h = {"n": self.n, "mean": self.mean, "stderr": self.stderr}
+                for p, e in self._p2.items():
+                    h[f"q{p:g}"] = e.value
+                self._history.append(h)
+                if (rtol is not None and self.n > 1
+                        and self.stderr <= rtol * abs(self.mean)):
+                    break
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = None
+        return self
@@ -0,0 +1,277 @@
+r"""質量の制約のもとで、DoPが最大になる侵徹体の設計(材料、L/D、直径、CRH)を探すためのモジュール。
+
+設計変数は範囲を[0, 1]に正規化し、材料ごとに
+
+1. 範囲全体からラテン超方格でn_init点を評価し、最も良い点を出発点にする
+2. 出発点の周りに各変数を±stepずらした点(パターン探索)と、前回のずらした点の差分から求めた勾配方向の点を評価する
+3. 改善すればその点に移り、しなければstepを半分にする
+
+をstepがtolを下回るまで繰り返す(勾配を使うパターン探索)。
+各反復で全材料の候補を1つのバッチにまとめ、:any:`solve_batch <penepy.batch.solve_batch>` で.NET側で並列に評価する。
+一度評価した設計は記憶しておき、再計算しない。
+
+質量が上限を超える設計は、超えた分だけ負の値を評価値とし、制約を満たす設計より必ず悪くなるようにする。
+
+.. highlight:: python
+
+::
+
+    S = penepy.DesignSearch(penepy.CalcAW, T, 1500., ["WHA", "DU"],
+                            {"LD": (5, 30), "D": (0.01, 0.04), "Crh": (0.5, 3)}, mass=5.)
+    S.run()
+    S.best(5)      # DoPが大きい順に5つ
+    S.pareto()     # DoPと質量のパレートフロント
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Sequence, Tuple, Union
+from batch import case_table, solve_batch
+from material import Material, Penetrator
+from materialList import materialPropertyList
+
+#設計変数の名前。L/D、直径[m]、CRH[-]
+_variables = ("LD", "D", "Crh")
+
+
+def _r(x: float) -> float:
+    """記憶のキーが浮動小数点の誤差で変わらないように有効数字12桁に丸める"""
+    return float(f"{x:.12g}")
+
+
+class DesignSearch:
+    r"""質量の制約のもとで侵徹体の設計を探すクラス。
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    T : Target
+        標的
+    V0 : float
+        衝突速度[m/s]
+    materials : Sequence[Union[str, Material]]
+        侵徹体の材料の候補。materialPropertyListの材料名かMaterial
+    bounds : Dict[str, Union[float, Tuple[float, float]]]
+        "LD", "D"[m], "Crh"の(下限, 上限)。値を1つだけ与えると固定する。"Crh"は省略すると0.5で固定
+    mass : float, optional
+        侵徹体の質量の上限[kg]。省略すると制約なし, by default None
+    n_init : int, optional
+        材料ごとに最初に評価する点の数, by default 16
+    seed : int, optional
+        乱数のシード, by default None
+    max_parallel : int, optional
+        同時に計算する候補の数の上限。0なら制限しない, by default 0
+    **kwargs : Any
+        :any:`case_table <penepy.batch.case_table>` に渡す値("dt", "fit_param", "K1", "K2"など)
+
+    Attributes
+    ----------
+    nfev : int
+        実際に計算した設計の数
+    history : pd.DataFrame
+        評価したすべての設計。material, LD, D, Crh, L[m], m[kg], DoP[m], feasibleの列を持つ
+
+    Methods
+    -------
+    run(max_iter=50, tol=1e-3)
+        設計を探す
+    best(n=1)
+        制約を満たす設計をDoPの大きい順に返す
+    pareto()
+        DoPと質量のパレートフロント
+    """
+    def __init__(self,
+                 model: type,
+                 T,
+                 V0: float,
+                 materials: Sequence[Union[str, Material]],
+                 bounds: Dict[str, Union[float, Tuple[float, float]]],
+                 mass: float = None,
+                 n_init: int = 16,
+                 seed: int = None,
+                 max_parallel: int = 0,
+                 **kwargs: Any):
+        self.model = model
+        self.T = T
+        self.V0 = float(V0)
+        self.mass = np.inf if mass is None else float(mass)
+        self.n_init = int(n_init)
+        self.rng = np.random.default_rng(seed)
+        self.max_parallel = max_parallel
+        self.kwargs = kwargs
+
+        self.materials: List[Tuple[str, Material]] = []
+        for i, m in enumerate(materials):
+            if isinstance(m, str):
+                self.materials.append((m, materialPropertyList[m]))
+            else:
+                self.materials.append((f"material[{i}]", m))
+
+        bounds = dict(bounds)
+        bounds.setdefault("Crh", 0.5)
+        for k in ("LD", "D"):
+            if k not in bounds:
+                raise KeyError(f"bounds should have {k}")
+        self.lower = np.array([np.min(bounds[k]) for k in _variables], dtype=np.float64)
+        self.upper = np.array([np.max(bounds[k]) for k in _variables], dtype=np.float64)
+        #範囲に幅がある(固定でない)変数だけを探索する
+        self._free = np.flatnonzero(self.upper > self.lower)
+
+        self._memo: Dict[Tuple, Tuple[float, float]] = {}
+        self._records: List[Dict[str, Any]] = []
+        self.nfev = 0
+
+    def _design(self, u: np.ndarray) -> np.ndarray:
+        """正規化した探索変数uから(LD, D, Crh)を返す"""
+        x = self.lower.copy()
+        x[self._free] += u * (self.upper - self.lower)[self._free]
+        return x
+
+    def _evaluate(self, cands: List[Tuple[int, np.ndarray]]) -> np.ndarray:
+        """(材料の番号, u)の候補をまとめて評価し、評価値を返す。記憶していない候補だけを1回のsolve_batchで計算する"""
+        keys = []
+        new = {}
+        for i, u in cands:
+            x = self._design(u)
+            key = (i, ) + tuple(_r(v) for v in x)
+            keys.append(key)
+            if key not in self._memo and key not in new:
+                new[key] = Penetrator(self.materials[i][1], x[0] * x[1], x[1], x[2])
+        if new:
+            Ps = list(new.values())
+            if self.T.profile is None:
+                cases = case_table(Ps, self.T, self.V0, **self.kwargs)
+                DoP = solve_batch(self.model, cases, ["DoP"], self.max_parallel)["DoP"].values
+            else:
+                # 強度の表を持つTargetはsolve_batchに渡せないので1件ずつ計算する
+                kw = {k: v for k, v in self.kwargs.items() if k != "dt"}
+                DoP = np.array([self.model(P, self.T, self.V0, **kw).calc_final(
+                    self.kwargs.get("dt"))["DoP"] for P in Ps])
+            self.nfev += len(Ps)
+            for (key, P), d in zip(new.items(), DoP):
+                self._memo[key] = (float(d), P.m)
+                self._records.append({
+                    "material": self.materials[key[0]][0],
+                    "LD": key[1],
+                    "D": key[2],
+                    "Crh": key[3],
+                    "L": P.L,
+                    "m": P.m,
+                    "DoP": float(d),
+                    "feasible": P.m <= self.mass,
+                })
+        return np.array([self._score(*self._memo[k]) for k in keys])
+
+    def _score(self, DoP: float, m: float) -> float:
+        if m > self.mass:
+            return -(m - self.mass)
+        return DoP if np.isfinite(DoP) else -np.inf
+
+    def run(self, max_iter: int = 50, tol: float = 1e-3) -> "DesignSearch":
+        """設計を探す。
+
+        Parameters
+        ----------
+        max_iter : int, optional
+            最大反復回数, by default 50
+        tol : float, optional
+            正規化したstepがこれを下回ったら終了, by default 1e-3
+
+        Returns
+        -------
+        DesignSearch
+            self
+        """
+        d = len(self._free)
+        nm = len(self.materials)
+        # ラテン超方格
+        n = self.n_init if d > 0 else 1
+        init = []
+        for i in range(nm):
+            u = (np.argsort(self.rng.random((n, d)), axis=0) + self.rng.random((n, d))) / n
+            init += [(i, uj) for uj in u]
+        f = self._evaluate(init).reshape(nm, n)
+        j = np.argmax(f, axis=1)
+        x = [init[i * n + j[i]][1] for i in range(nm)]
+        fx = f[np.arange(nm), j]
+        if d == 0:
+            return self
+
+        step = np.full(nm, 0.25)
+        grad = [None] * nm
+        for _ in range(max_iter):
+            active = [i for i in range(nm) if step[i] >= tol]
+            if not active:
+                break
+            cands, owner = [], []
+            for i in active:
+                for k in range(d):
+                    for s in (1., -1.):
+                        u = x[i].copy()
+                        u[k] = np.clip(u[k] + s * step[i], 0., 1.)
+                        cands.append((i, u))
+                        owner.append(i)
+                if grad[i] is not None:
+                    cands.append((i, np.clip(x[i] + 2. * step[i] * grad[i], 0., 1.)))
+                    owner.append(i)
+            f = self._evaluate(cands)
+            owner = np.array(owner)
+            for i in active:
+                idx = np.flatnonzero(owner == i)
+                fi = f[idx]
+                poll = fi[:2 * d].reshape(d, 2)
+                du = np.array([cands[j][1] for j in idx[:2 * d]]).reshape(d, 2, d)
+                h = np.array([du[k, 0, k] - du[k, 1, k] for k in range(d)])
+                g = np.where(h > 0, (poll[:, 0] - poll[:, 1]) / np.where(h > 0, h, 1.), 0.)
+                g[~np.isfinite(g)] = 0.
+                n = np.linalg.norm(g)
+                grad[i] = g / n if n > 0 else None
+                j = int(np.argmax(fi))
+                if fi[j] > fx[i]:
+                    x[i] = cands[idx[j]][1]
+                    fx[i] = fi[j]
+                else:
+                    step[i] *= 0.5
+        return self
+
+    @property
+    def history(self) -> pd.DataFrame:
+        return pd.DataFrame(self._records,
+                            columns=["material", "LD", "D", "Crh", "L", "m", "DoP", "feasible"])
+
+    def best(self, n: int = 1) -> pd.DataFrame:
+        """制約を満たす設計をDoPの大きい順に返す
+
+        Parameters
+        ----------
+        n : int, optional
+            返す数, by default 1
+
+        Returns
+        -------
+        pd.DataFrame
+            historyと同じ列を持つ表
+        """
+        h = self.history
+        h = h[h["feasible"] & np.isfinite(h["DoP"])]
+        return h.sort_values("DoP", ascending=False).head(n).reset_index(drop=True)
+
+    def pareto(self) -> pd.DataFrame:
+        """評価した設計のうち、DoPと質量のパレートフロント(より軽くてDoPが大きい設計がないもの)を返す
+
+        質量の上限を超える設計も含む(feasibleの列で区別できる)。
+
+        Returns
+        -------
+        pd.DataFrame
+            historyと同じ列を持ち、質量の小さい順に並べた表
+        """
+        h = self.history
+        h = h[np.isfinite(h["DoP"])].sort_values(["m", "DoP"], ascending=[True, False])
+        keep = []
+        best = -np.inf
+        for i, DoP in zip(h.index, h["DoP"].values):
+            if DoP > best:
+                keep.append(i)
+                best = DoP
+        return h.loc[keep].reset_index(drop=True)
@@ -0,0 +1,267 @@
+r"""並列に計算した結果を、pickleを介さずに共有メモリで受け取るためのモジュール。
+
+ProcessPoolExecutorで計算した結果をそのまま返すと、子プロセスでpickleしてから親プロセスで復元するので、
+細かく記録した計算結果では変換の時間が計算と同じくらいかかる。
+:any:`SharedResult <penepy.parallel.SharedResult>` は(ケース, 行, 値)の配列を共有メモリ上に確保し、
+子プロセスは各ケースの結果を自分の番号の位置に直接書き込む。
+親プロセスは書き込まれた配列をそのまま(コピーせずに)使う。
+
+.. highlight:: python
+
+::
+
+    def history(V0):
+        T, P = penepy.getTandP(*penepy.getMaterials("iron", "WHA"), 0.25, 0.025)
+        return penepy.CalcAW(P, T, V0).calc(1e-7, penepy.LogPolicy(dDoP=1e-3, max_points=500))
+
+    R = penepy.map_shared(history, np.linspace(500, 3000, 26), ["t", "DoP"], rows=500, n_jobs=4)
+    R.values     # shapeが(26, 500, 2)の配列。各ケースの行数はR.count
+    R.frame(3)   # 4番目のケースの結果
+
+子プロセスで呼ぶ関数はpickleできるもの(モジュールの関数やfunctools.partial)にすること。
+"""
+import ctypes
+import multiprocessing
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Callable, List, Mapping, Sequence, Tuple
+
+#子プロセスでinitializerから受け取ったSharedResult
+_shared = None
+
+
+def _init(shared: "SharedResult"):
+    global _shared
+    _shared = shared
+
+
+def _fill(args):
+    """ケースのリストを計算して共有メモリに書き込む。ProcessPoolExecutorから呼べるようにモジュールの関数にしている"""
+    func, cases, start = args
+    failed = _shared._fill(func, cases, start)
+    # .NETの例外などpickleできないものは親プロセスに返せないので、内容を文字列にしておく
+    try:
+        pickle.dumps(failed)
+    except Exception:
+        failed = [(i, RuntimeError(repr(e))) for i, e in failed]
+    return failed
+
+
+class SharedResult:
+    r"""ケースごとに最大rows行、fieldsの値を持つ結果を置く共有メモリ上の配列。
+
+    :any:`executor <penepy.parallel.SharedResult.executor>` で作ったプロセスはこの配列を共有し、
+    :any:`fill <penepy.parallel.SharedResult.fill>` で計算した結果をケースの番号の位置に直接書き込む。
+    共有メモリはこのオブジェクトとvaluesなどから作った配列がすべて不要になったときに解放される。
+    プロセスを作るとき以外にはpickleできない。
+
+    Parameters
+    ----------
+    n : int
+        ケースの数
+    fields : Sequence[str]
+        書き込む値の名前
+    rows : int, optional
+        1ケースあたりの最大の行数, by default 1
+
+    Attributes
+    ----------
+    fields : List[str]
+        値の名前
+    values : np.ndarray
+        shapeが(n, rows, len(fields))の結果。書き込まれていない行はNaN
+    count : np.ndarray
+        各ケースの行数。計算に失敗したケースは0
+    failed : List[int]
+        最後のfillで計算に失敗したケースの番号
+    error : Exception
+        最後のfillで最初に失敗したケースの例外。失敗がなければNone
+    """
+    def __init__(self, n: int, fields: Sequence[str], rows: int = 1):
+        if rows < 1:
+            raise ValueError("rows should be >= 1")
+        self.n = int(n)
+        self.rows = int(rows)
+        self.fields: List[str] = list(fields)
+        self._values = RawArray(ctypes.c_double, max(self.n * self.rows * len(self.fields), 1))
+        self._count = RawArray(ctypes.c_int64, max(self.n, 1))
+        self._n_jobs = 1
+        self.failed: List[int] = []
+        self.error: Exception = None
+        self.values[...] = np.nan
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.frombuffer(self._values, dtype=np.float64)[:self.n * self.rows * len(
+            self.fields)].reshape(self.n, self.rows, len(self.fields))
+
+    @property
+    def count(self) -> np.ndarray:
+        return np.frombuffer(self._count, dtype=np.int64)[:self.n]
+
+    def executor(self, n_jobs: int) -> ProcessPoolExecutor:
+        """この配列を共有するn_jobs個のプロセスを作る
+
+        Parameters
+        ----------
+        n_jobs : int
+            プロセス数
+
+        Returns
+        -------
+        ProcessPoolExecutor
+            fillに渡すExecutor。使い終わったらshutdownすること
+        """
+        self._n_jobs = max(int(n_jobs), 1)
+        # .NETのランタイムを読み込んだプロセスをforkすると子プロセスが落ちるので、spawnで作る
+        return ProcessPoolExecutor(self._n_jobs,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init,
+                                   initargs=(self, ))
+
+    def _write(self, i: int, res: Mapping[str, Any]):
+        cols = [np.atleast_1d(np.asarray(res[f], dtype=np.float64)) for f in self.fields]
+        m = len(cols[0]) if cols else 0
+        if m > self.rows:
+            raise ValueError(f"case {i} has {m} rows, which exceeds rows={self.rows}")
+        v = self.values[i]
+        for j, c in enumerate(cols):
+            v[:m, j] = c
+        self.count[i] = m
+
+    def _fill(self, func: Callable[[Any], Mapping[str, Any]], cases: Sequence[Any],
+              start: int) -> List[Tuple[int, Exception]]:
+        failed = []
+        for i, case in enumerate(cases, start):
+            self.values[i] = np.nan
+            self.count[i] = 0
+            try:
+                res = func(case)
+            except Exception as e:
+                failed.append((i, e))
+                continue
+            self._write(i, res)
+        return failed
+
+    def fill(self,
+             func: Callable[[Any], Mapping[str, Any]],
+             cases: Sequence[Any],
+             executor: ProcessPoolExecutor = None,
+             start: int = 0,
+             errors: str = "warn") -> "SharedResult":
+        """casesの各ケースについてfuncを呼び、結果をstart番目から順に書き込む。
+
+        funcが例外を投げたケースは値がNaN、countが0になり、番号をfailedに、最初の例外をerrorに記録する。
+
+        Parameters
+        ----------
+        func : Callable[[Any], Mapping[str, Any]]
+            ケースを受け取り、fieldsの値を持つ結果(DataFrame、calc_finalの結果など)を返す関数
+        cases : Sequence[Any]
+            ケースのリスト
+        executor : ProcessPoolExecutor, optional
+            :any:`executor <penepy.parallel.SharedResult.executor>` で作ったExecutor。
+            省略するとこのプロセスで計算する, by default None
+        start : int, optional
+            最初のケースを書き込む位置, by default 0
+        errors : str, optional
+            失敗したケースがあったときの扱い。"warn"なら警告を出し、"raise"なら最初の例外を投げ、
+            "ignore"なら記録するだけにする, by default "warn"
+
+        Returns
+        -------
+        SharedResult
+            self
+        """
+        if errors not in ("warn", "raise", "ignore"):
+            raise ValueError(f"errors should be 'warn', 'raise' or 'ignore', got {errors!r}")
+        cases = list(cases)
+        if start < 0 or start + len(cases) > self.n:
+            raise IndexError(f"cases [{start}, {start + len(cases)}) are out of range [0, {self.n})")
+        if executor is None:
+            failed = self._fill(func, cases, start)
+        else:
+            k = max(min(self._n_jobs, len(cases)), 1)
+            bounds = np.linspace(0, len(cases), k + 1).astype(np.int64)
+            args = [(func, cases[a:b], start + a) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+            # 結果は共有メモリに書かれるので、ここでは失敗したケースだけを受け取る
+            failed = [f for r in executor.map(_fill, args) for f in r]
+        self.failed = [i for i, _ in failed]
+        self.error = failed[0][1] if failed else None
+        if failed and errors == "raise":
+            raise self.error
+        if failed and errors == "warn":
+            warnings.warn(f"{len(failed)} of {len(cases)} cases failed (first: case {failed[0][0]}, "
+                          f"{self.error!r})", RuntimeWarning, stacklevel=2)
+        return self
+
+    def frame(self, i: int = None) -> pd.DataFrame:
+        """結果をDataFrameにする。
+
+        1つのケースか、すべてのケースがrows行そろっている場合はコピーせずに共有メモリをそのまま使う。
+        行数の違うケースがあるときは、書き込まれた行だけを集めるのでコピーになる。
+
+        Parameters
+        ----------
+        i : int, optional
+            ケースの番号。省略するとすべてのケースをまとめ、何番目のケースかをcaseの列に入れる, by default None
+
+        Returns
+        -------
+        pd.DataFrame
+            fieldsの列を持つ表
+        """
+        if i is not None:
+            return pd.DataFrame(self.values[i, :self.count[i]], columns=self.fields, copy=False)
+        count = self.count
+        if np.all(count == self.rows):
+            res = pd.DataFrame(self.values.reshape(-1, len(self.fields)),
+                               columns=self.fields, copy=False)
+        else:
+            res = pd.DataFrame(self.values[np.arange(self.rows) < count[:, None]],
+                               columns=self.fields, copy=False)
+        res.insert(0, "case", np.repeat(np.arange(self.n), count))
+        return res
+
+
+def map_shared(func: Callable[[Any], Mapping[str, Any]],
+               cases: Sequence[Any],
+               fields: Sequence[str],
+               rows: int = 1,
+               n_jobs: int = 1,
+               errors: str = "warn") -> SharedResult:
+    """casesの各ケースをn_jobs個のプロセスで計算し、結果を共有メモリで受け取る。
+
+    Parameters
+    ----------
+    func : Callable[[Any], Mapping[str, Any]]
+        ケースを受け取り、fieldsの値を持つ結果を返す関数。pickleできるものにすること
+    cases : Sequence[Any]
+        ケースのリスト
+    fields : Sequence[str]
+        受け取る値の名前
+    rows : int, optional
+        1ケースあたりの最大の行数。LogPolicyのmax_pointsやcalc_VdependentのV_listの長さ, by default 1
+    n_jobs : int, optional
+        並列に計算するプロセス数。1ならこのプロセス内で計算する, by default 1
+    errors : str, optional
+        計算に失敗したケースがあったときの扱い。
+        :any:`fill <penepy.parallel.SharedResult.fill>` を参照, by default "warn"
+
+    Returns
+    -------
+    SharedResult
+        ケースの順に結果を並べたもの
+    """
+    cases = list(cases)
+    shared = SharedResult(len(cases), fields, rows)
+    k = max(min(int(n_jobs), len(cases)), 1)
+    if k == 1:
+        return shared.fill(func, cases, errors=errors)
+    with shared.executor(k) as ex:
+        shared.fill(func, cases, ex, errors=errors)
+    return shared
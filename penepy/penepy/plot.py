@@ -0,0 +1,165 @@
+"""計算結果をDearDeerのグラフと同じキーワードで描くためのモジュール。
+
+x, yには結果の列名(t, u, v, DoP, alpha, Rt, Y, V0など)を半角スペースで区切って与える。
+例えばx="DoP", y="u v"でu, vの侵徹深さ依存性、calc_Vdependentの結果にx="V0", y="DoP"で侵徹深さの速度依存性を描く。
+使えるキーワードはリポジトリ直下の「グラフの軸に使える変数.txt」と同じ。
+
+細かいdt_logで記録した結果は数十万点になるので、各系列を形を保つように
+:any:`lttb <penepy.plot.lttb>` (Largest-Triangle-Three-Buckets)でmax_points点まで間引いてから描く。
+
+.. highlight:: python
+
+::
+
+    res = C.calc(1e-7, 1e-8)
+    penepy.plot(res, x="DoP", y="u v")
+    penepy.plot(C.calc_Vdependent(V_list), x="V0", y="DoP")
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+from typing import Any, Dict, List
+
+#キーワードと軸ラベルに使う単位
+_units: Dict[str, str] = {
+    "t": "ms",
+    "u": "m/s",
+    "v": "m/s",
+    "s": "m",
+    "L": "m",
+    "DoP": "m",
+    "alpha": "-",
+    "Le": "-",
+    "vdot": "m/s2",
+    "udot": "m/s2",
+    "Ldot": "m/s",
+    "sdot": "m/s",
+    "vu_sdot": "1/s2",
+    "alphadot": "1/s",
+    "Rt": "GPa",
+    "Y": "GPa",
+    "V0": "m/s",
+    "m": "kg",
+    "KE": "J",
+    "DoP/L": "-",
+    "Vc": "m3",
+}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets法で、折れ線の形を保つようにn点を選ぶ。
+
+    最初と最後の点は必ず残し、その間をn-2個の区間に分けて、
+    前に選んだ点と次の区間の平均とで作る三角形が最も大きくなる点を区間ごとに1つ選ぶ。
+    ピークや急な変化は残りやすい。
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x座標
+    y : np.ndarray
+        y座標
+    n : int
+        選ぶ点の数。3未満か点の数以上なら間引かない
+
+    Returns
+    -------
+    np.ndarray
+        選んだ点の番号(昇順)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    N = len(x)
+    if n < 3 or n >= N:
+        return np.arange(N)
+    edges = np.linspace(1, N - 1, n - 1).astype(np.int64)
+    idx = np.empty(n, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = N - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+        else:
+            nlo, nhi = N - 1, N
+        cx = x[nlo:nhi].mean()
+        cy = y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def _keys(s: Any) -> List[str]:
+    return s.split() if isinstance(s, str) else list(s)
+
+
+def _label(keys: List[str]) -> str:
+    units = {_units.get(k) for k in keys}
+    if len(units) == 1 and None not in units:
+        return f"{', '.join(keys)} [{units.pop()}]"
+    return ", ".join(f"{k} [{_units[k]}]" if k in _units else k for k in keys)
+
+
+def plot(res: Any,
+         x: str = "t",
+         y: str = "DoP",
+         ax: plt.Axes = None,
+         max_points: int = 4000,
+         **kwargs: Any) -> plt.Axes:
+    """計算結果をキーワードで指定して描く。
+
+    xとyのどちらかが1つならそれを共通に使い、両方複数なら同じ数だけ与えて順に組にする。
+    NaNの点は除いてから間引く。
+
+    Parameters
+    ----------
+    res : Union[pd.DataFrame, Dict[str, np.ndarray]]
+        calc, calc_Vdependentなどの結果
+    x : str, optional
+        x軸の値の名前。半角スペース区切りで複数指定できる, by default "t"
+    y : str, optional
+        y軸の値の名前。半角スペース区切りで複数指定できる, by default "DoP"
+    ax : plt.Axes, optional
+        描くAxes。省略すると新しく作る, by default None
+    max_points : int, optional
+        1系列あたりに描く最大の点の数。0なら間引かない, by default 4000
+    **kwargs : Any
+        ax.plotにそのまま渡すキーワード引数
+
+    Returns
+    -------
+    plt.Axes
+        描いたAxes
+    """
+    xs, ys = _keys(x), _keys(y)
+    if not xs or not ys:
+        raise ValueError("x and y should not be empty")
+    for k in xs + ys:
+        if k not in res:
+            raise KeyError(f"{k} is not in the result. available: {' '.join(res.keys())}")
+    if len(xs) == 1:
+        xs = xs * len(ys)
+    elif len(ys) == 1:
+        ys = ys * len(xs)
+    elif len(xs) != len(ys):
+        raise ValueError("x and y should have the same number of keywords")
+
+    if ax is None:
+        _, ax = plt.subplots()
+    multi = len(set(xs)) > 1 and len(set(ys)) > 1
+    for kx, ky in zip(xs, ys):
+        X = np.asarray(res[kx], dtype=np.float64)
+        Y = np.asarray(res[ky], dtype=np.float64)
+        ok = np.isfinite(X) & np.isfinite(Y)
+        X, Y = X[ok], Y[ok]
+        if max_points:
+            i = lttb(X, Y, max_points)
+            X, Y = X[i], Y[i]
+        label = f"{ky}-{kx}" if multi else (ky if len(set(ys)) > 1 else kx)
+        ax.plot(X, Y, label=label, **kwargs)
+    ax.set_xlabel(_label(list(dict.fromkeys(xs))))
+    ax.set_ylabel(_label(list(dict.fromkeys(ys))))
+    if len(xs) > 1:
+        ax.legend()
+    return ax
@@ -0,0 +1,272 @@
+"""ローカルで計算サービスを立てるためのモジュール。
+
+HTTP(TCPまたはUnixソケット)でJSONのリクエストを受け付ける。
+同じ構成(衝突速度以外が同じ)のリクエストは短い時間窓の間まとめて待ち、
+1回のcalc_Vdependentで計算してから各リクエストに結果を返す。
+構成ごとのCalcは使い回すので、負荷が高いほど1リクエストあたりのコストは下がる。
+
+.. highlight:: python
+
+::
+
+    penepy.serve(port=8765)                   # TCP
+    penepy.serve(path="/tmp/penepy.sock")     # Unixソケット
+
+リクエストは ``POST /calc_Vdependent`` に
+
+.. code-block:: json
+
+    {"model": "CalcAW",
+     "P": {"material": "WHA", "L": 0.25, "D": 0.025},
+     "T": {"material": "iron"},
+     "V0": 1500,
+     "params": {"fit_param[0]": 0.0003}}
+
+のように送る。materialは材料名か{"rho":..., "Y":..., "E":..., "K0":..., "k":...}。
+Pは"Crh"、Tは"Ys", "ts", "th"と、強度の表"profile": {"x": [...], "Y": [...]}も指定できる。paramsは :any:`makeCalc <penepy.util.makeCalc>` 参照。
+V0はリストでもよく、侵徹終了時点の各値を列ごとのリストで返す。
+``GET /stats`` で受け付けたリクエスト数と実際に計算した回数を返す。
+"""
+import asyncio
+import json
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+import aio
+import calc
+from material import Material, Penetrator, Target
+from materialList import materialPropertyList
+from util import makeCalc
+
+_models = ("CalcAW", "CalcAWLV", "CalcAWHVLV", "CalcForrLV", "CalcMBE")
+
+
+def _material(m: Any) -> Material:
+    if isinstance(m, str):
+        return materialPropertyList[m]
+    return Material(m["rho"], m["Y"], m["E"], m["K0"], m["k"])
+
+
+def _config(req: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """リクエストからV0を除いた構成と、それを表すキーを返す"""
+    conf = {k: v for k, v in req.items() if k != "V0"}
+    if conf.get("model") not in _models:
+        raise ValueError(f"model should be one of {_models}")
+    return json.dumps(conf, sort_keys=True), conf
+
+
+def _build(conf: Dict[str, Any], V0: float):
+    p, t = conf["P"], conf["T"]
+    P = Penetrator(_material(p["material"]), p["L"], p["D"], p.get("Crh", 0.5))
+    T = Target(_material(t["material"]), t.get("Ys", 0.), t.get("ts", 0.),
+               t.get("th", 0.))
+    if "profile" in t:
+        T.set_profile(t["profile"]["x"], t["profile"]["Y"])
+    kwargs = dict(conf.get("kwargs", {}))
+    if "fit_param" in kwargs:
+        kwargs["fit_param"] = np.asarray(kwargs["fit_param"], dtype=np.float64)
+    return makeCalc(getattr(calc, conf["model"]), P, T, V0,
+                    conf.get("params", None), **kwargs)
+
+
+class _Batch:
+    def __init__(self, conf: Dict[str, Any]):
+        self.conf = conf
+        self.V: List[float] = []
+        self.futures: List[Tuple[asyncio.Future, List[int]]] = []
+
+
+class CalcServer:
+    r"""マイクロバッチングを行う計算サーバー。
+
+    :any:`submit <penepy.server.CalcServer.submit>` はHTTPを通さずに同じプロセスから使うこともできる。
+
+    Parameters
+    ----------
+    window : float, optional
+        同じ構成のリクエストを待つ時間[s], by default 0.002
+    max_batch : int, optional
+        1回にまとめる衝突速度の最大数。これに達したら時間窓を待たずに計算する, by default 256
+    cache_size : int, optional
+        使い回すCalcの数。古いものから破棄する, by default 64
+
+    Attributes
+    ----------
+    requests : int
+        受け付けたリクエスト数
+    batches : int
+        実際に呼んだcalc_Vdependentの回数
+    """
+    def __init__(self, window: float = 0.002, max_batch: int = 256,
+                 cache_size: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self._pending: Dict[str, _Batch] = {}
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self.requests = 0
+        self.batches = 0
+
+    def _calc(self, key: str, conf: Dict[str, Any], V0: float):
+        C = self._cache.get(key)
+        if C is None:
+            C = _build(conf, V0)
+            self._cache[key] = C
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return C
+
+    async def submit(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        """1件のリクエストを計算する。
+
+        Parameters
+        ----------
+        req : Dict[str, Any]
+            リクエスト。形式はモジュールの説明を参照
+
+        Returns
+        -------
+        Dict[str, Any]
+            侵徹終了時点での各値。V0がスカラーなら値もスカラー
+        """
+        key, conf = _config(req)
+        scalar = np.ndim(req["V0"]) == 0
+        V = [float(v) for v in np.atleast_1d(req["V0"])]
+        self.requests += 1
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch(conf)
+            self._pending[key] = batch
+            loop.call_later(self.window, self._flush, key, batch)
+        idx = []
+        for v in V:
+            if v in batch.V:
+                idx.append(batch.V.index(v))
+            else:
+                idx.append(len(batch.V))
+                batch.V.append(v)
+        batch.futures.append((fut, idx))
+        if len(batch.V) >= self.max_batch:
+            self._flush(key, batch)
+
+        res = await fut
+        if scalar:
+            return {k: v[0] for k, v in res.items()}
+        return res
+
+    def _flush(self, key: str, batch: _Batch):
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key: str, batch: _Batch):
+        try:
+            C = self._calc(key, batch.conf, batch.V[0])
+            self.batches += 1
+            res = await aio.calc_Vdependent_async(C, np.array(batch.V), len(batch.V))
+            cols = {k: res[k].values for k in res.columns}
+        except Exception as e:
+            for fut, _ in batch.futures:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for fut, idx in batch.futures:
+            if not fut.done():
+                fut.set_result({k: v[idx].tolist() for k, v in cols.items()})
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = (await reader.readline()).decode("latin-1").strip()
+                    if not h:
+                        break
+                    k, v = h.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status = 200
+                try:
+                    if method == "POST" and path == "/calc_Vdependent":
+                        out = await self.submit(json.loads(body))
+                    elif method == "GET" and path == "/stats":
+                        out = {"requests": self.requests, "batches": self.batches,
+                               "cached": len(self._cache)}
+                    else:
+                        status, out = 404, {"error": f"{method} {path} not found"}
+                except (KeyError, ValueError, TypeError) as e:
+                    status, out = 400, {"error": repr(e)}
+                except Exception as e:
+                    status, out = 500, {"error": repr(e)}
+
+                data = json.dumps(out).encode("utf-8")
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                          500: "Internal Server Error"}[status]
+                writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                             "Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1")
+                             + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    path: str = None) -> asyncio.AbstractServer:
+        """サーバーを開始する。
+
+        Parameters
+        ----------
+        host : str, optional
+            待ち受けるアドレス, by default "127.0.0.1"
+        port : int, optional
+            ポート番号, by default 8765
+        path : str, optional
+            指定するとTCPではなくこのパスのUnixソケットで待ち受ける, by default None
+
+        Returns
+        -------
+        asyncio.AbstractServer
+            サーバー
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle, path)
+        return await asyncio.start_server(self._handle, host, port)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, path: str = None,
+          **kwargs: Any):
+    """計算サーバーを起動し、止められるまで待ち受ける。
+
+    Parameters
+    ----------
+    host : str, optional
+        待ち受けるアドレス, by default "127.0.0.1"
+    port : int, optional
+        ポート番号, by default 8765
+    path : str, optional
+        指定するとTCPではなくこのパスのUnixソケットで待ち受ける, by default None
+    **kwargs : Any
+        CalcServerのコンストラクタに渡す引数
+    """
+    async def run():
+        server = await CalcServer(**kwargs).start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
@@ -0,0 +1,224 @@
+r"""幾何学的相似則を使って、大きさだけが違う計算を1回の計算の拡大縮小で済ませるためのモジュール。
+
+L/D、CRH、材料、衝突速度が同じで、侵徹体の大きさ(と硬化層の厚みや強度の表の深さ)だけがλ倍の計算は、
+長さと時間をλ倍すれば同じ解になる。
+
+* 長さ(L, s, DoP)と時間tはλ倍
+* 速度(u, v, Ldot, sdot)、alpha、Le、Y、Rtは不変
+* 加速度(udot, vdot)とalphadotは1/λ倍、vu_sdotは1/λ^2倍
+
+ただしCalcAWの終了条件は :math:`|\dot{u}-\dot{u}_0| < 5\times 10^4` という加速度の絶対値を含むため相似にならない。
+そのためCalcAW、CalcAWHVLVは対象外で、そのまま計算する。
+
+.. highlight:: python
+
+::
+
+    S = penepy.SimilarityCache()
+    for D in np.linspace(0.01, 0.05, 20):
+        T, P = penepy.getTandP(mT, mP, 10 * D, D)
+        res = S.calc_Vdependent(penepy.CalcMBE, P, T, V_list)  # 計算は最初の1回だけ
+"""
+import copy
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Tuple
+import calc
+
+_length = ("L", "s", "DoP", "t")
+_inv_length = ("udot", "vdot", "alphadot")
+_inv_length2 = ("vu_sdot", )
+
+
+def _r(x: float) -> float:
+    """L/Dなどの浮動小数点の誤差でキーが変わらないように有効数字12桁に丸める"""
+    return float(f"{x:.12g}")
+
+
+def similarity_key(model: type, P, T, **kwargs: Any) -> Tuple:
+    """相似な計算で一致するキーを返す。相似則が使えないモデルならNone
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    P : Penetrator
+        Penetrator
+    T : Target
+        Target
+    **kwargs : Any
+        modelに渡すキーワード引数
+
+    Returns
+    -------
+    Tuple
+        キー
+    """
+    if model not in (calc.CalcAWLV, calc.CalcForrLV, calc.CalcMBE):
+        return None
+    D = P.D
+    kw = tuple(sorted((k, tuple(np.ravel(v).tolist())) for k, v in kwargs.items()))
+    profile = None
+    if T.profile is not None:
+        x, Y = T.profile
+        profile = (tuple(_r(v / D) for v in x), tuple(_r(v) for v in Y))
+    return (model.__name__, kw,
+            tuple(_r(v) for v in P.__getstate__()[:5]), _r(P.L / D), _r(P.Crh),
+            tuple(_r(v) for v in T.__getstate__()[:6]), _r(T.ts / D), _r(T.th / D),
+            profile)
+
+
+def rescale(res: pd.DataFrame, lam: float) -> pd.DataFrame:
+    """計算結果を長さ方向にlam倍した計算の結果に変換する
+
+    Parameters
+    ----------
+    res : pd.DataFrame
+        calc, calc_Vdependentの結果
+    lam : float
+        倍率
+
+    Returns
+    -------
+    pd.DataFrame
+        変換した結果
+    """
+    res = pd.DataFrame(res).copy()
+    for k in res.columns:
+        if k in _length:
+            res[k] = res[k] * lam
+        elif k in _inv_length:
+            res[k] = res[k] / lam
+        elif k in _inv_length2:
+            res[k] = res[k] / (lam * lam)
+    return res
+
+
+def _log_rows(n: int, dt: float, dt_log: float) -> np.ndarray:
+    """全ステップの記録(n行)から、Calc.calc(dt, dt_log)が記録する行の番号を求める。
+
+    Calc.calcは時刻がdt_logの倍数を超える直前のステップと、侵徹終了時のステップを記録する
+    """
+    # 時刻はCalc.calcと同じく足し合わせて求める。最後は終了条件を満たした(記録されない)ステップ
+    ts = np.concatenate([[0.], np.cumsum(np.full(n, dt))])
+    tl = np.cumsum(np.full(int(ts[-1] / dt_log) + 2, dt_log))
+    i = np.searchsorted(ts, tl, side="left")
+    end = np.argmax(i >= n)
+    return np.concatenate([[0], i[:end] - 1, [n - 1]])
+
+
+class SimilarityCache:
+    """相似な計算を検出して、基準となる計算の結果を拡大縮小して返すクラス。
+
+    相似な構成ごとに最初に計算したものを基準として、以降は基準の結果を変換して返す。
+    calc_VdependentではV0ごとに結果を記憶するので、
+    V_listが一部だけ異なる場合は新しいV0だけを計算する。
+
+    calc_Vdependentは時間ステップが1e-7 sに固定されているため、
+    大きさの違う計算の結果は時間ステップの違い(dt/Dの違い)の分だけ直接計算したものと異なる。
+    calcではdtを基準の大きさに合わせて変換して全ステップを記録しておき、
+    dt_logごとの記録はそこから取り出すので、丸め誤差の範囲で一致し、dt_logだけが違う計算も再計算しない。
+
+    Attributes
+    ----------
+    hits : int
+        記憶していた結果を使った回数
+    misses : int
+        実際に計算した回数
+    """
+    def __init__(self):
+        self._canon: Dict[Tuple, Tuple[Any, Any, Dict[str, Any]]] = {}
+        self._Vdep: Dict[Tuple, Dict[float, pd.DataFrame]] = {}
+        self._calc: Dict[Tuple, pd.DataFrame] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _canonical(self, key: Tuple, P, T, kwargs: Dict[str, Any]):
+        if key not in self._canon:
+            self._canon[key] = (copy.copy(P), copy.copy(T), dict(kwargs))
+        return self._canon[key]
+
+    def calc_Vdependent(self, model: type, P, T, V_list: np.ndarray,
+                        **kwargs: Any) -> pd.DataFrame:
+        """Calc.calc_Vdependentと同じ結果を、相似な計算があればその変換で返す。
+
+        Parameters
+        ----------
+        model : type
+            CalcAWなど、Calcを継承したクラス
+        P : Penetrator
+            Penetrator
+        T : Target
+            Target
+        V_list : np.ndarray
+            衝突速度のリスト[m/s]
+        **kwargs : Any
+            modelに渡すキーワード引数
+
+        Returns
+        -------
+        pd.DataFrame
+            侵徹終了時点での状態
+        """
+        V_list = np.asarray(V_list, dtype=np.float64)
+        key = similarity_key(model, P, T, **kwargs)
+        if key is None:
+            self.misses += 1
+            return model(P, T, V_list[0], **kwargs).calc_Vdependent(V_list)
+        P0, T0, kw0 = self._canonical(key, P, T, kwargs)
+        memo = self._Vdep.setdefault(key, {})
+        new = np.array([V for V in dict.fromkeys(V_list.tolist()) if V not in memo])
+        if len(new) > 0:
+            self.misses += 1
+            res = pd.DataFrame(model(P0, T0, new[0], **kw0).calc_Vdependent(new))
+            for i, V in enumerate(new.tolist()):
+                memo[V] = res.iloc[i:i + 1]
+        else:
+            self.hits += 1
+        res = pd.concat([memo[V] for V in V_list.tolist()], ignore_index=True)
+        return rescale(res, P.D / P0.D)
+
+    def calc(self, model: type, P, T, V0: float, dt: float, dt_log: float,
+             **kwargs: Any) -> pd.DataFrame:
+        """Calc.calcと同じ結果を、相似な計算があればその変換で返す。
+
+        Parameters
+        ----------
+        model : type
+            CalcAWなど、Calcを継承したクラス
+        P : Penetrator
+            Penetrator
+        T : Target
+            Target
+        V0 : float
+            衝突速度[m/s]
+        dt : float
+            計算時間ステップ[s]
+        dt_log : float
+            記録時間ステップ[s]
+        **kwargs : Any
+            modelに渡すキーワード引数
+
+        Returns
+        -------
+        pd.DataFrame
+            侵徹過程の時間変化
+        """
+        key = similarity_key(model, P, T, **kwargs)
+        if key is None:
+            self.misses += 1
+            return model(P, T, V0, **kwargs).calc(dt, dt_log)
+        P0, T0, kw0 = self._canonical(key, P, T, kwargs)
+        lam = P.D / P0.D
+        ckey = key + (float(V0), _r(dt / lam))
+        if ckey not in self._calc:
+            self.misses += 1
+            # dt_logをdtの半分にして全ステップを記録する。同じステップが2回ずつ記録されるので1回にする。
+            # Y, Rtは相似な計算で変わらないので、求めてから保存する
+            res = pd.DataFrame(model(P0, T0, V0, **kw0).calc(dt / lam, 0.5 * dt / lam).resolve(["Y", "Rt"]))
+            self._calc[ckey] = res.drop_duplicates("t", ignore_index=True)
+        else:
+            self.hits += 1
+        res = self._calc[ckey]
+        return rescale(res.iloc[_log_rows(len(res), dt / lam, dt_log / lam)].reset_index(drop=True),
+                       lam)
@@ -0,0 +1,378 @@
+r"""あらかじめ計算した表を補間して、侵徹終了時のDoPなどを即座に返すためのモジュール。
+
+.. highlight:: python
+
+::
+
+    S = penepy.Surrogate.build(penepy.CalcAW, P, T, {
+        "V0": np.linspace(500, 3000, 26),
+        "LD": [5, 10, 20, 30],
+        "rhoP/rhoT": [1, 1.5, 2, 2.5]
+    }, n_jobs=4)
+    S.spot_check(20)
+    S.save("aw.npz")
+
+    S = penepy.Surrogate.load("aw.npz")
+    S(V0=[1200, 1500], LD=12, **{"rhoP/rhoT": 2.2})
+
+軸には :any:`makeCalc <penepy.util.makeCalc>` のパラメータ名の他、次の無次元量を使える。
+
+* "LD" : L/D(Dを固定してLを変える)
+* "rhoP/rhoT" : 密度比(標的の密度を固定して侵徹体の密度を変える)
+* "YT/rhoPV2" : :math:`Y_T/\rho_P V_0^2` (V0と侵徹体密度から標的強度を決める)
+"""
+import pickle
+import numpy as np
+import pandas as pd
+from functools import partial
+from typing import Any, Dict, List, Sequence, Tuple, Union
+from util import makeCalc
+from parallel import map_shared
+import calc
+
+_V_dependent_axes = ("YT/rhoPV2", )
+
+
+def _params(P, T, V0: float, point: Dict[str, float]) -> Tuple[float, Dict[str, float]]:
+    """軸の値をmakeCalcのパラメータに変換する"""
+    params = {}
+    for k, v in point.items():
+        if k == "V0":
+            V0 = v
+        elif k == "LD":
+            params["P.LD"] = v
+        elif k not in ("rhoP/rhoT", ) + _V_dependent_axes:
+            params[k] = v
+    rhoP = P.rho
+    if "rhoP/rhoT" in point:
+        rhoP = point["rhoP/rhoT"] * params.get("T.rho", T.rho)
+        params["P.rho"] = rhoP
+    if "YT/rhoPV2" in point:
+        params["T.Y0"] = point["YT/rhoPV2"] * rhoP * V0 * V0 * 1e-9
+    return V0, params
+
+
+def _output(res: pd.DataFrame, P, params: Dict[str, float], name: str) -> np.ndarray:
+    if name == "DoP/L":
+        L = params.get("P.L", params.get("P.LD", P.LD) * P.D)
+        return res["DoP"].values / L
+    return res[name].values
+
+
+def _solve(model, P, T, V0, kwargs, V_list, outputs, point) -> Dict[str, np.ndarray]:
+    """1つの点を計算し、出力ごとの値を返す。子プロセスから呼べるようにモジュールの関数にしている"""
+    V, params = _params(P, T, V0, point)
+    Vs = np.array([V]) if V_list is None else V_list
+    C = makeCalc(model, P, T, V, params, **kwargs)
+    res = C.calc_Vdependent(Vs)
+    return {o: _output(res, P, params, o) for o in outputs}
+
+
+def _interp(axes: List[np.ndarray], values: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """規則格子上の値valuesを多重線形補間する。
+
+    Parameters
+    ----------
+    axes : List[np.ndarray]
+        各軸の格子点(昇順)
+    values : np.ndarray
+        shapeが(len(axes[0]), ..., len(axes[d-1]), nout)の値
+    q : np.ndarray
+        (n, d)の問い合わせ点
+
+    Returns
+    -------
+    np.ndarray
+        (n, nout)の補間値
+    """
+    n, d = q.shape
+    idx = np.empty((n, d), dtype=np.int64)
+    t = np.empty((n, d))
+    for j, a in enumerate(axes):
+        if len(a) == 1:
+            idx[:, j] = 0
+            t[:, j] = 0.
+            continue
+        i = np.clip(np.searchsorted(a, q[:, j], side="right") - 1, 0, len(a) - 2)
+        idx[:, j] = i
+        t[:, j] = (q[:, j] - a[i]) / (a[i + 1] - a[i])
+    out = np.zeros((n, values.shape[-1]))
+    for corner in range(1 << d):
+        w = np.ones(n)
+        ii = []
+        for j in range(d):
+            bit = (corner >> j) & 1
+            if len(axes[j]) == 1:
+                if bit:
+                    w = w * 0.
+                ii.append(idx[:, j])
+                continue
+            w = w * (t[:, j] if bit else 1. - t[:, j])
+            ii.append(idx[:, j] + bit)
+        if not w.any():
+            continue
+        out += w[:, None] * values[tuple(ii)]
+    return out
+
+
+class Surrogate:
+    r"""モデルの計算結果を格子上に表にしておき、補間で答える代理モデル。
+
+    :any:`build <penepy.surrogate.Surrogate.build>` で作成し、
+    :any:`save <penepy.surrogate.Surrogate.save>` / :any:`load <penepy.surrogate.Surrogate.load>` で保存、読み込みする。
+
+    Attributes
+    ----------
+    names : List[str]
+        軸の名前
+    axes : List[np.ndarray]
+        各軸の格子点
+    outputs : List[str]
+        表にした量。calc_Vdependentの列名と"DoP/L"
+    values : np.ndarray
+        表。shapeは(各軸の点数..., 出力の数)
+    error : Dict[str, float]
+        spot_checkで求めた出力ごとの最大相対誤差。未実施ならNaN
+
+    Methods
+    -------
+    build(model, P, T, axes, ...)
+        表を作る
+    predict(output="DoP", fallback=False, max_error=None, **query)
+        補間した値を返す
+    spot_check(n=20)
+        ランダムな点で実際に計算し、誤差を見積もる
+    save(path), load(path)
+        保存、読み込み
+    """
+    def __init__(self, model: type, P, T, V0: float, names: List[str],
+                 axes: List[np.ndarray], outputs: List[str], values: np.ndarray,
+                 kwargs: Dict[str, Any]):
+        self.model = model
+        self.P = P
+        self.T = T
+        self.V0 = V0
+        self.names = list(names)
+        self.axes = [np.asarray(a, dtype=np.float64) for a in axes]
+        self.outputs = list(outputs)
+        self.values = values
+        self.kwargs = kwargs
+        self.error = {o: np.nan for o in self.outputs}
+
+    @classmethod
+    def build(cls,
+              model: type,
+              P,
+              T,
+              axes: Dict[str, Sequence[float]],
+              outputs: Sequence[str] = ("DoP", ),
+              V0: float = 1000.,
+              n_jobs: int = 1,
+              **kwargs: Any) -> "Surrogate":
+        """格子点すべてで計算し、表を作る。
+
+        V0が軸に含まれる場合、他の軸の値ごとにcalc_Vdependentをまとめて呼ぶ。
+
+        Parameters
+        ----------
+        model : type
+            CalcAWなど、Calcを継承したクラス
+        P : Penetrator
+            基準となるPenetrator。軸にないパラメータはこれの値を使う
+        T : Target
+            基準となるTarget
+        axes : Dict[str, Sequence[float]]
+            軸の名前と格子点。格子点は昇順にすること
+        outputs : Sequence[str], optional
+            表にする量, by default ("DoP", )
+        V0 : float, optional
+            V0が軸にない場合の衝突速度[m/s], by default 1000.
+        n_jobs : int, optional
+            並列に計算するプロセス数, by default 1
+        **kwargs : Any
+            modelにそのまま渡すキーワード引数
+
+        Returns
+        -------
+        Surrogate
+            作成した代理モデル
+        """
+        names = list(axes.keys())
+        grid = [np.asarray(axes[k], dtype=np.float64) for k in names]
+        for k, a in zip(names, grid):
+            if np.any(np.diff(a) <= 0):
+                raise ValueError(f"axis {k} should be strictly increasing")
+        outputs = list(outputs)
+
+        # V0を最後の軸にしてcalc_VdependentでまとめてV0方向を計算する
+        batch_V = "V0" in names and not any(k in names for k in _V_dependent_axes)
+        order = [k for k in names if not (batch_V and k == "V0")]
+        if batch_V:
+            order.append("V0")
+        shape = [len(axes[k]) for k in order]
+        outer = order[:-1] if batch_V else order
+        mesh = np.meshgrid(*[np.asarray(axes[k], dtype=np.float64) for k in outer],
+                           indexing="ij")
+        points = [dict(zip(outer, p)) for p in
+                  zip(*[m.ravel().tolist() for m in mesh])] if outer else [{}]
+        V_list = np.asarray(axes["V0"], dtype=np.float64) if batch_V else None
+
+        # 子プロセスは各点の結果を共有メモリの自分の位置に書き込むので、並べ直しもコピーもいらない
+        per = len(V_list) if batch_V else 1
+        res = map_shared(partial(_solve, model, P, T, V0, kwargs, V_list, outputs),
+                         points, outputs, per, n_jobs)
+        values = res.values.reshape(shape + [len(outputs)])
+        # namesの順に並べ直す
+        values = np.moveaxis(values, [order.index(n) for n in names],
+                             list(range(len(names))))
+        return cls(model, P, T, V0, names, grid, outputs, values, kwargs)
+
+    def _query(self, query: Dict[str, Any]) -> np.ndarray:
+        missing = [k for k in self.names if k not in query]
+        if missing:
+            raise KeyError(f"{missing} are required")
+        cols = np.broadcast_arrays(*[np.atleast_1d(np.asarray(query[k], dtype=np.float64))
+                                     for k in self.names])
+        return np.column_stack([c.ravel() for c in cols])
+
+    def inside(self, **query: Any) -> np.ndarray:
+        """問い合わせ点が表の範囲内か
+
+        Returns
+        -------
+        np.ndarray
+            範囲内ならTrue
+        """
+        q = self._query(query)
+        ok = np.ones(len(q), dtype=bool)
+        for j, a in enumerate(self.axes):
+            ok &= (q[:, j] >= a[0]) & (q[:, j] <= a[-1])
+        return ok
+
+    def solve(self, output: str = "DoP", **query: Any) -> np.ndarray:
+        """表を使わず、モデルで実際に計算する
+
+        Parameters
+        ----------
+        output : str, optional
+            求める量, by default "DoP"
+
+        Returns
+        -------
+        np.ndarray
+            計算結果。計算に失敗した点はNaN
+        """
+        q = self._query(query)
+        points = [dict(zip(self.names, row)) for row in q.tolist()]
+        res = map_shared(partial(_solve, self.model, self.P, self.T, self.V0, self.kwargs, None,
+                                 [output]), points, [output])
+        return res.values[:, 0, 0]
+
+    def predict(self,
+                output: str = "DoP",
+                fallback: bool = False,
+                max_error: float = None,
+                **query: Any) -> np.ndarray:
+        """補間した値を返す。
+
+        Parameters
+        ----------
+        output : str, optional
+            求める量, by default "DoP"
+        fallback : bool, optional
+            Trueなら表の範囲外の点はモデルで計算する, by default False
+        max_error : float, optional
+            spot_checkで見積もった相対誤差がこれを超えていたら(未実施の場合も)、すべての点をモデルで計算する, by default None
+        **query : Any
+            軸の名前と値。配列はブロードキャストされる
+
+        Returns
+        -------
+        np.ndarray
+            補間値。fallbackしない範囲外の点は端の格子から線形に外挿される
+        """
+        j = self.outputs.index(output)
+        q = self._query(query)
+        if max_error is not None and not (self.error[output] <= max_error):
+            return self.solve(output, **query)
+        ret = _interp(self.axes, self.values[..., j:j + 1], q)[:, 0]
+        if fallback:
+            out = ~self.inside(**query)
+            if out.any():
+                sub = {k: q[out, i] for i, k in enumerate(self.names)}
+                ret[out] = self.solve(output, **sub)
+        return ret
+
+    def __call__(self, **query: Any) -> np.ndarray:
+        return self.predict(self.outputs[0], **query)
+
+    def spot_check(self, n: int = 20, seed: int = None) -> Dict[str, float]:
+        """表の範囲内のランダムな点でモデルを計算し、補間の最大相対誤差を見積もる。
+
+        Parameters
+        ----------
+        n : int, optional
+            点の数, by default 20
+        seed : int, optional
+            乱数のシード, by default None
+
+        Returns
+        -------
+        Dict[str, float]
+            出力ごとの最大相対誤差。errorにも保存される
+        """
+        rng = np.random.default_rng(seed)
+        q = {k: rng.uniform(a[0], a[-1], n) for k, a in zip(self.names, self.axes)}
+        for o in self.outputs:
+            exact = self.solve(o, **q)
+            approx = self.predict(o, **q)
+            ok = np.isfinite(exact) & np.isfinite(approx)
+            scale = np.maximum(np.abs(exact[ok]), 1e-12)
+            self.error[o] = float(np.max(np.abs(approx[ok] - exact[ok]) / scale)) \
+                if ok.any() else np.nan
+        return dict(self.error)
+
+    def save(self, path: str):
+        """表をnpzファイルに保存する
+
+        Parameters
+        ----------
+        path : str
+            保存先
+        """
+        d = {f"axis_{i}": a for i, a in enumerate(self.axes)}
+        meta = {
+            "model": self.model.__name__,
+            "names": self.names,
+            "outputs": self.outputs,
+            "V0": self.V0,
+            "error": self.error,
+            "kwargs": self.kwargs,
+            "P": self.P,
+            "T": self.T
+        }
+        np.savez(path, values=self.values,
+                 meta=np.frombuffer(pickle.dumps(meta), dtype=np.uint8), **d)
+
+    @classmethod
+    def load(cls, path: str) -> "Surrogate":
+        """saveで保存した表を読み込む
+
+        Parameters
+        ----------
+        path : str
+            npzファイルのパス
+
+        Returns
+        -------
+        Surrogate
+            読み込んだ代理モデル
+        """
+        with np.load(path) as f:
+            meta = pickle.loads(f["meta"].tobytes())
+            axes = [f[f"axis_{i}"] for i in range(len(meta["names"]))]
+            values = f["values"]
+        S = cls(getattr(calc, meta["model"]), meta["P"], meta["T"], meta["V0"],
+                meta["names"], axes, meta["outputs"], values, meta["kwargs"])
+        S.error = meta["error"]
+        return S
@@ -0,0 +1,244 @@
+"""長時間のパラメータスイープをチェックポイント付きで実行するためのモジュール。
+
+パラメータ点のリストとチャンクごとの完了状況をmanifestとして作業ディレクトリに記録し、
+計算結果はチャンクごとに逐次書き出す。
+途中でプロセスが落ちても同じ作業ディレクトリで再実行すれば、完了済みのチャンクは飛ばして続きから計算する。
+
+.. highlight:: python
+
+::
+
+    def build(mT, mP, L, D):
+        T, P = penepy.getTandP(*penepy.getMaterials(mT, mP), L, D)
+        return penepy.CalcAW(P, T, 2000)
+
+    points = [{"mT": "iron", "mP": "WHA", "L": L, "D": 0.025}
+              for L in np.linspace(0.1, 1, 100)]
+    S = penepy.SweepRunner("sweep_dir", points,
+                           penepy.Vdependent_task(build, np.linspace(500, 3000)))
+    res = S.run()
+"""
+import os
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List
+
+
+def _jsonable(v: Any) -> Any:
+    """manifestに書き出せるようにnumpyの値をpythonの値に変換する"""
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, np.ndarray):
+        return v.tolist()
+    raise TypeError(f"{type(v)} はmanifestに記録できません")
+
+
+def _atomic_write(path: str, data: bytes):
+    """書き込み途中で落ちても壊れたファイルが残らないように一時ファイル経由で書き出す"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def Vdependent_task(build: Callable[..., Any],
+                    V_list: np.ndarray) -> Callable[[Dict[str, Any]], pd.DataFrame]:
+    """各パラメータ点でcalc_Vdependentを行う、SweepRunner用の関数を作る。
+
+    Parameters
+    ----------
+    build : Callable[..., Calc]
+        パラメータ点の辞書をキーワード引数として受け取り、Calcを継承したクラスを返す関数
+    V_list : np.ndarray
+        衝突速度のリスト[m/s]
+
+    Returns
+    -------
+    Callable[[Dict[str, Any]], pd.DataFrame]
+        パラメータ点を受け取り、calc_Vdependentの結果にパラメータ点の値を列として加えたDataFrameを返す関数
+    """
+    V_list = np.asarray(V_list, dtype=np.float64)
+
+    def task(point: Dict[str, Any]) -> pd.DataFrame:
+        res = pd.DataFrame(build(**point).calc_Vdependent(V_list))
+        for k, v in point.items():
+            res[k] = v
+        return res
+
+    return task
+
+
+class SweepRunner:
+    r"""チェックポイント付きで再開可能なパラメータスイープ
+
+    作業ディレクトリには
+
+    * manifest.json : パラメータ点、チャンクサイズ、完了したチャンクの一覧
+    * chunk_xxxxx.pickle : 各チャンクの計算結果(pd.DataFrame)
+
+    が保存される。
+    同じ作業ディレクトリ、同じパラメータ点で再度 :any:`run <penepy.sweep.SweepRunner.run>` を呼ぶと、
+    完了済みのチャンクは計算せずに読み込むだけになる。
+
+    Parameters
+    ----------
+    path : str
+        作業ディレクトリ。存在しなければ作成する
+    points : List[Dict[str, Any]]
+        パラメータ点のリスト。manifestにJSONとして記録するので値は数値か文字列にすること
+    func : Callable[[Dict[str, Any]], pd.DataFrame]
+        パラメータ点を受け取って計算結果を返す関数。 :any:`Vdependent_task <penepy.sweep.Vdependent_task>` 参照
+    chunksize : int, optional
+        1チャンクに含めるパラメータ点の数。チャンクごとに結果を書き出す, by default 1
+
+    Attributes
+    ----------
+    points : List[Dict[str, Any]]
+        パラメータ点のリスト
+    chunks : List[Dict[str, Any]]
+        各チャンクの範囲、結果ファイル名、完了状態
+
+    Methods
+    -------
+    run()
+        未完了のチャンクを計算し、全体の結果を返す
+    result()
+        完了済みのチャンクの結果をまとめて返す
+    """
+    manifest_name = "manifest.json"
+
+    def __init__(self,
+                 path: str,
+                 points: List[Dict[str, Any]],
+                 func: Callable[[Dict[str, Any]], pd.DataFrame],
+                 chunksize: int = 1):
+        if chunksize < 1:
+            raise ValueError("chunksize should be >= 1")
+        self.path = path
+        self.func = func
+        self.chunksize = int(chunksize)
+        # JSONを一度通しておくとmanifestから読んだものと比較できる
+        self.points = json.loads(json.dumps(list(points), default=_jsonable))
+        os.makedirs(path, exist_ok=True)
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            self.chunks = [{
+                "start": s,
+                "stop": min(s + self.chunksize, len(self.points)),
+                "file": f"chunk_{i:05d}.pickle",
+                "done": False
+            } for i, s in enumerate(range(0, len(self.points), self.chunksize))]
+            self._write_manifest()
+        else:
+            if (manifest["points"] != self.points
+                    or manifest["chunksize"] != self.chunksize):
+                raise ValueError(
+                    f"{self.manifest_path} のパラメータ点またはchunksizeが一致しません。"
+                    "別の作業ディレクトリを指定してください")
+            self.chunks = manifest["chunks"]
+            for c in self.chunks:
+                # manifest更新前に落ちた場合などに備えて結果ファイルの有無も確認する
+                if c["done"] and not os.path.exists(self._chunk_path(c)):
+                    c["done"] = False
+
+    @property
+    def manifest_path(self) -> str:
+        """manifestのパス"""
+        return os.path.join(self.path, self.manifest_name)
+
+    @property
+    def done(self) -> int:
+        """完了済みのチャンク数"""
+        return sum(c["done"] for c in self.chunks)
+
+    @property
+    def total(self) -> int:
+        """チャンクの総数"""
+        return len(self.chunks)
+
+    def _chunk_path(self, c: Dict[str, Any]) -> str:
+        return os.path.join(self.path, c["file"])
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        manifest = {
+            "chunksize": self.chunksize,
+            "points": self.points,
+            "chunks": self.chunks
+        }
+        _atomic_write(self.manifest_path,
+                      json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+    def run_chunk(self, i: int) -> pd.DataFrame:
+        """i番目のチャンクを計算して結果を書き出す。
+
+        Parameters
+        ----------
+        i : int
+            チャンクの番号
+
+        Returns
+        -------
+        pd.DataFrame
+            チャンクの計算結果。pointの列に何番目のパラメータ点かが入っている
+        """
+        c = self.chunks[i]
+        lst = []
+        for j in range(c["start"], c["stop"]):
+            r = pd.DataFrame(self.func(self.points[j]))
+            r.insert(0, "point", j)
+            lst.append(r)
+        res = pd.concat(lst, ignore_index=True)
+        _atomic_write(self._chunk_path(c),
+                      pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL))
+        c["done"] = True
+        self._write_manifest()
+        return res
+
+    def run(self, verbose: bool = False) -> pd.DataFrame:
+        """未完了のチャンクを順に計算し、全体の結果を返す。
+
+        Parameters
+        ----------
+        verbose : bool, optional
+            チャンクが終わるごとに進捗を表示する, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            全パラメータ点の計算結果
+        """
+        for i, c in enumerate(self.chunks):
+            if c["done"]:
+                continue
+            self.run_chunk(i)
+            if verbose:
+                print(f"{self.done}/{self.total}")
+        return self.result()
+
+    def result(self) -> pd.DataFrame:
+        """完了済みのチャンクの結果をまとめて返す。
+
+        Returns
+        -------
+        pd.DataFrame
+            完了済みのチャンクの計算結果
+        """
+        lst = []
+        for c in self.chunks:
+            if c["done"]:
+                with open(self._chunk_path(c), "rb") as f:
+                    lst.append(pickle.load(f))
+        if len(lst) == 0:
+            return pd.DataFrame()
+        return pd.concat(lst, ignore_index=True)
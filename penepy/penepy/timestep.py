@@ -0,0 +1,235 @@
+r"""計算時間ステップdtを収束性から決めるためのモジュール。
+
+dtを半分ずつにしながら侵徹終了時のDoPとLeを計算し、Richardsonの補外で誤差を見積もって、
+許容誤差を満たす最も粗いdtを選ぶ。
+dt=dt_0/2^kでの値をQ_kとすると、収束次数pと誤差は
+
+.. math::
+
+    p = \log_2 \left| \frac{Q_k - Q_{k+1}}{Q_{k+1} - Q_{k+2}} \right|, \quad
+    |Q_k - Q_\infty| \approx \frac{|Q_k - Q_{k+1}|}{1 - 2^{-p}}
+
+で見積もる(pは0.5から4の範囲に丸める)。
+
+モデルと衝突速度の範囲ごとに選んだdtは :any:`dt_table <penepy.timestep.dt_table>` に登録しておくと、
+dtを指定しないcalc_Vdependent、calc_finalが自動で使う。登録がなければ従来通り1e-7 s。
+
+.. highlight:: python
+
+::
+
+    dt, hist = penepy.select_dt(penepy.CalcAW, P, T, 1500., tol_DoP=1e-3)
+    penepy.dt_table.build(penepy.CalcAW, P, T, [500, 1000, 2000, 3000, 5000])
+    penepy.dt_table.save("dt.json")
+    penepy.dt_table.load("dt.json") # 次回以降
+    res = C.calc_Vdependent(V_list) # 登録したdtで計算される
+"""
+import json
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Sequence, Tuple, Union
+from util import makeCalc
+
+#dt_tableに登録がない場合のdt[s]
+DEFAULT_DT = 1e-7
+
+
+def _errors(Q: Sequence[float]) -> Tuple[float, float]:
+    """Q_0, Q_1, Q_2からQ_0の誤差と補外値を見積もる"""
+    d0 = Q[0] - Q[1]
+    d1 = Q[1] - Q[2]
+    if d0 == 0.:
+        return 0., Q[2]
+    if d1 == 0.:
+        p = 4.
+    else:
+        p = float(np.clip(np.log2(abs(d0 / d1)), 0.5, 4.))
+    return abs(d0) / (1. - 2.**-p), Q[2] - d1 / (2.**p - 1.)
+
+
+def select_dt(model: type,
+              P,
+              T,
+              V0: float,
+              tol_DoP: float = 1e-3,
+              tol_Le: float = 1e-2,
+              dt0: float = 1e-6,
+              max_halving: int = 6,
+              params: Dict[str, float] = None,
+              **kwargs: Any) -> Tuple[float, pd.DataFrame]:
+    """dtを半分ずつにしながら計算し、許容誤差を満たす最も粗いdtを返す。
+
+    満たすものがなければ最も細かいdtを返す(histのerr_DoP, err_Leで確認できる)。
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    P : Penetrator
+        Penetrator
+    T : Target
+        Target
+    V0 : float
+        衝突速度[m/s]
+    tol_DoP : float, optional
+        侵徹終了時のDoPの相対誤差の許容値, by default 1e-3
+    tol_Le : float, optional
+        侵徹終了時のLe(侵徹体消耗率)の誤差の許容値, by default 1e-2
+    dt0 : float, optional
+        最初に試すdt[s], by default 1e-6
+    max_halving : int, optional
+        dtを半分にする最大回数, by default 6
+    params : Dict[str, float], optional
+        P, Tなどを変更するパラメータ。:any:`makeCalc <penepy.util.makeCalc>` 参照, by default None
+    **kwargs : Any
+        modelにそのまま渡すキーワード引数
+
+    Returns
+    -------
+    Tuple[float, pd.DataFrame]
+        選んだdt[s]と、各dtでのDoP, Leとその誤差の見積もり
+    """
+    C = makeCalc(model, P, T, V0, params, **kwargs)
+    dts, DoP, Le = [], [], []
+    err_DoP, err_Le = [], []
+    chosen = None
+    for k in range(max_halving + 1):
+        dt = dt0 / 2**k
+        r = C.calc_final(dt)
+        dts.append(dt)
+        DoP.append(r["DoP"])
+        Le.append(r["Le"])
+        if k >= 2:
+            eD, D_inf = _errors(DoP[-3:])
+            eL, _ = _errors(Le[-3:])
+            eD = eD / abs(D_inf) if D_inf != 0 else np.inf
+            err_DoP.append(eD)
+            err_Le.append(eL)
+            if chosen is None and eD <= tol_DoP and eL <= tol_Le:
+                chosen = dts[-3]
+                break
+    hist = pd.DataFrame({"dt": dts, "DoP": DoP, "Le": Le})
+    n = len(err_DoP)
+    hist["err_DoP"] = err_DoP + [np.nan] * (len(hist) - n)
+    hist["err_Le"] = err_Le + [np.nan] * (len(hist) - n)
+    return (dts[-1] if chosen is None else chosen), hist
+
+
+def _name(model: Union[type, str]) -> str:
+    return model if isinstance(model, str) else model.__name__
+
+
+class DtTable:
+    """モデルと衝突速度の範囲ごとのdtの表。
+
+    範囲外の衝突速度には最も近い範囲のdtを使う。
+    """
+    def __init__(self):
+        self._table = {}
+
+    def set(self, model: Union[type, str], Vmin: float, Vmax: float, dt: float):
+        """Vmin <= V0 < VmaxでのdtをVmin, Vmaxの範囲について登録する
+
+        Parameters
+        ----------
+        model : Union[type, str]
+            CalcAWなど、Calcを継承したクラスかその名前
+        Vmin : float
+            衝突速度の下限[m/s]
+        Vmax : float
+            衝突速度の上限[m/s]
+        dt : float
+            計算時間ステップ[s]
+        """
+        bands = [b for b in self._table.get(_name(model), []) if b[0] != Vmin]
+        bands.append((float(Vmin), float(Vmax), float(dt)))
+        self._table[_name(model)] = sorted(bands)
+
+    def get(self, model: Union[type, str], V0: Union[float, Sequence[float]]) -> np.ndarray:
+        """衝突速度ごとのdtを返す。modelの登録がなければNone
+
+        Parameters
+        ----------
+        model : Union[type, str]
+            CalcAWなど、Calcを継承したクラスかその名前
+        V0 : Union[float, Sequence[float]]
+            衝突速度[m/s]
+
+        Returns
+        -------
+        np.ndarray
+            各衝突速度でのdt[s]
+        """
+        bands = self._table.get(_name(model))
+        if not bands:
+            return None
+        lo = np.array([b[0] for b in bands])
+        dt = np.array([b[2] for b in bands])
+        i = np.clip(np.searchsorted(lo, np.atleast_1d(V0), side="right") - 1, 0, len(bands) - 1)
+        return dt[i]
+
+    def build(self,
+              model: type,
+              P,
+              T,
+              edges: Sequence[float],
+              **kwargs: Any) -> pd.DataFrame:
+        """隣り合うedgesの範囲ごとに、両端の衝突速度でselect_dtを行い、細かい方のdtを登録する。
+
+        Parameters
+        ----------
+        model : type
+            CalcAWなど、Calcを継承したクラス
+        P : Penetrator
+            Penetrator
+        T : Target
+            Target
+        edges : Sequence[float]
+            範囲の境界となる衝突速度[m/s]
+        **kwargs : Any
+            select_dtにそのまま渡すキーワード引数
+
+        Returns
+        -------
+        pd.DataFrame
+            登録した範囲とdt
+        """
+        edges = [float(V) for V in edges]
+        rows = []
+        for Vmin, Vmax in zip(edges[:-1], edges[1:]):
+            dt = min(select_dt(model, P, T, V, **dict(kwargs))[0]
+                     for V in (Vmin, Vmax) if V > 0)
+            self.set(model, Vmin, Vmax, dt)
+            rows.append((_name(model), Vmin, Vmax, dt))
+        return pd.DataFrame(rows, columns=["model", "Vmin", "Vmax", "dt"])
+
+    def clear(self, model: Union[type, str] = None):
+        """登録を消す。modelを省略するとすべて消す"""
+        if model is None:
+            self._table.clear()
+        else:
+            self._table.pop(_name(model), None)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """登録されている表"""
+        rows = [(m, *b) for m, bands in self._table.items() for b in bands]
+        return pd.DataFrame(rows, columns=["model", "Vmin", "Vmax", "dt"])
+
+    def save(self, path: str):
+        """表をjsonで保存する"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({m: [list(b) for b in bands] for m, bands in self._table.items()},
+                      f, indent=2)
+
+    def load(self, path: str):
+        """saveで保存した表を読み込み、登録に加える"""
+        with open(path, encoding="utf-8") as f:
+            for m, bands in json.load(f).items():
+                for b in bands:
+                    self.set(m, *b)
+
+
+#calc_Vdependent、calc_finalがdtを指定されなかったときに使う表
+dt_table: DtTable = DtTable()
+
@@ -0,0 +1,201 @@
+r"""calcの結果を補間して、記録していない時刻、深さでの状態を求めるためのモジュール。
+
+:any:`Calc.calc <penepy.calc.Calc.calc>` の結果は :any:`Trajectory <penepy.trajectory.Trajectory>` で返ってくる。
+記録点の間は、微分も記録されている値(DoP, u, v, L, s, alpha)は3次のエルミート補間、それ以外は線形補間で求める。
+
+.. highlight:: python
+
+::
+
+    res = C.calc_dense()                            # 補間用に変化に応じて記録する
+    res.at(t=np.linspace(0, res["t"].max(), 1000))  # t[ms]
+    res.at(DoP=[0.05, 0.1])                         # DoP[m]
+
+記録点は :any:`LogPolicy <penepy.calc.LogPolicy>` で変化の大きいところだけを細かくとるとよい。
+dt_logで記録した結果でも使えるが、補間の精度は記録点の間隔で決まる。
+
+記録した値から求められる値(Y, Rt, KEなど)は積分中には記録せず、最初に参照したときに全点まとめて求めて列に加える。
+
+::
+
+    res = C.calc(1e-7, 1e-6)
+    "KE" in res        # True。まだ列にはない
+    res["KE"]          # ここで求めて列に加える。2回目以降は列をそのまま返す
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List
+
+#値と、その時間微分[1/s]を記録している値の組
+_derivative: Dict[str, str] = {
+    "DoP": "u",
+    "u": "udot",
+    "v": "vdot",
+    "L": "Ldot",
+    "s": "sdot",
+    "alpha": "alphadot",
+}
+
+
+class Trajectory(pd.DataFrame):
+    """calcの結果。pd.DataFrameとして使え、atで記録点の間の状態を補間できる。
+
+    deriveで登録した値は、列になくても res["KE"] のように参照でき、最初に参照したときに求めて列に加える。
+    pickleするときは登録した値をすべて求めてから保存する。
+    """
+    _metadata = ["_derived"]
+    _derived: Dict[str, Callable[["Trajectory"], np.ndarray]] = None
+
+    @property
+    def _constructor(self):
+        return Trajectory
+
+    def derive(self, channels: Dict[str, Callable[["Trajectory"], np.ndarray]]) -> "Trajectory":
+        """記録した値から求める値を登録する。すでに列にある値は登録しない
+
+        Parameters
+        ----------
+        channels : Dict[str, Callable[[Trajectory], np.ndarray]]
+            値の名前と、結果を受け取って全点の値を返す関数
+
+        Returns
+        -------
+        Trajectory
+            自分自身
+        """
+        d = dict(self._derived or {})
+        d.update((k, f) for k, f in channels.items() if k not in self.columns)
+        self._derived = d
+        return self
+
+    @property
+    def derived(self) -> List[str]:
+        """登録されていて、まだ求めていない値の名前"""
+        return [k for k in (self._derived or {}) if k not in self.columns]
+
+    def resolve(self, names: List[str] = None) -> "Trajectory":
+        """登録した値を求めて列に加える
+
+        Parameters
+        ----------
+        names : List[str], optional
+            求める値の名前。省略するとまだ求めていないすべて, by default None
+
+        Returns
+        -------
+        Trajectory
+            自分自身
+        """
+        for k in self.derived if names is None else names:
+            self._resolve(k)
+        return self
+
+    def _resolve(self, key: Any):
+        if (isinstance(key, str) and self._derived and key in self._derived
+                and key not in self.columns):
+            self[key] = self._derived[key](self)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            self._resolve(key)
+        elif isinstance(key, list):
+            for k in key:
+                self._resolve(k)
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or (isinstance(key, str) and key in (self._derived or {}))
+
+    def __getstate__(self):
+        # 登録した関数は.NETのCalcを参照するのでpickleできない。値を求めて列として保存する
+        self.resolve()
+        state = super().__getstate__()
+        state["_derived"] = None
+        return state
+
+    def _locate(self, t: np.ndarray):
+        """tを含む区間の番号と、区間内の位置[0, 1]、区間の長さ[s]を返す"""
+        T = self["t"].values
+        i = np.clip(np.searchsorted(T, t, side="right") - 1, 0, len(T) - 2)
+        h = T[i + 1] - T[i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = np.where(h > 0, (t - T[i]) / h, 1.)
+        return i, x, h * 1e-3
+
+    def _hermite(self, k: str, i: np.ndarray, x: np.ndarray,
+                 h: np.ndarray) -> np.ndarray:
+        y = self[k].values
+        d = _derivative.get(k)
+        if d is None or d not in self:
+            return y[i] + (y[i + 1] - y[i]) * x
+        m = self[d].values
+        x2 = x * x
+        x3 = x2 * x
+        return ((2 * x3 - 3 * x2 + 1) * y[i] + (x3 - 2 * x2 + x) * h * m[i]
+                + (-2 * x3 + 3 * x2) * y[i + 1] + (x3 - x2) * h * m[i + 1])
+
+    def _t_of_DoP(self, DoP: np.ndarray) -> np.ndarray:
+        """DoPになる時刻[ms]をDoPのエルミート補間の逆関数から求める"""
+        T = self["t"].values
+        D = self["DoP"].values
+        i = np.clip(np.searchsorted(D, DoP, side="right") - 1, 0, len(D) - 2)
+        dD = D[i + 1] - D[i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = np.clip(np.where(dD > 0, (DoP - D[i]) / dD, 1.), 0., 1.)
+        if "u" in self:
+            # DoPはtに対して単調増加(u>0)なので区間内でニュートン法
+            u = self["u"].values
+            h = (T[i + 1] - T[i]) * 1e-3
+            for _ in range(8):
+                x2 = x * x
+                x3 = x2 * x
+                f = ((2 * x3 - 3 * x2 + 1) * D[i] + (x3 - 2 * x2 + x) * h * u[i]
+                     + (-2 * x3 + 3 * x2) * D[i + 1] + (x3 - x2) * h * u[i + 1]) - DoP
+                df = ((6 * x2 - 6 * x) * (D[i] - D[i + 1]) + (3 * x2 - 4 * x + 1) * h * u[i]
+                      + (3 * x2 - 2 * x) * h * u[i + 1])
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    x = np.clip(np.where(df > 0, x - f / df, x), 0., 1.)
+        return T[i] + (T[i + 1] - T[i]) * x
+
+    def at(self, t: np.ndarray = None, DoP: np.ndarray = None) -> "Trajectory":
+        """記録点の間を補間して、時刻tまたは深さDoPでの状態を返す。
+
+        範囲外の点はNaNになる。
+
+        Parameters
+        ----------
+        t : np.ndarray, optional
+            時刻[ms], by default None
+        DoP : np.ndarray, optional
+            侵徹深さ[m]。tと同時には指定できない, by default None
+
+        Returns
+        -------
+        Trajectory
+            各点での状態。列は元の結果と同じ。まだ求めていない値は補間した値から求める
+        """
+        if (t is None) == (DoP is None):
+            raise ValueError("either t or DoP should be given")
+        if len(self) < 2:
+            raise ValueError("at least 2 records are needed")
+        T = self["t"].values
+        if t is None:
+            q = np.atleast_1d(np.asarray(DoP, dtype=np.float64))
+            D = self["DoP"].values
+            outside = (q < D[0]) | (q > D[-1]) | np.isnan(q)
+            t = self._t_of_DoP(np.where(outside, D[0], q))
+        else:
+            t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+            outside = (t < T[0]) | (t > T[-1]) | np.isnan(t)
+            t = np.where(outside, T[0], t)
+        i, x, h = self._locate(t)
+        out = {}
+        for k in self.columns:
+            if k == "t":
+                v = t
+            elif k == "DoP" and DoP is not None:
+                v = q
+            else:
+                v = self._hermite(k, i, x, h)
+            out[k] = np.where(outside, np.nan, v)
+        return Trajectory(out).derive(self._derived or {})
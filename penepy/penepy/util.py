@@ -1,7 +1,9 @@
+import copy
 import material
 import materialList
+import numpy as np
 
-from typing import List, Union
+from typing import Any, Dict, List, Union
 
 
 def getMaterials(*args) -> List[material.Material]:
@@ -78,3 +80,72 @@ def getTandP(mT: material.Material,
     T = material.Target(mT, Ys, ts, th)
     P = material.Penetrator(mP, L, D, Crh)
     return [T, P]
+
+
+def makeCalc(model: type,
+             P: material.Penetrator,
+             T: material.Target,
+             V0: float,
+             params: Dict[str, float] = None,
+             **kwargs: Any):
+    """P, Tの複製に対してparamsで指定したパラメータを上書きし、Calcを作る。
+
+    元のP, Tは変更されない。paramsのキーは
+
+    * "P.<属性名>", "T.<属性名>" : PenetratorやTargetの属性(例えば"P.Y", "T.Y0", "P.L")。
+      "P.LD"はDを固定してLを変更する
+    * "V0" : 衝突速度
+    * "fit_param[i]" : fit_paramのi番目の要素
+    * それ以外 : model(P, T, V0, **kwargs)のキーワード引数(例えばCalcForrLVの"K1", "K2")
+
+    のいずれか。
+
+    Parameters
+    ----------
+    model : type
+        CalcAWなど、Calcを継承したクラス
+    P : material.Penetrator
+        元になるPenetrator
+    T : material.Target
+        元になるTarget
+    V0 : float
+        衝突速度[m/s]
+    params : Dict[str, float], optional
+        上書きするパラメータ, by default None
+    **kwargs : Any
+        modelにそのまま渡すキーワード引数
+
+    Returns
+    -------
+    Calc
+        Calcを継承したクラス
+
+    Example
+    -------
+
+    ::
+
+        C = penepy.makeCalc(penepy.CalcAW, P, T, 2000, {"T.Y0": 1.2, "fit_param[0]": 3e-4})
+    """
+    P = copy.copy(P)
+    T = copy.copy(T)
+    if params is not None:
+        for name, v in params.items():
+            if name.startswith("P."):
+                attr = name[2:]
+                if attr == "LD":
+                    P.L = v * P.D
+                else:
+                    setattr(P, attr, v)
+            elif name.startswith("T."):
+                setattr(T, name[2:], v)
+            elif name == "V0":
+                V0 = v
+            elif name.startswith("fit_param["):
+                fp = np.array(kwargs.get("fit_param", [0.000287, 1.48e-07]),
+                              dtype=np.float64)
+                fp[int(name[len("fit_param["):-1])] = v
+                kwargs["fit_param"] = fp
+            else:
+                kwargs[name] = v
+    return model(P, T, V0, **kwargs)
@@ -0,0 +1,49 @@
+import penepy
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    aio_behavior()
+    thread_behavior()
+
+
+def aio_behavior():
+    #非同期に並べて計算した結果が同期的に計算したものと一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    C = penepy.CalcMBE(P, T, 1500.)
+    V = np.linspace(1000, 2000, 10)
+    ref = C.calc_Vdependent(V)
+    ref_calc = C.calc(1e-7, 1e-5)
+
+    async def run():
+        return await asyncio.gather(C.calc_Vdependent_async(V, chunksize=3),
+                                    C.calc_Vdependent_async(V[::-1]),
+                                    C.calc_async(1e-7, 1e-5))
+
+    r1, r2, r3 = asyncio.run(run())
+    assert np.allclose(r1["DoP"].values, ref["DoP"].values)
+    assert np.allclose(r2["DoP"].values, ref["DoP"].values[::-1])
+    assert np.allclose(r3["DoP"].values, ref_calc["DoP"].values)
+    assert C.V0 == 1500.
+
+
+def thread_behavior():
+    #1つのCalcを複数のスレッドで共有して計算しても、1スレッドで計算したものと一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV]:
+        C = model(P, T, 1500.)
+        V = np.linspace(1000, 3000, 16)
+        ref = C.calc_Vdependent(V)["DoP"].values
+        with ThreadPoolExecutor(4) as ex:
+            res = list(ex.map(C.calc_Vdependent, [V[i::4] for i in range(4)]))
+        for i in range(4):
+            assert np.allclose(res[i]["DoP"].values, ref[i::4])
+        assert C.V0 == 1500.
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import penepy
+import numpy as np
+
+
+def main():
+    batch_behavior()
+
+
+def batch_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T = penepy.Target(mT, 1.5, 0.005, 0.01)
+    P = [penepy.Penetrator(mP, L, 0.025) for L in np.linspace(0.1, 0.5, 5)]
+    V0 = np.linspace(800, 2500, 5)
+
+    #1回の呼び出しの結果が、構成ごとにCalcを作ったcalc_finalと一致するか
+    cases = penepy.case_table(P, T, V0, dt=1e-7)
+    assert len(cases) == 5
+    for model in (penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcForrLV, penepy.CalcMBE):
+        res = penepy.solve_batch(model, cases)
+        for i in range(len(cases)):
+            ref = model(P[i], T, V0[i]).calc_final(1e-7)
+            for k in ("DoP", "L", "t"):
+                assert np.isclose(res[k].iloc[i], ref[k], rtol=1e-12), (model, i, k)
+
+    #fieldsで選んだ値だけが、casesと同じ順に返るか
+    res = penepy.solve_batch("CalcMBE", cases.iloc[::-1], fields=["DoP", "Le"], max_parallel=2)
+    assert list(res.columns) == ["DoP", "Le"]
+    assert (res.index == cases.index[::-1]).all()
+    assert np.isclose(res["DoP"].iloc[0], penepy.CalcMBE(P[4], T, V0[4]).calc_final(1e-7)["DoP"])
+
+    #省略した列は既定値になるか
+    small = cases.drop(columns=["P.Crh", "dt"])
+    a = penepy.solve_batch("CalcForrLV", small, fields=["DoP"])
+    full = cases.assign(**{"fit_param[0]": 0.000287, "fit_param[1]": 1.48e-07,
+                           "K1": 2 / 3, "K2": 0.3963565945945571})
+    b = penepy.solve_batch("CalcForrLV", full, fields=["DoP"])
+    assert np.allclose(a["DoP"].values, b["DoP"].values)
+
+
+if __name__ == "__main__":
+    main()
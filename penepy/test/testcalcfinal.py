@@ -0,0 +1,25 @@
+import penepy
+import numpy as np
+
+
+def main():
+    calc_final_behavior()
+
+
+def calc_final_behavior():
+    #calc_finalがcalcの最後の記録、calc_Vdependentと一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcAWLV, penepy.CalcAWHVLV,
+                  penepy.CalcForrLV, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        r = C.calc_final()
+        res = C.calc(1e-7, 1)
+        res_V = C.calc_Vdependent(np.array([1500.]))
+        for k, v in r.items():
+            assert np.isclose(v, res[k].values[-1], equal_nan=True), (model, k)
+            assert np.isclose(v, res_V[k].values[0], equal_nan=True), (model, k)
+
+
+if __name__ == "__main__":
+    main()
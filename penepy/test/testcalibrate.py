@@ -0,0 +1,36 @@
+import penepy
+import numpy as np
+import pandas as pd
+
+
+def main():
+    calibrate_behavior()
+
+
+def calibrate_behavior():
+    #既知の標的強度で作ったDoPから標的強度を推定し直せるか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    V = np.linspace(1000, 2000, 5)
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    T.Y0 = 1.2
+    DoP = penepy.CalcMBE(P, T, V[0]).calc_Vdependent(V)["DoP"].values
+    data = pd.DataFrame({"V0": V, "L": 0.25, "D": 0.025, "mT": "iron", "mP": "WHA", "DoP": DoP})
+
+    cal = penepy.Calibration(penepy.CalcMBE, data, {"T.Y0": 1.0}, bounds={"T.Y0": (0.1, 5)})
+    cal.fit()
+    assert abs(cal.params["T.Y0"] - 1.2) < 1e-3
+    assert np.allclose(cal.predict(), DoP, rtol=1e-6, atol=1e-6)
+    nfev = cal.nfev
+    cal.predict()
+    assert cal.nfev == nfev
+    assert list(cal.summary().index) == ["T.Y0"]
+
+    #calc_sensitivityが扱えないパラメータは中心差分で求めるか
+    import calibrate
+    (DoP0, g), = calibrate._evaluate((penepy.CalcMBE, [(P, T, V[0])], ["P.LD"], np.array([10.]),
+                                      1e-7, 1e-5, {}))
+    assert np.isfinite(DoP0) and g[0] > 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import penepy
+import pickle
+import numpy as np
+
+
+def main():
+    derived_behavior()
+
+
+def derived_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcForrLV, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        ref = C.calc(1e-7, 1e-6, fields=["t", "DoP", "alpha", "Y", "Rt"])
+        res = C.calc(1e-7, 1e-6)
+
+        #Y, Rtは記録せず、参照したときに記録した場合と同じ値が求まるか
+        assert "Y" not in res.columns and "Rt" in res
+        assert np.allclose(res["Rt"].values, ref["Rt"].values, equal_nan=True), model
+        assert np.allclose(res["Y"].values, ref["Y"].values), model
+        assert "Rt" in res.columns and "KE" in res.derived
+
+        #残存質量、運動エネルギー、DoP/L、クレーター体積
+        m = res["m"].values
+        assert np.isclose(m[0], P.m) and np.all(np.diff(m) <= 1e-12)
+        assert np.allclose(res["KE"].values, 0.5 * m * res["v"].values**2)
+        assert np.allclose(res["DoP/L"].values, res["DoP"].values / P.L)
+        assert np.allclose(res["Vc"].values, np.pi * C.Rc**2 * res["DoP"].values)
+
+    #段階を切り替えるモデルでは、計算中に記録した段階の始まりを使い、深さで強度の変わる標的でも段階ごとの深さでYを求めるか
+    Tp = penepy.Target(mT).set_profile([0, 0.05, 0.05, 0.3], [2., 2., 0.5, 0.5])
+    C = penepy.CalcAWHVLV(P, Tp, 2000.)
+    for dt_log in [1e-6, penepy.LogPolicy(dDoP=1e-3)]:
+        ref = C.calc(1e-7, dt_log, fields=["t", "DoP", "alpha", "Y", "Rt"])
+        res = C.calc(1e-7, dt_log)
+        stages = res.attrs["stages"]
+        assert len(stages) == 2 and stages[0] == (0., 0.)
+        assert np.any(np.isclose(res["t"].values, stages[1][0]))
+        assert np.allclose(res["Y"].values, ref["Y"].values)
+        assert np.allclose(res["Rt"].values, ref["Rt"].values, equal_nan=True)
+    C = penepy.CalcAW(P, T, 1500.)
+    assert C.calc(1e-7, 1e-6).attrs["stages"] == [(0., 0.)]
+
+    #pickleすると求めていない値も列として残るか
+    C = penepy.CalcMBE(P, T, 1500.)
+    res = C.calc(1e-7, 1e-6)
+    r = pickle.loads(pickle.dumps(res))
+    assert "KE" in r.columns and "Y" in r.columns and r.derived == []
+
+    #補間した結果やfieldsを指定した結果からも求められるか
+    res = C.calc_dense()
+    a = res.at(t=[0.01, 0.02])
+    assert np.allclose(a["Y"].values, T.Y(a["DoP"].values))
+    res = C.calc(1e-7, 1e-6, fields=["t", "DoP"])
+    assert np.allclose(res["DoP/L"].values, res["DoP"].values / P.L)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import penepy
+import numpy as np
+
+
+def main():
+    fields_behavior()
+
+
+def fields_behavior():
+    #fieldsで指定した値だけが記録され、値はすべて記録した場合と一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    fields = ["t", "DoP", "u", "Rt"]
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        ref = C.calc(1e-7, 1e-6)
+        res = C.calc(1e-7, 1e-6, fields=fields)
+        assert list(res.columns) == fields
+        for k in fields:
+            assert np.allclose(res[k].values, ref[k].values, equal_nan=True), (model, k)
+
+    #存在しない名前はエラー
+    try:
+        C.calc(1e-7, 1e-6, fields=["DoP", "foo"])
+        assert False
+    except Exception:
+        pass
+
+
+if __name__ == "__main__":
+    main()
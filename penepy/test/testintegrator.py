@@ -0,0 +1,43 @@
+import penepy
+import numpy as np
+
+
+def main():
+    integrator_behavior()
+
+
+def integrator_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+
+    #既定は硬いステップだけ陰的に積分するautoで、名前で切り替えられるか
+    for model in [penepy.CalcAW, penepy.CalcAWLV, penepy.CalcAWHVLV]:
+        assert model(P, T, 1500.).integrator == "auto"
+    C = penepy.CalcAW(P, T, 1500.)
+    C.integrator = "explicit"
+    assert C.integrator == "explicit"
+    try:
+        C.integrator = "rk4"
+        assert False
+    except ValueError:
+        pass
+
+    for model in [penepy.CalcAW, penepy.CalcAWLV, penepy.CalcAWHVLV]:
+        ref = model(P, T, 1500., integrator="explicit").calc_final(1e-8)["DoP"]
+        #硬くない区間はExplicitと同じなので、autoの結果はほぼ変わらないか
+        auto = model(P, T, 1500., integrator="auto").calc_final(1e-7)["DoP"]
+        assert np.isclose(auto, ref, rtol=1e-2), model
+        #陰的な積分は大きいdtでも発散しないか
+        imp = model(P, T, 1500., integrator="implicit").calc_final(1e-6)["DoP"]
+        assert np.isfinite(imp) and np.isclose(imp, ref, rtol=0.1), model
+
+    #solve_batchでも名前で指定できるか
+    cases = penepy.case_table(P, T, [1500., 3000.], dt=1e-7, integrator="auto")
+    res = penepy.solve_batch(penepy.CalcAW, cases, fields=["DoP"])
+    for i, V0 in enumerate([1500., 3000.]):
+        r = penepy.CalcAW(P, T, V0, integrator="auto").calc_final(1e-7)
+        assert np.isclose(res["DoP"].iloc[i], r["DoP"], rtol=1e-12)
+
+
+if __name__ == "__main__":
+    main()
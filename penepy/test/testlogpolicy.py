@@ -0,0 +1,34 @@
+import penepy
+import numpy as np
+
+
+def main():
+    logpolicy_behavior()
+
+
+def logpolicy_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        ref = C.calc(1e-7, 1e-6)
+        final = C.calc_final()
+
+        #DoPの間隔で記録され、最初と最後の状態は必ず記録されるか
+        res = C.calc(1e-7, penepy.LogPolicy(dDoP=1e-2))
+        assert np.isclose(res["DoP"].values[0], ref["DoP"].values[0])
+        assert np.isclose(res["DoP"].values[-1], final["DoP"])
+        assert np.isclose(res["t"].values[-1], final["t"])
+        assert np.all(np.diff(res["DoP"].values) < 1.1e-2 + 1e-3)
+
+        #記録数の上限を守るか
+        policy = penepy.LogPolicy(dt_log=1e-8, tolerance={"u": 1.}, max_points=50)
+        res = C.calc(1e-7, policy, fields=["t", "u"])
+        assert len(res) <= 50
+        assert list(res.columns) == ["t", "u"]
+        assert np.all(np.diff(res["t"].values) >= 0)
+        assert np.isclose(res["t"].values[-1], final["t"])
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ import numpy as np
 
 def main():
     material_property_behavior()
+    mirror_behavior()
+    material_registry_behavior()
+    target_profile_behavior()
     Calc_behavior()
 
 
@@ -126,6 +129,112 @@ def material_property_behavior():
     assert T.m == penepy.Penetrator(Mref, 2 * L, 2 * D, Tref.Crh * 2).m
 
 
+def mirror_behavior():
+    #パラメータを変えると派生量と.NET側のオブジェクトが作り直されるか
+    M = penepy.materialPropertyList["iron"]
+    T = penepy.Target(M, 2, 0.01, 0.02)
+    P = penepy.Penetrator(M, 0.1, 0.01)
+    net = T._T
+    assert T._T is net
+    T.rho = M.rho * 2
+    assert T._net is None
+    M2 = penepy.materialPropertyList["iron"]
+    M2.rho = M.rho * 2
+    assert T.c0 == penepy.Target(M2, 2, 0.01, 0.02).c0
+    m = P.m
+    P.L = 0.2
+    assert P._net is None and np.isclose(P.m, 2 * m, rtol=0.1)
+
+    #Calcを作ったときに変更後の値が.NET側に渡るか
+    C = penepy.CalcAW(P, T, 1000.)
+    assert C._C.T.rho == T.rho and C._C.T.ts == T.ts and C._C.P.L == P.L
+    T.ts = 0.015
+    C = penepy.CalcAW(P, T, 1000.)
+    assert C._C.T.ts == 0.015 and C._C.T.th == 0.02
+
+    #ts, thの範囲外の値はValueErrorになり、値は変わらないか
+    for name, v in [("ts", 0.03), ("ts", -1.), ("th", 0.01)]:
+        try:
+            setattr(T, name, v)
+            assert False
+        except ValueError:
+            pass
+    assert T.ts == 0.015 and T.th == 0.02
+
+
+def material_registry_behavior():
+    #materialPropertyListの読み込みと検索
+    import os
+    import json
+    import tempfile
+    L = penepy.materialPropertyList
+    M = L["iron"]
+    M.Y = 5
+    assert L["iron"].Y == 1
+    assert L.record("iron").Y == 1
+
+    data = [{
+        "name": "RHA",
+        "kind": "target",
+        "rho": 7850,
+        "Y": 1.2,
+        "E": 207,
+        "K0": 160,
+        "k": 1.9
+    }, {
+        "name": "HHA",
+        "kind": "target",
+        "rho": 7850,
+        "Y": 2.5,
+        "E": 207,
+        "K0": 160,
+        "k": 1.9,
+        "Ys": 3,
+        "ts": 0.002,
+        "th": 0.005
+    }]
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        assert L.load(path) == ["RHA", "HHA"]
+    finally:
+        os.remove(path)
+    assert [r.name for r in L.query(kind="target", Y=(1, 2))] == ["RHA"]
+    assert set(r.name for r in L.query(Y=(None, 0.5))) == {"Al"}
+    T = L.record("HHA").target()
+    assert T.Y(0.) == 3 and T.Y(0.01) == 2.5
+    del L["RHA"]
+    del L["HHA"]
+
+
+def target_profile_behavior():
+    #表面硬化と同じ形の表を与えると、Yも計算結果も一致するか
+    M = penepy.materialPropertyList["iron"]
+    Tref = penepy.Target(M, 2, 0.005, 0.01)
+    T = penepy.Target(M).set_profile([0, 0.005, 0.01], [2, 2, M.Y])
+    x = np.linspace(-0.01, 0.05, 1001)
+    assert np.allclose(T.Y(x), Tref.Y(x))
+    P = penepy.Penetrator(penepy.materialPropertyList["WHA"], 0.1, 0.01)
+    for model in (penepy.CalcAW, penepy.CalcMBE):
+        ref = model(P, Tref, 1500).calc_final()
+        res = model(P, T, 1500).calc_final()
+        assert np.isclose(res["DoP"], ref["DoP"], rtol=1e-9)
+
+    #積層板: 同じ深さを2回与えると不連続になり、.NET側の強度と一致するか
+    T = penepy.Target(M).set_profile([0, 0.01, 0.01, 0.03], [1.5, 1.5, 0.8, 0.8])
+    assert T.Y(0.005) == 1.5 and T.Y(0.01) == 0.8 and T.Y(0.1) == 0.8
+    res = penepy.CalcMBE(P, T, 1500).calc(1e-7, 1e-6)
+    assert np.allclose(res["Y"], T.Y(res["DoP"].values))
+
+    #pickleしても表は残り、clear_profileで元に戻るか
+    import pickle
+    T2 = pickle.loads(pickle.dumps(T))
+    assert np.allclose(T2.Y(x), T.Y(x))
+    T.clear_profile()
+    assert T.profile is None and T.Y(0.005) == M.Y
+
+
 def Calc_behavior():
     M = penepy.materialPropertyList["iron"]
     L, D = 1., 0.05
@@ -0,0 +1,61 @@
+import penepy
+import numpy as np
+
+
+def main():
+    montecarlo_behavior()
+
+
+def montecarlo_behavior():
+    #分布の幅が0なら全サンプルが基準の計算と一致するか、統計量が逐次計算と一致するか
+    M = penepy.materialPropertyList["iron"]
+    T = penepy.Target(M)
+    P = penepy.Penetrator(penepy.materialPropertyList["WHA"], 0.5, 0.05)
+    ref = penepy.CalcMBE(P, T, 1500).calc_Vdependent(np.array([1500.]))
+    MC = penepy.MonteCarlo(penepy.CalcMBE, P, T, 1500,
+                           {"T.Y0": penepy.Normal(T.Y0, 0.)},
+                           batchsize=4,
+                           seed=0)
+    MC.run(8)
+    assert MC.n == 8 and MC.nfail == 0
+    assert np.isclose(MC.mean, ref["DoP"].values[0])
+    assert np.isclose(MC.quantile(0.5), ref["DoP"].values[0])
+    assert len(MC.history) == 2
+    assert T.Y0 == M.Y
+
+    #強度の表のないTargetではsolve_batchでまとめて計算し、1件ずつ計算したものと一致するか
+    dists = {"T.Y0": penepy.Uniform(0.8, 1.2), "P.LD": penepy.Uniform(8, 12)}
+    MC = penepy.MonteCarlo(penepy.CalcMBE, P, T, 1500, dists, batchsize=3, seed=1)
+    MC.run(3)
+    assert MC._cases and MC.n == 3
+    rng = np.random.default_rng(1)
+    Y0, LD = rng.uniform(0.8, 1.2, 3), rng.uniform(8, 12, 3)
+    ref = [penepy.makeCalc(penepy.CalcMBE, P, T, 1500, {"T.Y0": a, "P.LD": b}).calc_final()["DoP"]
+           for a, b in zip(Y0, LD)]
+    assert np.isclose(MC.mean, np.mean(ref))
+
+    #強度の表があれば1件ずつ計算するか
+    Tp = penepy.Target(M).set_profile([0, 0.1], [1.5, 1.])
+    MC = penepy.MonteCarlo(penepy.CalcMBE, P, Tp, 1500, dists, batchsize=2, seed=1)
+    MC.run(2)
+    assert not MC._cases and MC.n == 2
+
+    x = np.random.default_rng(1).normal(size=2000)
+    MC = penepy.MonteCarlo(penepy.CalcMBE, P, T, 1500, {}, bins=20)
+    for b in np.array_split(x, 7):
+        MC._accumulate(b)
+    assert np.isclose(MC.mean, x.mean())
+    assert np.isclose(MC.std, x.std(ddof=1))
+    assert abs(MC.quantile(0.95) - np.quantile(x, 0.95)) < 0.1
+    counts, edges = MC.histogram()
+    assert counts.sum() + sum(MC.outside) == len(x)
+
+    #サンプルが5個以下なら正確なquantileになるか
+    for m in range(1, 6):
+        MC = penepy.MonteCarlo(penepy.CalcMBE, P, T, 1500, {})
+        MC._accumulate(np.arange(1., m + 1))
+        assert np.isclose(MC.quantile(0.95), np.quantile(np.arange(1., m + 1), 0.95))
+
+
+if __name__ == "__main__":
+    main()
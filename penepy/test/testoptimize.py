@@ -0,0 +1,45 @@
+import penepy
+import numpy as np
+
+
+def main():
+    optimize_behavior()
+
+
+def optimize_behavior():
+    mT, = penepy.getMaterials("iron")
+    T = penepy.Target(mT)
+    bounds = {"LD": (5, 20), "D": (0.01, 0.03), "Crh": (0.5, 2)}
+    S = penepy.DesignSearch(penepy.CalcMBE, T, 1500., ["WHA", "iron"], bounds,
+                            mass=1., n_init=8, seed=0)
+    S.run(max_iter=20)
+
+    #最良の設計は質量の上限と範囲を守り、記録されたDoPは個別に計算した値と一致するか
+    best = S.best(3)
+    assert len(best) == 3
+    b = best.iloc[0]
+    assert b["m"] <= 1. and 5 <= b["LD"] <= 20 and 0.01 <= b["D"] <= 0.03
+    assert (np.diff(best["DoP"].values) <= 0).all()
+    mP = penepy.materialPropertyList[b["material"]]
+    P = penepy.Penetrator(mP, b["L"], b["D"], b["Crh"])
+    assert np.isclose(P.m, b["m"])
+    assert np.isclose(penepy.CalcMBE(P, T, 1500.).calc_final()["DoP"], b["DoP"])
+    #探索で初期点(材料ごとに8点)の最良より良くなっているか
+    h = S.history
+    init = h.iloc[:16]
+    assert b["DoP"] >= init[init["feasible"]]["DoP"].max()
+
+    #同じ設計は再計算しないか
+    assert S.nfev == len(h)
+    assert not h.duplicated(["material", "LD", "D", "Crh"]).any()
+
+    #パレートフロントは質量が増えるほどDoPも増え、他の設計に支配されないか
+    F = S.pareto()
+    assert (np.diff(F["m"].values) >= 0).all() and (np.diff(F["DoP"].values) > 0).all()
+    for _, r in h.iterrows():
+        dominated = ((F["m"] <= r["m"]) & (F["DoP"] > r["DoP"])).any()
+        assert dominated or r["DoP"] in F["DoP"].values
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import penepy
+import numpy as np
+import warnings
+
+
+def main():
+    parallel_behavior()
+
+
+def history(V0):
+    T, P = penepy.getTandP(*penepy.getMaterials("iron", "WHA"), 0.25, 0.025)
+    if V0 < 0:
+        raise ValueError
+    return penepy.CalcAW(P, T, V0).calc(1e-7, penepy.LogPolicy(dDoP=1e-3, max_points=100))
+
+
+def final(V0):
+    T, P = penepy.getTandP(*penepy.getMaterials("iron", "WHA"), 0.25, 0.025)
+    return penepy.CalcAW(P, T, V0).calc_final(1e-7)
+
+
+def parallel_behavior():
+    V = [1000., 1500., -1., 2000.]
+
+    #子プロセスが書き込んだ結果がケースの順に並び、1件ずつ計算したものと一致するか
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        R = penepy.map_shared(history, V, ["t", "DoP"], rows=100, n_jobs=2)
+    #失敗したケースの番号と例外が親プロセスに記録され、警告が出るか
+    assert R.failed == [2] and isinstance(R.error, ValueError)
+    assert len(w) == 1 and issubclass(w[0].category, RuntimeWarning)
+    for i, V0 in enumerate(V):
+        if V0 < 0:
+            #失敗したケースは行数0でNaNになるか
+            assert R.count[i] == 0 and np.all(np.isnan(R.values[i]))
+            continue
+        ref = history(V0)
+        assert R.count[i] == len(ref)
+        assert np.array_equal(R.frame(i)["DoP"].values, ref["DoP"].values)
+        assert np.shares_memory(R.frame(i).values, R.values)
+    df = R.frame()
+    assert len(df) == R.count.sum()
+    assert np.array_equal(np.unique(df["case"]), [0, 1, 3])
+
+    #errors="raise"なら最初の例外を投げるか
+    for n_jobs in [1, 2]:
+        try:
+            penepy.map_shared(history, V, ["t", "DoP"], rows=100, n_jobs=n_jobs, errors="raise")
+            assert False
+        except ValueError:
+            pass
+
+    #行数がそろっていればコピーせずにまとめられるか
+    R = penepy.map_shared(final, V[:2], ["DoP", "t"], n_jobs=2)
+    assert R.failed == [] and R.error is None
+    df = R.frame()
+    assert np.shares_memory(df[["DoP", "t"]].values, R.values)
+    assert np.isclose(df["DoP"].values[1], final(V[1])["DoP"])
+
+    #rowsを超える結果はエラーになるか
+    try:
+        penepy.map_shared(history, V[:1], ["t"], rows=10)
+        assert False
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import penepy
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+
+def main():
+    lttb_behavior()
+    plot_behavior()
+
+
+def lttb_behavior():
+    #端点とピークを残してn点に間引けるか
+    t = np.linspace(0, 1, 100001)
+    y = np.sin(20 * t)
+    y[50000] = 5.
+    i = penepy.lttb(t, y, 1000)
+    assert len(i) == 1000 and i[0] == 0 and i[-1] == len(t) - 1
+    assert (np.diff(i) > 0).all()
+    assert 50000 in i
+    assert (penepy.lttb(t[:10], y[:10], 1000) == np.arange(10)).all()
+
+
+def plot_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    C = penepy.CalcAW(P, T, 1500.)
+    res = C.calc(1e-7, 1e-8)
+
+    #yを複数指定すると系列ごとに描かれ、max_points点以下に間引かれるか
+    ax = penepy.plot(res, x="DoP", y="u v", max_points=500)
+    assert [l.get_label() for l in ax.lines] == ["u", "v"]
+    assert all(len(l.get_xdata()) <= 500 for l in ax.lines)
+    assert ax.get_xlabel() == "DoP [m]" and ax.get_ylabel() == "u, v [m/s]"
+    x = ax.lines[0].get_xdata()
+    assert x[0] == res["DoP"].iloc[0] and x[-1] == res["DoP"].iloc[-1]
+
+    #calc_VdependentではV0を使える
+    resV = C.calc_Vdependent(np.linspace(500, 2500, 20))
+    ax = penepy.plot(resV, x="V0", y="DoP")
+    assert len(ax.lines[0].get_xdata()) == 20
+
+    #結果にないキーワードはエラーになるか
+    try:
+        penepy.plot(resV, x="t", y="V1")
+        assert False
+    except KeyError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import penepy
+import numpy as np
+
+
+def main():
+    sensitivity_behavior()
+
+
+def sensitivity_behavior():
+    #並走させた感度が、calc_Vdependentの差分とおおむね一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    V = 1500.
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcMBE]:
+        C = model(P, T, V)
+        DoP, grad = C.calc_sensitivity(["T.Y0", "P.L"])
+        assert np.isclose(DoP, C.calc_Vdependent([V])["DoP"][0])
+        for name, h in [("T.Y0", 0.05), ("P.L", 0.01)]:
+            p0 = T.Y0 if name == "T.Y0" else P.L
+            Dp = penepy.makeCalc(model, P, T, V, {name: p0 + h}).calc_Vdependent([V])["DoP"][0]
+            Dm = penepy.makeCalc(model, P, T, V, {name: p0 - h}).calc_Vdependent([V])["DoP"][0]
+            fd = (Dp - Dm) / (2 * h)
+            assert abs(grad[name] - fd) < 0.1 * abs(fd) + 1e-3
+        assert grad["T.Y0"] < 0 and grad["P.L"] > 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import penepy
+import asyncio
+import json
+import numpy as np
+
+
+def main():
+    server_behavior()
+
+
+def server_behavior():
+    #同時に来たリクエストがまとめて計算され、個別に計算したものと一致するか
+    V = np.linspace(1000, 2000, 10)
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    ref = penepy.CalcAW(P, T, V[0]).calc_Vdependent(V)["DoP"].values
+    req = {"model": "CalcAW",
+           "P": {"material": "WHA", "L": 0.25, "D": 0.025},
+           "T": {"material": "iron"}}
+
+    async def run():
+        S = penepy.CalcServer(window=0.05)
+        res = await asyncio.gather(*[S.submit(dict(req, V0=v)) for v in V])
+        assert S.requests == len(V)
+        assert S.batches == 1
+
+        #HTTP経由でも同じ結果になるか
+        server = await S.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(dict(req, V0=V.tolist())).encode("utf-8")
+        writer.write(b"POST /calc_Vdependent HTTP/1.1\r\n"
+                     + f"Content-Length: {len(body)}\r\n".encode("latin-1")
+                     + b"Connection: close\r\n\r\n" + body)
+        await writer.drain()
+        data = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        head, _, payload = data.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 200")
+        return res, json.loads(payload)
+
+    res, http = asyncio.run(run())
+    assert np.allclose([r["DoP"] for r in res], ref)
+    assert np.allclose(http["DoP"], ref)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import penepy
+import numpy as np
+
+
+def main():
+    similarity_behavior()
+
+
+def similarity_behavior():
+    #大きさだけが違う計算は1回の計算の変換で済み、直接計算した結果と一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    S = penepy.SimilarityCache()
+    for D in [0.01, 0.02, 0.04]:
+        T, P = penepy.getTandP(mT, mP, 10 * D, D)
+        res = S.calc(penepy.CalcMBE, P, T, 1500., 1e-7 * D / 0.01, 1.)
+        ref = penepy.CalcMBE(P, T, 1500.).calc(1e-7 * D / 0.01, 1.)
+        assert np.allclose(res["DoP"].values, ref["DoP"].values, rtol=1e-9)
+        assert np.allclose(res["t"].values, ref["t"].values, rtol=1e-9)
+    assert S.misses == 1 and S.hits == 2
+
+    #記録間隔だけが違う計算も、記憶した全ステップから取り出して再計算しないか
+    res = S.calc(penepy.CalcMBE, P, T, 1500., 1e-7 * D / 0.01, 2e-6)
+    ref = penepy.CalcMBE(P, T, 1500.).calc(1e-7 * D / 0.01, 2e-6)
+    assert len(res) == len(ref)
+    assert np.allclose(res["DoP"].values, ref["DoP"].values, rtol=1e-9)
+    assert S.misses == 1 and S.hits == 3
+
+    T, P = penepy.getTandP(mT, mP, 0.2, 0.02)
+    assert penepy.similarity_key(penepy.CalcAW, P, T) is None
+    S.calc_Vdependent(penepy.CalcAW, P, T, [1500.])
+    assert S.misses == 2
+
+
+if __name__ == "__main__":
+    main()
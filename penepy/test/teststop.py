@@ -0,0 +1,46 @@
+import penepy
+import numpy as np
+
+
+def main():
+    stop_behavior()
+
+
+def stop_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcAWHVLV, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        final = C.calc_final(1e-7)
+        H = 0.8 * final["DoP"]
+
+        #閾値に達した最初のステップで止まり、止めた条件が残るか
+        res = C.calc(1e-7, 1e-6, stop=f"DoP >= {H}")
+        assert res.attrs["stop"].startswith("DoP >="), model
+        assert H <= res["DoP"].values[-1] < H + 1e-3
+        assert res["t"].values[-1] < final["t"]
+        r = C.calc_final(1e-7, stop=f"DoP >= {H}")
+        assert r["stop"] == res.attrs["stop"]
+        assert np.isclose(r["DoP"], res["DoP"].values[-1])
+
+        #条件を満たさなければ侵徹終了まで計算するか
+        r = C.calc_final(1e-7, stop=["DoP >= 100", "t >= 100"])
+        assert r["stop"] is None
+        assert np.isclose(r["DoP"], final["DoP"])
+
+        #pythonの関数でも止められ、それより後の記録は捨てられるか
+        res = C.calc(1e-7, penepy.LogPolicy(dDoP=1e-3), stop=lambda s: s["DoP"] >= H)
+        assert res.attrs["stop"] == "predicate"
+        assert H <= res["DoP"].values[-1] < H + 1e-2
+        assert np.all(np.diff(res["t"].values) >= 0)
+
+    #calc_Vdependentでは衝突速度ごとに止めた条件が残るか
+    C = penepy.CalcAW(P, T, 1500.)
+    H = C.calc_final(1e-7)["DoP"]
+    res = C.calc_Vdependent([1000., 2000.], dt=1e-7, stop=f"DoP >= {H}")
+    assert res["stop"][0] is None and res["stop"][1].startswith("DoP >=")
+    assert res["DoP"][0] < H <= res["DoP"][1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import penepy
+import numpy as np
+import os
+import tempfile
+
+
+def main():
+    surrogate_behavior()
+
+
+def surrogate_behavior():
+    #格子点では元の計算と一致し、保存、読み込みで結果が変わらないか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    V = np.linspace(1000, 2000, 6)
+    S = penepy.Surrogate.build(penepy.CalcMBE, P, T, {"V0": V, "LD": [5., 10.]})
+    ref = penepy.makeCalc(penepy.CalcMBE, P, T, V[0], {"P.LD": 10.}).calc_Vdependent(V)
+    assert np.allclose(S(V0=V, LD=10.), ref["DoP"].values)
+
+    err = S.spot_check(5, seed=0)
+    assert err["DoP"] < 0.05
+    q = {"V0": 2500., "LD": 7.}
+    assert np.isclose(S.predict(fallback=True, **q), S.solve(**q))
+
+    path = os.path.join(tempfile.mkdtemp(), "mbe.npz")
+    S.save(path)
+    S2 = penepy.Surrogate.load(path)
+    assert np.allclose(S2(V0=[1234., 1800.], LD=6.), S(V0=[1234., 1800.], LD=6.))
+    assert S2.error == S.error
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import penepy
+import numpy as np
+import shutil
+import tempfile
+
+
+def main():
+    sweep_resume_behavior()
+
+
+def build(L):
+    M = penepy.materialPropertyList["iron"]
+    T = penepy.Target(M)
+    P = penepy.Penetrator(M, L, 0.05)
+    return penepy.CalcMBE(P, T, 2000)
+
+
+def sweep_resume_behavior():
+    #途中で止まったスイープが続きから再開されるか
+    V_list = np.linspace(500, 2000, 5)
+    points = [{"L": L} for L in [0.5, 1., 1.5]]
+    path = tempfile.mkdtemp()
+    try:
+        task = penepy.Vdependent_task(build, V_list)
+        S = penepy.SweepRunner(path, points, task)
+        S.run_chunk(0)
+
+        called = []
+
+        def counting_task(point):
+            called.append(point["L"])
+            return task(point)
+
+        S = penepy.SweepRunner(path, points, counting_task)
+        assert S.done == 1
+        res = S.run()
+        assert called == [1., 1.5]
+        assert len(res) == len(points) * len(V_list)
+
+        ref = build(1.5).calc_Vdependent(V_list)
+        assert (res[res["point"] == 2]["DoP"].values == ref["DoP"].values).all()
+
+        try:
+            penepy.SweepRunner(path, points[:2], task)
+            assert False
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
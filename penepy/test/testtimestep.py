@@ -0,0 +1,38 @@
+import penepy
+import numpy as np
+
+
+def main():
+    timestep_behavior()
+
+
+def timestep_behavior():
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+
+    #選ばれたdtでの誤差の見積もりが許容値以下で、より細かいdtとの差も小さいか
+    dt, hist = penepy.select_dt(penepy.CalcMBE, P, T, 1500., tol_DoP=1e-3)
+    assert dt in hist["dt"].values
+    row = hist[hist["dt"] == dt].iloc[0]
+    assert row["err_DoP"] <= 1e-3
+    C = penepy.CalcMBE(P, T, 1500.)
+    fine = C.calc_final(dt / 4)["DoP"]
+    assert abs(C.calc_final(dt)["DoP"] - fine) < 2e-3 * fine
+
+    #dt_tableに登録したdtがcalc_Vdependentで使われるか
+    try:
+        penepy.dt_table.set(penepy.CalcMBE, 0., 2000., 4e-7)
+        penepy.dt_table.set(penepy.CalcMBE, 2000., 5000., 1e-7)
+        V = np.array([1000., 3000.])
+        res = C.calc_Vdependent(V)
+        ref = C.calc_Vdependent(V, dt=np.array([4e-7, 1e-7]))
+        assert np.allclose(res["DoP"].values, ref["DoP"].values)
+        assert np.isclose(C.calc_final()["DoP"], C.calc_final(4e-7)["DoP"])
+    finally:
+        penepy.dt_table.clear()
+    assert np.allclose(C.calc_Vdependent(V)["DoP"].values,
+                       C.calc_Vdependent(V, dt=1e-7)["DoP"].values)
+
+
+if __name__ == "__main__":
+    main()
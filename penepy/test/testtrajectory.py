@@ -0,0 +1,31 @@
+import penepy
+import numpy as np
+
+
+def main():
+    trajectory_behavior()
+
+
+def trajectory_behavior():
+    #粗く記録した結果の補間が、細かく記録した結果と一致するか
+    mT, mP = penepy.getMaterials("iron", "WHA")
+    T, P = penepy.getTandP(mT, mP, 0.25, 0.025)
+    for model in [penepy.CalcAW, penepy.CalcMBE]:
+        C = model(P, T, 1500.)
+        ref = C.calc(1e-7, 1e-7)
+        res = C.calc_dense()
+        assert len(res) < len(ref) / 10
+        q = ref.iloc[::37]
+        a = res.at(t=q["t"].values)
+        assert np.allclose(a["DoP"].values, q["DoP"].values, rtol=1e-3, atol=1e-5)
+        assert np.allclose(a["u"].values, q["u"].values, rtol=1e-2, atol=1.)
+
+        b = res.at(DoP=q["DoP"].values)
+        assert np.allclose(b["t"].values, q["t"].values, rtol=1e-2, atol=1e-4)
+
+        #範囲外はNaN
+        assert np.isnan(res.at(t=[-1.])["u"].values[0])
+
+
+if __name__ == "__main__":
+    main()